@@ -0,0 +1,92 @@
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+# Este modulo es el núcleo de agregación sobre estados combinables por pozo y por día (tablas de rollups.py)
+# Un estado (suma, conteo, mínimo, máximo, suma de cuadrados) de dos grupos se combina sumando o tomando mín/máx,
+# así que cualquier granularidad (semana, mes, año, total por pozo) sale de los estados diarios sin leer la tabla fuente.
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+
+import numpy as np
+import pandas as pd
+
+ESTADOS = ("Suma", "Conteo", "Minimo", "Maximo", "Suma_Cuadrados")
+
+# Columnas con las que se identifica cada período
+CLAVES_PERIODO = {
+    "dia": ["Dia"],
+    "semana": ["Año", "Semana"],
+    "mes": ["Año", "Mes"],
+    "año": ["Año"],
+    "total": [],
+}
+
+def columna_estado(estado, medida):
+    return f"{estado}_{medida.replace(' ', '_')}"
+
+def medidas_de(estados):
+    # Medidas presentes en un DataFrame de estados (las que tienen columna de conteo)
+    prefijo = "Conteo_"
+    return [columna[len(prefijo):] for columna in estados.columns if columna.startswith(prefijo)]
+
+def agregar_periodo(estados, granularidad):
+    # Agrega a los estados diarios las columnas del período pedido
+    if granularidad not in CLAVES_PERIODO:
+        raise ValueError(f"Granularidad desconocida: {granularidad}")
+    if "Dia" not in estados:
+        # Estados ya combinados por período (por ejemplo los mensuales): sirven para ese período o uno más largo
+        faltantes = set(CLAVES_PERIODO[granularidad]) - set(estados.columns)
+        if faltantes:
+            raise ValueError(f"Los estados no tienen las columnas del período '{granularidad}': {', '.join(sorted(faltantes))}")
+        return estados
+    dias = pd.to_datetime(estados["Dia"])
+    if granularidad == "semana":
+        calendario = dias.dt.isocalendar()
+        return estados.assign(Año=calendario["year"].astype(int), Semana=calendario["week"].astype(int))
+    if granularidad == "mes":
+        return estados.assign(Año=dias.dt.year, Mes=dias.dt.month)
+    if granularidad == "año":
+        return estados.assign(Año=dias.dt.year)
+    return estados
+
+def combinar_estados(estados, claves, medidas=None):
+    # Combina los estados de todas las filas con las mismas claves. Sin claves devuelve una sola fila con el total.
+    medidas = medidas_de(estados) if medidas is None else [medida.replace(' ', '_') for medida in medidas]
+    sumas = ["Filas"] + [columna_estado(estado, medida) for medida in medidas for estado in ("Suma", "Conteo", "Suma_Cuadrados")]
+    # Días con lecturas de cada medida, presentes solo en los estados mensuales (ver estados_mensuales)
+    sumas += [columna_estado("Dias", medida) for medida in medidas if columna_estado("Dias", medida) in estados]
+    minimos = [columna_estado("Minimo", medida) for medida in medidas]
+    maximos = [columna_estado("Maximo", medida) for medida in medidas]
+
+    if not claves:
+        fila = pd.concat([estados[sumas].sum(min_count=1), estados[minimos].min(), estados[maximos].max()])
+        return fila.to_frame().T
+
+    grupos = estados.groupby(claves, sort=True)
+    # min_count=1: igual que SUM en SQL, la suma de un grupo sin valores es nula y no cero
+    combinado = pd.concat([grupos[sumas].sum(min_count=1), grupos[minimos].min(), grupos[maximos].max()], axis=1)
+    return combinado.reset_index()
+
+def finalizar_estados(estados, medidas=None):
+    # Promedio y desviación estándar poblacional de cada medida a partir de su estado
+    medidas = medidas_de(estados) if medidas is None else [medida.replace(' ', '_') for medida in medidas]
+    columnas = {}
+    for medida in medidas:
+        conteo = estados[columna_estado("Conteo", medida)].astype(float).to_numpy()
+        conteo[conteo == 0] = np.nan
+        promedio = estados[columna_estado("Suma", medida)].astype(float).to_numpy() / conteo
+        varianza = np.maximum(estados[columna_estado("Suma_Cuadrados", medida)].astype(float).to_numpy() / conteo - promedio ** 2, 0)
+        columnas[f"Promedio_{medida}"] = promedio
+        columnas[f"Desviacion_{medida}"] = np.sqrt(varianza)
+    # Las columnas nuevas se agregan de una vez: insertarlas una por una copia el DataFrame en cada medida
+    return pd.concat([estados, pd.DataFrame(columnas, index=estados.index)], axis=1)
+
+def estados_mensuales(estados):
+    # Estados diarios -> estados por pozo y por mes, que se combinan igual que los diarios para las series mensuales y los totales.
+    # Dias_<medida> guarda cuántos días del mes tuvieron lecturas de la medida, lo único que se pierde al juntar los días.
+    medidas = medidas_de(estados)
+    dias = {columna_estado("Dias", medida): (estados[columna_estado("Conteo", medida)] > 0).astype(int) for medida in medidas}
+    return combinar_estados(agregar_periodo(estados.assign(**dias), "mes"), ["Well_Id", *CLAVES_PERIODO["mes"]], medidas)
+
+def agregar(estados, granularidad, por_pozo=True, medidas=None):
+    # Estados diarios -> una fila por período (y por pozo), con sumas, conteos, extremos, promedios y desviaciones
+    claves = (["Well_Id"] if por_pozo else []) + CLAVES_PERIODO[granularidad]
+    combinado = combinar_estados(agregar_periodo(estados, granularidad), claves, medidas)
+    return finalizar_estados(combinado, medidas)
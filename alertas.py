@@ -0,0 +1,132 @@
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+# Este modulo mantiene las alertas de la tarjeta "Critical Alerts" evaluando las reglas de reglas_alertas.json sobre los datos diarios
+# de cada pozo (promedio, mínimo y máximo de cada medida de rollup_criticas_diario).
+# El motor guarda en memoria solo los últimos días (la historia que necesitan las reglas más los días de alertas) y en cada refresco
+# lee de la tabla resumen diaria únicamente los días nuevos y los últimos ya vistos (tantos como la línea base más larga de las
+# reglas, porque pudieron recibir lecturas atrasadas o correcciones), así que el trabajo depende de la ventana y no de toda la historia.
+# Los días seguidos en que un pozo dispara la misma regla se agrupan en una sola alerta.
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+
+import os
+import threading
+import numpy as np
+import pandas as pd
+from utils import conexion_bd
+from agregados import columna_estado
+from rollups import ROLLUPS
+from reglas_alertas import cargar_reglas, evaluar_reglas
+
+ROLLUP = "rollup_criticas_diario"
+
+# Días más recientes en los que se buscan alertas
+DIAS_ALERTAS = int(os.environ.get("GEOHALLITIANS_ALERTAS_DIAS", "90"))
+
+# Columnas diarias disponibles en las reglas: "BOPD" es el promedio del día, "Minimo_BOPD" y "Maximo_BOPD" sus extremos
+MEDIDAS = ROLLUPS[ROLLUP]["medidas"]
+COLUMNAS_REGLAS = list(MEDIDAS) + [columna_estado(estado, medida) for medida in MEDIDAS for estado in ("Minimo", "Maximo")]
+
+COLUMNAS_ALERTAS = ["Regla", "Descripcion", "Well_Id", "Desde", "Day", "Dias", "Valor", "Referencia"]
+
+
+class MotorAlertas:
+
+    def __init__(self, reglas=None, dias_alertas=DIAS_ALERTAS):
+        self.reglas = cargar_reglas(COLUMNAS_REGLAS) if reglas is None else reglas
+        self.dias_alertas = dias_alertas
+        # Días que se guardan: los que todavía pueden ser alerta más la historia de la regla que más necesita
+        self.dias_guardados = dias_alertas + max([regla.dias_historia for regla in self.reglas], default=0)
+        # Días ya vistos que se vuelven a leer en cada refresco: al menos la historia de la regla que más necesita
+        self.dias_releer = max([regla.dias_historia for regla in self.reglas], default=1) or 1
+        self.diario = pd.DataFrame(columns=["Well_Id", "Dia"] + COLUMNAS_REGLAS)
+        self.ultimo_dia = None
+        self.costos = pd.DataFrame()  # costo de cada regla en la última evaluación
+        self._lock = threading.Lock()
+
+    def _leer_dias(self, conexion, condicion, params):
+        expresiones = []
+        for medida in MEDIDAS:
+            suma, conteo = columna_estado("Suma", medida), columna_estado("Conteo", medida)
+            # Promedio del día; nulo si la medida no tuvo lecturas
+            expresiones.append(f"CASE WHEN {conteo} > 0 THEN {suma} / {conteo} END")
+        expresiones += COLUMNAS_REGLAS[len(MEDIDAS):]
+
+        cursor = conexion.cursor()
+        cursor.execute(f"SELECT Well_Id, Dia, {', '.join(expresiones)} FROM {ROLLUP} WHERE {condicion}", params)
+        dias = pd.DataFrame(cursor.fetchall(), columns=["Well_Id", "Dia"] + COLUMNAS_REGLAS)
+        cursor.close()
+        dias["Dia"] = pd.to_datetime(dias["Dia"])
+        dias[COLUMNAS_REGLAS] = dias[COLUMNAS_REGLAS].astype(float)
+        return dias
+
+    def actualizar(self):
+        # Incorpora los días nuevos de la tabla resumen y vuelve a leer los últimos dias_releer días ya vistos.
+        # Las correcciones de días más antiguos las detecta refrescar_conjunto (datos_tablero.py), que llama a reiniciar().
+        with self._lock, conexion_bd() as conexion:
+            if self.ultimo_dia is None:
+                cursor = conexion.cursor()
+                cursor.execute(f"SELECT MAX(Dia) FROM {ROLLUP}")
+                maximo = cursor.fetchone()[0]
+                cursor.close()
+                if maximo is None:
+                    return self.alertas()
+                desde = pd.Timestamp(maximo) - pd.Timedelta(days=self.dias_guardados)
+            else:
+                desde = self.ultimo_dia - pd.Timedelta(days=self.dias_releer)
+            nuevos = self._leer_dias(conexion, "Dia > %s", (desde.strftime("%Y-%m-%d"),))
+
+            if not nuevos.empty:
+                # Los días releídos reemplazan por completo a los guardados, también los que ya no están en la tabla resumen
+                anteriores = self.diario[self.diario["Dia"] <= desde]
+                diario = pd.concat([anteriores, nuevos], ignore_index=True) if not anteriores.empty else nuevos
+                self.ultimo_dia = diario["Dia"].max()
+                self.diario = diario[diario["Dia"] > self.ultimo_dia - pd.Timedelta(days=self.dias_guardados)]
+            return self.alertas()
+
+    def reiniciar(self):
+        with self._lock:
+            self.diario = self.diario.iloc[0:0]
+            self.ultimo_dia = None
+
+    def alertas(self):
+        if self.diario.empty:
+            return pd.DataFrame(columns=COLUMNAS_ALERTAS)
+        diario = self.diario.sort_values(["Well_Id", "Dia"]).reset_index(drop=True)
+        disparos, self.costos = evaluar_reglas(self.reglas, diario)
+        for costo in self.costos.itertuples(index=False):
+            print(f"  Regla '{costo.Regla}': {costo.Filas_Alerta} días con alerta en {costo.Segundos * 1000:.1f} ms")
+        if disparos.empty:
+            return pd.DataFrame(columns=COLUMNAS_ALERTAS)
+
+        disparos = disparos.assign(
+            Well_Id=diario["Well_Id"].to_numpy()[disparos["Fila"]],
+            Day=diario["Dia"].to_numpy()[disparos["Fila"]],
+        ).sort_values(["Regla", "Fila"], kind="stable")
+
+        # Sin repetir alertas: los días seguidos (filas consecutivas del mismo pozo, sin días sin datos entre ellas) de una
+        # regla forman un solo episodio, que se informa con su primer día, su último día y los valores del último día
+        nuevo = np.r_[True, (disparos["Regla"].to_numpy()[1:] != disparos["Regla"].to_numpy()[:-1])
+                      | (disparos["Well_Id"].to_numpy()[1:] != disparos["Well_Id"].to_numpy()[:-1])
+                      | (np.diff(disparos["Fila"].to_numpy()) != 1)
+                      | (np.diff(disparos["Day"].to_numpy()) != np.timedelta64(1, "D"))]
+        episodios = disparos.groupby(np.cumsum(nuevo)).agg(
+            Regla=("Regla", "first"),
+            Well_Id=("Well_Id", "first"),
+            Desde=("Day", "first"),
+            Day=("Day", "last"),
+            Dias=("Day", "size"),
+            Valor=("Valor", "last"),
+            Referencia=("Referencia", "last"),
+        )
+
+        # Solo los episodios que siguen dentro de los días de alertas
+        episodios = episodios[episodios["Day"] > self.ultimo_dia - pd.Timedelta(days=self.dias_alertas)]
+        descripciones = {regla.nombre: regla.descripcion for regla in self.reglas}
+        episodios["Descripcion"] = episodios["Regla"].map(descripciones)
+        return episodios[COLUMNAS_ALERTAS].sort_values("Day", ascending=False).reset_index(drop=True)
+
+
+# Un motor por proceso: conserva los días recientes entre refrescos
+motor_alertas = MotorAlertas()
+
+def alertas_actualizadas():
+    return motor_alertas.actualizar()
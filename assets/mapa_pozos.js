@@ -0,0 +1,18 @@
+// ---------------------------------------------------------------------------------------------------------------------------------------------------
+// Funciones de la capa GeoJSON del mapa "Wells Location". dash-leaflet las busca en window.geohallitians
+// (pointToLayer={'variable': 'geohallitians.marcadorPozo'}) y les pasa como último argumento el contexto de la capa con su hideout.
+// ---------------------------------------------------------------------------------------------------------------------------------------------------
+
+window.geohallitians = Object.assign({}, window.geohallitians, {
+    // Marcador de un pozo con el icono de su sistema de levantamiento y un tooltip con UWI y Purpose
+    marcadorPozo: function(feature, latlng, context) {
+        const hideout = context.hideout || {};
+        const propiedades = feature.properties;
+        const icono = L.icon({
+            iconUrl: (hideout.iconos || {})[propiedades.Sistema_Levantamiento] || hideout.icono_defecto,
+            iconSize: [45, 45],
+        });
+        return L.marker(latlng, {icon: icono})
+            .bindTooltip(`*UWI: ${propiedades.UWI}, *Purpose: ${propiedades.Purpose}`, {direction: 'top'});
+    },
+});
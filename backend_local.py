@@ -0,0 +1,375 @@
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+# Este modulo es un backend SQLite embebido con el mismo esquema de tablero_geohallitians, para correr el dashboard sin el servidor MySQL
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+
+import os
+import re
+import time
+import random
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime, date
+import numpy as np
+import pandas as pd
+
+RUTA_BASE_LOCAL = os.environ.get(
+    "GEOHALLITIANS_SQLITE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "tablero_geohallitians.sqlite"),
+)
+
+# Nombre del esquema MySQL: la base local se adjunta también con este nombre para que funcionen las consultas calificadas
+ESQUEMA = "tablero_geohallitians"
+
+ESQUEMA_TABLAS = """
+CREATE TABLE IF NOT EXISTS wells_master_updated (
+    Well_Id TEXT PRIMARY KEY,
+    UWI TEXT,
+    Geo_latitude REAL,
+    Geo_longitude REAL,
+    Wellhead_depth REAL,
+    Water_depth REAL,
+    Sistema_Levantamiento TEXT,
+    Purpose TEXT
+);
+
+CREATE TABLE IF NOT EXISTS critical_variables_updated (
+    Well_Id TEXT,
+    Date DATETIME,
+    Day DATE,
+    Presion_intake REAL,
+    Freq REAL,
+    Caudal REAL,
+    WOR REAL,
+    WCUT REAL,
+    BWPD REAL,
+    BOPD REAL,
+    RunLife REAL,
+    Run_Status INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_cvu_pozo_fecha ON critical_variables_updated (Well_Id, Date);
+CREATE INDEX IF NOT EXISTS idx_cvu_fecha ON critical_variables_updated (Date);
+
+CREATE TABLE IF NOT EXISTS data_diaria_volumetrica_updated (
+    Well_Id TEXT,
+    Volume_Date DATE,
+    Hours REAL,
+    Oil REAL,
+    Water REAL,
+    Gas REAL,
+    `OIL QUALITY` REAL
+);
+CREATE INDEX IF NOT EXISTS idx_ddv_pozo_fecha ON data_diaria_volumetrica_updated (Well_Id, Volume_Date);
+CREATE INDEX IF NOT EXISTS idx_ddv_fecha ON data_diaria_volumetrica_updated (Volume_Date);
+
+CREATE TABLE IF NOT EXISTS data_prueba_pozo_updated (
+    Well_Id TEXT,
+    Test_Date DATE,
+    Test_Num INTEGER,
+    Certified INTEGER,
+    Test_Duration REAL,
+    API REAL,
+    BSW_P REAL
+);
+CREATE INDEX IF NOT EXISTS idx_dpp_pozo_fecha ON data_prueba_pozo_updated (Well_Id, Test_Date);
+
+CREATE TABLE IF NOT EXISTS survey_estaciones (
+    Well_Id TEXT NOT NULL,
+    MD REAL NOT NULL,
+    Inclinacion REAL NOT NULL,
+    Azimut REAL NOT NULL,
+    Cargado DATETIME NOT NULL,
+    PRIMARY KEY (Well_Id, MD)
+);
+
+-- Tabla antigua usada por dashboardtraj4.py
+CREATE VIEW IF NOT EXISTS critical_var_2 AS SELECT * FROM critical_variables_updated;
+"""
+
+TABLAS_LOCALES = [
+    "wells_master_updated",
+    "critical_variables_updated",
+    "data_diaria_volumetrica_updated",
+    "data_prueba_pozo_updated",
+]
+
+# Especificadores de DATE_FORMAT de MySQL -> strftime
+_FORMATOS_MYSQL = {
+    "%Y": "%Y", "%y": "%y", "%m": "%m", "%c": "%m", "%d": "%d", "%e": "%d",
+    "%H": "%H", "%k": "%H", "%i": "%M", "%s": "%S", "%S": "%S", "%M": "%B", "%b": "%b",
+}
+_patron_formato = re.compile(r"%[a-zA-Z%]")
+
+
+def _a_fecha(valor):
+    if valor is None:
+        return None
+    if isinstance(valor, (datetime, date)):
+        return valor
+    texto = str(valor)
+    try:
+        return datetime.fromisoformat(texto)
+    except ValueError:
+        return None
+
+def _year(valor):
+    fecha = _a_fecha(valor)
+    return fecha.year if fecha else None
+
+def _month(valor):
+    fecha = _a_fecha(valor)
+    return fecha.month if fecha else None
+
+def _date_format(valor, formato):
+    fecha = _a_fecha(valor)
+    if fecha is None or formato is None:
+        return None
+    if not isinstance(fecha, datetime):
+        fecha = datetime(fecha.year, fecha.month, fecha.day)
+    return fecha.strftime(_patron_formato.sub(lambda m: _FORMATOS_MYSQL.get(m.group(0), m.group(0)), formato))
+
+def _a_texto_fecha(valor):
+    if isinstance(valor, (datetime, pd.Timestamp)):
+        return valor.strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(valor, date):
+        return valor.isoformat()
+    return valor
+
+# Las fechas se guardan como texto ISO y se devuelven como datetime, igual que con mysql.connector
+sqlite3.register_adapter(datetime, _a_texto_fecha)
+sqlite3.register_adapter(pd.Timestamp, _a_texto_fecha)
+sqlite3.register_adapter(date, _a_texto_fecha)
+sqlite3.register_adapter(np.int64, int)
+sqlite3.register_adapter(np.float64, float)
+sqlite3.register_converter("DATETIME", lambda valor: datetime.fromisoformat(valor.decode()))
+sqlite3.register_converter("DATE", lambda valor: datetime.fromisoformat(valor.decode()))
+
+
+class CursorLocal(sqlite3.Cursor):
+    # Acepta el estilo de parámetros de mysql.connector (%s) además del de SQLite (?)
+    def execute(self, sql, params=()):
+        if params:
+            sql = sql.replace("%s", "?")
+        return super().execute(sql, params)
+
+    def executemany(self, sql, params):
+        return super().executemany(sql.replace("%s", "?"), params)
+
+
+class ConexionLocal(sqlite3.Connection):
+    def cursor(self, factory=None):
+        return super().cursor(factory or CursorLocal)
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def is_connected(self):
+        return True
+
+    def ping(self, reconnect=False, attempts=1, delay=0):
+        return None
+
+
+def abrir_conexion_local(ruta=None):
+    ruta = ruta or RUTA_BASE_LOCAL
+    conexion = sqlite3.connect(
+        ruta,
+        factory=ConexionLocal,
+        detect_types=sqlite3.PARSE_DECLTYPES,
+        check_same_thread=False,
+        timeout=30,
+    )
+    conexion.create_function("YEAR", 1, _year, deterministic=True)
+    conexion.create_function("MONTH", 1, _month, deterministic=True)
+    conexion.create_function("DATE_FORMAT", 2, _date_format, deterministic=True)
+    conexion.create_function("RAND", 0, random.random)
+    conexion.execute("PRAGMA journal_mode=WAL")
+    conexion.execute(f"ATTACH DATABASE ? AS {ESQUEMA}", (ruta,))
+    return conexion
+
+@contextmanager
+def conexion_local(ruta=None):
+    conexion = abrir_conexion_local(ruta)
+    try:
+        yield conexion
+        conexion.commit()
+    finally:
+        conexion.close()
+
+@contextmanager
+def bloqueo_local(nombre, espera=0, ruta=None):
+    # Equivalente a GET_LOCK de MySQL: candado exclusivo sobre un archivo junto a la base, compartido entre procesos.
+    # Entrega True si se obtuvo antes de 'espera' segundos. Sin fcntl (Windows) siempre se obtiene:
+    # SQLite igual serializa las escrituras, solo que dos procesos pueden repetir el mismo trabajo.
+    try:
+        import fcntl
+    except ImportError:
+        yield True
+        return
+
+    with open(f"{ruta or RUTA_BASE_LOCAL}.{nombre}.lock", "a") as archivo:
+        limite = time.monotonic() + espera
+        while True:
+            try:
+                fcntl.flock(archivo, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if time.monotonic() >= limite:
+                    yield False
+                    return
+                time.sleep(0.1)
+        try:
+            yield True
+        finally:
+            fcntl.flock(archivo, fcntl.LOCK_UN)
+
+def crear_esquema(conexion):
+    conexion.executescript(ESQUEMA_TABLAS)
+    conexion.commit()
+
+def _insertar(conexion, tabla, df):
+    if df.empty:
+        return
+    df = df.astype(object).where(df.notna(), None)
+    columnas = ", ".join(f"`{col}`" for col in df.columns)
+    marcadores = ", ".join("?" for _ in df.columns)
+    conexion.executemany(
+        f"INSERT INTO {tabla} ({columnas}) VALUES ({marcadores})",
+        df.itertuples(index=False, name=None),
+    )
+
+def cargar_tablas(tablas, ruta=None, reemplazar=True):
+    # tablas: {nombre_tabla: DataFrame}
+    with conexion_local(ruta) as conexion:
+        crear_esquema(conexion)
+        for tabla, df in tablas.items():
+            if reemplazar:
+                conexion.execute(f"DELETE FROM {tabla}")
+            _insertar(conexion, tabla, df)
+            print(f"Tabla local '{tabla}': {len(df)} filas")
+
+def cargar_desde_snapshots(ruta=None):
+    from snapshots import cargar_snapshot
+    cargar_tablas({tabla: cargar_snapshot(tabla) for tabla in TABLAS_LOCALES}, ruta)
+
+def generar_datos_sinteticos(n_pozos=17, dias=900, lecturas_por_dia=2, semilla=7, inicio="2021-01-01"):
+    # Datos con la forma de las tablas reales, para pruebas de carga y de rendimiento
+    rng = np.random.default_rng(semilla)
+    sistemas = np.array(["BES", "BME", "GAS LIFT", "PCP"])
+
+    ids = np.array([f"D0A25FCC-4989-4D49-86C1-{i:012d}" for i in range(1, n_pozos + 1)])
+    pozos = pd.DataFrame({
+        "Well_Id": ids,
+        "UWI": [f"Well{i:03d}" for i in range(1, n_pozos + 1)],
+        "Geo_latitude": rng.uniform(3.5, 7.5, n_pozos),
+        "Geo_longitude": rng.uniform(-75.5, -71.0, n_pozos),
+        "Wellhead_depth": rng.uniform(4000, 12000, n_pozos).round(1),
+        "Water_depth": rng.uniform(300, 2500, n_pozos).round(1),
+        "Sistema_Levantamiento": rng.choice(sistemas, n_pozos),
+        "Purpose": rng.choice(["Productor", "Inyector"], n_pozos, p=[0.85, 0.15]),
+    })
+
+    dias_index = pd.date_range(inicio, periods=dias, freq="D")
+    horas = pd.to_timedelta(np.arange(lecturas_por_dia) * (24 // lecturas_por_dia), unit="h")
+
+    # Variables críticas: lecturas por pozo y día, la primera de cada día a las 00:00
+    fechas = (dias_index.values[:, None] + horas.values[None, :]).ravel()
+    n = len(fechas)
+    pozo_rep = np.repeat(ids, n)
+    fecha_rep = np.tile(fechas, n_pozos)
+    base_bopd = np.repeat(rng.uniform(100, 2500, n_pozos), n)
+    bopd = np.clip(base_bopd * rng.normal(1, 0.15, n * n_pozos), 0, None)
+    # 1% de lecturas con caída fuerte de producción para que existan alertas
+    bopd[rng.random(n * n_pozos) < 0.01] *= 0.05
+    wcut = np.clip(rng.normal(60, 15, n * n_pozos), 0, 99)
+    bwpd = bopd * wcut / np.maximum(100 - wcut, 1)
+
+    # RunLife: días desde la última falla; vuelve a 1.0 cuando el pozo falla
+    falla = rng.random((n_pozos, dias)) < 1 / 200
+    falla[:, 0] = True
+    dia = np.arange(dias)[None, :].repeat(n_pozos, axis=0)
+    inicio_ciclo = np.maximum.accumulate(np.where(falla, dia, 0), axis=1)
+    run_life = (dia - inicio_ciclo + 1).astype(float)
+    run_life = np.repeat(run_life, lecturas_por_dia, axis=1).ravel()
+
+    criticas = pd.DataFrame({
+        "Well_Id": pozo_rep,
+        "Date": fecha_rep,
+        "Day": pd.to_datetime(fecha_rep).normalize(),
+        "Presion_intake": rng.normal(450, 60, n * n_pozos).round(2),
+        "Freq": rng.normal(55, 4, n * n_pozos).round(2),
+        "Caudal": rng.normal(1500, 300, n * n_pozos).round(2),
+        "WOR": (bwpd / np.maximum(bopd, 1)).round(4),
+        "WCUT": wcut.round(2),
+        "BWPD": bwpd.round(2),
+        "BOPD": bopd.round(2),
+        "RunLife": run_life,
+        "Run_Status": (rng.random(n * n_pozos) > 0.05).astype(int),
+    })
+
+    # Producción diaria
+    pozo_dia = np.repeat(ids, dias)
+    volumetrica = pd.DataFrame({
+        "Well_Id": pozo_dia,
+        "Volume_Date": np.tile(dias_index.values, n_pozos),
+        "Hours": np.clip(rng.normal(21, 3, n_pozos * dias), 0, 24).round(1),
+        "Oil": np.clip(np.repeat(rng.uniform(100, 2500, n_pozos), dias) * rng.normal(1, 0.1, n_pozos * dias), 0, None).round(2),
+        "Water": np.clip(rng.normal(1800, 400, n_pozos * dias), 0, None).round(2),
+        "Gas": np.clip(rng.normal(900, 250, n_pozos * dias), 0, None).round(2),
+        "OIL QUALITY": rng.normal(24, 3, n_pozos * dias).round(2),
+    })
+    # Algunos nulos para el mapa de calor de "Missing Values"
+    volumetrica.loc[rng.random(len(volumetrica)) < 0.01, "Hours"] = np.nan
+
+    # Pruebas de pozo mensuales
+    fechas_prueba = pd.date_range(inicio, periods=max(dias // 30, 1), freq="30D")
+    n_pruebas = len(fechas_prueba)
+    certificado = rng.choice([1.0, 0.0, np.nan], n_pozos * n_pruebas, p=[0.7, 0.2, 0.1])
+    pruebas = pd.DataFrame({
+        "Well_Id": np.repeat(ids, n_pruebas),
+        "Test_Date": np.tile(fechas_prueba.values, n_pozos),
+        "Test_Num": np.tile(np.arange(1, n_pruebas + 1), n_pozos),
+        "Certified": pd.array(certificado, dtype="Int64"),
+        "Test_Duration": rng.choice([12.0, 24.0], n_pozos * n_pruebas),
+        "API": rng.normal(24, 3, n_pozos * n_pruebas).round(2),
+        "BSW_P": rng.uniform(10, 95, n_pozos * n_pruebas).round(2),
+    })
+
+    # Surveys direccionales: una estación cada 100 pies hasta la profundidad del pozo, vertical hasta el punto de desvío,
+    # luego construye ángulo a 2-3°/100 pies hasta la inclinación final y la mantiene, con un azimut casi constante por pozo
+    md_pozo = [np.arange(100.0, profundidad + 100.0, 100.0) for profundidad in pozos["Wellhead_depth"]]
+    estaciones_pozo = np.array([len(md) for md in md_pozo])
+    md = np.concatenate(md_pozo)
+    desvio = np.repeat(rng.uniform(1500, 4000, n_pozos), estaciones_pozo)
+    construccion = np.repeat(rng.uniform(2, 3, n_pozos), estaciones_pozo)
+    inclinacion_final = np.repeat(rng.uniform(0, 60, n_pozos), estaciones_pozo)
+    survey = pd.DataFrame({
+        "Well_Id": np.repeat(ids, estaciones_pozo),
+        "MD": md,
+        "Inclinacion": np.minimum(np.clip(md - desvio, 0, None) / 100 * construccion, inclinacion_final).round(2),
+        "Azimut": ((np.repeat(rng.uniform(0, 360, n_pozos), estaciones_pozo) + rng.normal(0, 1, len(md))) % 360).round(2),
+        "Cargado": pd.Timestamp(inicio),
+    })
+
+    return {
+        "wells_master_updated": pozos,
+        "critical_variables_updated": criticas,
+        "data_diaria_volumetrica_updated": volumetrica,
+        "data_prueba_pozo_updated": pruebas,
+        "survey_estaciones": survey,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Crea la base SQLite local del dashboard")
+    parser.add_argument("--ruta", default=RUTA_BASE_LOCAL)
+    parser.add_argument("--snapshots", action="store_true", help="Cargar las tablas desde los snapshots Parquet")
+    parser.add_argument("--pozos", type=int, default=17)
+    parser.add_argument("--dias", type=int, default=900)
+    args = parser.parse_args()
+
+    if args.snapshots:
+        cargar_desde_snapshots(args.ruta)
+    else:
+        cargar_tablas(generar_datos_sinteticos(args.pozos, args.dias), args.ruta)
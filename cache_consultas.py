@@ -0,0 +1,243 @@
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+# Este modulo es el cache de resultados de consultas: clave = SQL normalizado + marca de cambios de cada tabla que lee la consulta
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+
+import os
+import re
+import sys
+import time
+import pickle
+import hashlib
+import threading
+from collections import OrderedDict
+import pandas as pd
+
+# Tablas conocidas y la columna de fecha que sirve de marca de agua (None = solo se usa el número de filas)
+COLUMNAS_MARCA = {
+    "critical_variables_updated": "Date",
+    "data_diaria_volumetrica_updated": "Volume_Date",
+    "data_prueba_pozo_updated": "Test_Date",
+    "wells_master_updated": None,
+    # Surveys direccionales (trayectorias.py): cada carga reemplaza el survey de un pozo con una fecha de carga nueva
+    "survey_estaciones": "Cargado",
+}
+
+# Tablas resumen (rollups.py, ciclos_runlife.py) -> tabla fuente: se actualizan antes de cada carga, así que cambian cuando cambia la fuente
+TABLAS_DERIVADAS = {
+    "rollup_criticas_diario": "critical_variables_updated",
+    "rollup_volumetrica_diario": "data_diaria_volumetrica_updated",
+    "runlife_ciclos": "critical_variables_updated",
+}
+
+_patron_tablas = re.compile(r"\b(" + "|".join([*COLUMNAS_MARCA, *TABLAS_DERIVADAS]) + r")\b", re.IGNORECASE)
+
+def normalizar_sql(sql):
+    # Quita espacios repetidos y el ';' final para que el mismo SQL con otro formato tenga la misma clave
+    return " ".join(sql.split()).rstrip(";").strip()
+
+def tablas_de_consulta(sql):
+    tablas = {tabla.lower() for tabla in _patron_tablas.findall(sql)}
+    return sorted({TABLAS_DERIVADAS.get(tabla, tabla) for tabla in tablas})
+
+def _tamano(resultado):
+    if isinstance(resultado, pd.DataFrame):
+        return int(resultado.memory_usage(deep=True).sum())
+    return sys.getsizeof(resultado)
+
+def _copia(resultado):
+    # Los DataFrames se entregan como copia para que quien los modifica no altere lo guardado en el cache
+    return resultado.copy() if isinstance(resultado, pd.DataFrame) else resultado
+
+def _borrar(ruta):
+    try:
+        os.remove(ruta)
+        return 1
+    except OSError:
+        return 0
+
+
+class CacheConsultas:
+    def __init__(self, ttl=600, max_bytes=256 * 1024 * 1024, directorio=None, ttl_disco=24 * 3600, ttl_marcas=30,
+                 max_bytes_disco=2048 * 1024 * 1024):
+        self.ttl = ttl
+        self.ttl_disco = ttl_disco
+        self.max_bytes = max_bytes
+        self.max_bytes_disco = max_bytes_disco
+        self.directorio = directorio
+        self.ttl_marcas = ttl_marcas
+
+        self._entradas = OrderedDict()  # clave -> (expira, tamaño, resultado), en orden de uso (LRU)
+        self._bytes = 0
+        self._marcas = {}  # tabla -> (expira, marca)
+        self._lock = threading.Lock()
+        self._locks_marcas = {tabla: threading.Lock() for tabla in COLUMNAS_MARCA}
+
+        self.aciertos = 0
+        self.aciertos_disco = 0
+        self.fallos = 0
+        self.expulsiones = 0
+        self.expulsiones_disco = 0
+
+        if self.directorio:
+            os.makedirs(self.directorio, exist_ok=True)
+
+    def marca_tabla(self, tabla, leer):
+        # Marca de cambios barata de una tabla: número de filas y fecha máxima. Se reutiliza durante ttl_marcas segundos.
+        ahora = time.time()
+        with self._locks_marcas.setdefault(tabla, threading.Lock()):
+            marca = self._marcas.get(tabla)
+            if marca and marca[0] > ahora:
+                return marca[1]
+
+            columna = COLUMNAS_MARCA.get(tabla)
+            sql = f"SELECT COUNT(*) AS Filas, MAX({columna}) AS Maximo FROM {tabla}" if columna else f"SELECT COUNT(*) AS Filas FROM {tabla}"
+            valores = tuple(str(valor) for valor in leer(sql).iloc[0])
+
+            self._marcas[tabla] = (ahora + self.ttl_marcas, valores)
+            return valores
+
+    def invalidar_marcas(self):
+        with self._lock:
+            self._marcas.clear()
+
+    def clave(self, texto, tablas, leer):
+        # Prefijo = hash del SQL solo: los archivos del cache en disco con el mismo prefijo son versiones de la misma consulta
+        marcas = [(tabla, self.marca_tabla(tabla, leer)) for tabla in tablas]
+        texto = normalizar_sql(texto)
+        prefijo = hashlib.sha1(texto.encode("utf-8")).hexdigest()[:16]
+        return f"{prefijo}-{hashlib.sha1(repr((texto, marcas)).encode('utf-8')).hexdigest()}"
+
+    def obtener(self, texto, cargar, leer, tablas=None):
+        # texto: SQL (o una clave descriptiva) | cargar: función sin argumentos que produce el resultado
+        # leer: función que ejecuta un SQL sin cache, usada para las marcas de agua
+        tablas = tablas_de_consulta(texto) if tablas is None else tablas
+        clave = self.clave(texto, tablas, leer)
+        ahora = time.time()
+
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada and entrada[0] > ahora:
+                self._entradas.move_to_end(clave)
+                self.aciertos += 1
+                return _copia(entrada[2])
+
+        resultado = self._leer_disco(clave, ahora)
+        if resultado is not None:
+            with self._lock:
+                self.aciertos_disco += 1
+        else:
+            with self._lock:
+                self.fallos += 1
+            resultado = cargar()
+            self._escribir_disco(clave, resultado)
+
+        self._guardar(clave, resultado, ahora)
+        return _copia(resultado)
+
+    def _guardar(self, clave, resultado, ahora):
+        tamano = _tamano(resultado)
+        if tamano > self.max_bytes:
+            return
+
+        with self._lock:
+            anterior = self._entradas.pop(clave, None)
+            if anterior:
+                self._bytes -= anterior[1]
+            self._entradas[clave] = (ahora + self.ttl, tamano, _copia(resultado))
+            self._bytes += tamano
+
+            # Expulsa las entradas usadas hace más tiempo hasta volver al límite de memoria
+            while self._bytes > self.max_bytes:
+                _, (_, tamano_expulsado, _) = self._entradas.popitem(last=False)
+                self._bytes -= tamano_expulsado
+                self.expulsiones += 1
+
+    def _ruta(self, clave):
+        return os.path.join(self.directorio, f"{clave}.pkl")
+
+    def _leer_disco(self, clave, ahora):
+        if not self.directorio:
+            return None
+        ruta = self._ruta(clave)
+        try:
+            if os.path.getmtime(ruta) + self.ttl_disco < ahora:
+                return None
+            with open(ruta, "rb") as archivo:
+                return pickle.load(archivo)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+    def _escribir_disco(self, clave, resultado):
+        if not self.directorio:
+            return
+        ruta = self._ruta(clave)
+        temporal = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temporal, "wb") as archivo:
+                pickle.dump(resultado, archivo, protocol=pickle.HIGHEST_PROTOCOL)
+            if os.path.getsize(temporal) > self.max_bytes_disco:
+                os.remove(temporal)
+                return
+            # Reemplazo atómico para que otro worker nunca lea un archivo a medio escribir
+            os.replace(temporal, ruta)
+        except OSError as err:
+            print(f"No se pudo guardar el resultado en el cache de disco: {err}")
+            return
+        self._podar_disco(clave)
+
+    def _podar_disco(self, clave):
+        # Borra las versiones anteriores de la consulta recién guardada (su marca de agua ya no es la actual) y los archivos
+        # vencidos; si el directorio sigue por encima de max_bytes_disco, borra los escritos hace más tiempo.
+        # Varios workers pueden podar a la vez: un archivo que otro ya borró simplemente se saltea.
+        nombre = f"{clave}.pkl"
+        prefijo = f"{clave.split('-')[0]}-"
+        ahora = time.time()
+        archivos = []
+        total = 0
+        borrados = 0
+        with os.scandir(self.directorio) as entradas:
+            for entrada in entradas:
+                if not entrada.name.endswith(".pkl"):
+                    continue
+                try:
+                    info = entrada.stat()
+                except OSError:
+                    continue
+                reemplazado = entrada.name.startswith(prefijo) and entrada.name != nombre
+                if reemplazado or info.st_mtime + self.ttl_disco < ahora:
+                    borrados += _borrar(entrada.path)
+                    continue
+                total += info.st_size
+                # El archivo recién guardado cuenta para el límite pero no se borra
+                if entrada.name != nombre:
+                    archivos.append((info.st_mtime, info.st_size, entrada.path))
+
+        for _, tamano, ruta in sorted(archivos):
+            if total <= self.max_bytes_disco:
+                break
+            borrados += _borrar(ruta)
+            total -= tamano
+
+        if borrados:
+            with self._lock:
+                self.expulsiones_disco += borrados
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+            self._marcas.clear()
+            self._bytes = 0
+
+    def estadisticas(self):
+        with self._lock:
+            consultas = self.aciertos + self.aciertos_disco + self.fallos
+            return {
+                "entradas": len(self._entradas),
+                "bytes": self._bytes,
+                "aciertos": self.aciertos,
+                "aciertos_disco": self.aciertos_disco,
+                "fallos": self.fallos,
+                "expulsiones": self.expulsiones,
+                "expulsiones_disco": self.expulsiones_disco,
+                "tasa_aciertos": (self.aciertos + self.aciertos_disco) / consultas if consultas else 0.0,
+            }
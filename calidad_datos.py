@@ -0,0 +1,64 @@
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+# Este modulo perfila la calidad de datos de cada tabla: valores nulos por columna para el mapa de calor de "Missing Values"
+# Una sola lectura por tabla con COUNT(columna), que cuenta los no nulos sin evaluar un CASE por fila y columna.
+# En tablas más grandes que GEOHALLITIANS_PERFIL_MUESTRA filas, los nulos se estiman con una muestra aleatoria
+# y se informa un intervalo de confianza del 95 % (Wilson) para cada conteo.
+# El resultado se guarda en el cache de consultas mientras la tabla no cambie (ver consultas.py).
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+
+import os
+import math
+import pandas as pd
+from utils import cache_consultas, leer_sql_sin_cache
+
+# Filas máximas a revisar por tabla (0 = contar siempre sobre la tabla completa)
+MAX_FILAS_PERFIL = int(os.environ.get("GEOHALLITIANS_PERFIL_MUESTRA", "0"))
+
+# Valor z del intervalo de confianza del 95 %
+Z_CONFIANZA = 1.96
+
+COLUMNAS_PERFIL = ["Tabla", "Columna", "Total nulos", "Nulos_Min", "Nulos_Max", "Filas_Revisadas"]
+
+def intervalo_wilson(nulos, revisadas, z=Z_CONFIANZA):
+    # Intervalo de Wilson para la proporción de nulos; a diferencia de la aproximación normal, no colapsa a 0 cuando la
+    # muestra no tiene nulos
+    if revisadas == 0:
+        return 0.0, 1.0
+    p = nulos / revisadas
+    denominador = 1 + z ** 2 / revisadas
+    centro = (p + z ** 2 / (2 * revisadas)) / denominador
+    margen = z * math.sqrt(p * (1 - p) / revisadas + z ** 2 / (4 * revisadas ** 2)) / denominador
+    return max(0.0, centro - margen), min(1.0, centro + margen)
+
+def perfilar_tabla(conexion, tabla, max_filas=None):
+    max_filas = MAX_FILAS_PERFIL if max_filas is None else max_filas
+    cursor = conexion.cursor()
+
+    # Obtiene la lista de columnas en la tabla (sin DESCRIBE, para que funcione en cualquier backend)
+    cursor.execute(f"SELECT * FROM {tabla} LIMIT 0")
+    columnas = [columna[0] for columna in cursor.description]
+    cursor.fetchall()
+
+    # El total de filas sale de la marca de cambios de la tabla, que ya se calcula para el cache
+    total = int(cache_consultas.marca_tabla(tabla, leer_sql_sin_cache)[0])
+    fraccion = max_filas / total if max_filas and total > max_filas else None
+
+    consulta = "SELECT COUNT(*), " + ", ".join(f"COUNT(`{col}`)" for col in columnas) + f" FROM {tabla}"
+    if fraccion is None:
+        cursor.execute(consulta)
+    else:
+        cursor.execute(consulta + " WHERE RAND() < %s", (fraccion,))
+    revisadas, *no_nulos = cursor.fetchone()
+    cursor.close()
+
+    filas = []
+    for columna, conteo in zip(columnas, no_nulos):
+        nulos = revisadas - conteo
+        if fraccion is None:
+            filas.append([tabla, columna, nulos, nulos, nulos, revisadas])
+            continue
+        # Estimación escalada al total de filas de la tabla
+        minimo, maximo = intervalo_wilson(nulos, revisadas)
+        estimado = round(nulos / revisadas * total) if revisadas else 0
+        filas.append([tabla, columna, estimado, math.floor(minimo * total), math.ceil(maximo * total), revisadas])
+    return pd.DataFrame(filas, columns=COLUMNAS_PERFIL)
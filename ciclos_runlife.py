@@ -0,0 +1,191 @@
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+# Este modulo detecta los ciclos de run life de cada pozo y los guarda en la tabla runlife_ciclos de la misma base de datos
+# Un ciclo empieza cuando RunLife vuelve a 1.0 (equipo nuevo) y su run life es el máximo RunLife alcanzado antes del siguiente reinicio.
+# La tabla guarda el estado del último ciclo de cada pozo (abierto), así en cada refresco solo se leen las lecturas nuevas:
+# las que no traen un reinicio extienden el ciclo abierto y las demás abren ciclos nuevos.
+# Uso: python ciclos_runlife.py [--completo]
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+
+import time
+import threading
+import pandas as pd
+from utils import bloqueo_bd, conexion_bd
+from rollups import BLOQUEO_RESUMENES, TABLA_MARCAS, crear_tablas as crear_tablas_rollups
+
+FUENTE = "critical_variables_updated"
+TABLA_CICLOS = "runlife_ciclos"
+
+COLUMNAS = ["Well_Id", "Ciclo", "Inicio", "Fin", "Run_Life", "Ultimo_RunLife", "Lecturas", "Abierto"]
+
+# Lecturas nuevas de cada pozo entre la marca y la nueva marca: las posteriores al fin de su ciclo abierto
+# (todas si el pozo todavía no tiene ciclos). Un pozo que no reportó hasta después del refresco puede traer lecturas
+# con la fecha de la marca, por eso el rango empieza en la marca incluida.
+_LECTURAS_NUEVAS = f"""
+    FROM {FUENTE} f LEFT JOIN {TABLA_CICLOS} c ON c.Well_Id = f.Well_Id AND c.Abierto = 1
+    WHERE f.RunLife IS NOT NULL AND f.Date >= %s AND f.Date <= %s AND (c.Fin IS NULL OR f.Date > c.Fin)
+"""
+
+_lock = threading.Lock()
+
+
+def crear_tabla(conexion):
+    # Tipos compatibles con MySQL y con el backend SQLite de backend_local.py
+    crear_tablas_rollups(conexion)
+    cursor = conexion.cursor()
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {TABLA_CICLOS} (
+            Well_Id VARCHAR(64) NOT NULL,
+            Ciclo INT NOT NULL,
+            Inicio DATETIME NOT NULL,
+            Fin DATETIME NOT NULL,
+            Run_Life DOUBLE NOT NULL,
+            Ultimo_RunLife DOUBLE NOT NULL,
+            Lecturas INT NOT NULL,
+            Abierto INT NOT NULL,
+            PRIMARY KEY (Well_Id, Ciclo)
+        )
+    """)
+    cursor.close()
+
+def _valor(cursor, sql, params=None):
+    cursor.execute(sql, params or ())
+    fila = cursor.fetchone()
+    return fila[0] if fila else None
+
+def _leer(cursor, sql, params, columnas):
+    cursor.execute(sql, params)
+    return pd.DataFrame(cursor.fetchall(), columns=columnas)
+
+def detectar_ciclos(lecturas, abiertos=None):
+    # Resume en ciclos las lecturas (Well_Id, Date, RunLife) en una sola pasada vectorizada, sin recorrer fila por fila.
+    # 'abiertos' es el último ciclo ya guardado de cada pozo: sus lecturas nuevas lo continúan salvo que empiecen con un reinicio.
+    # Devuelve los ciclos tocados por las lecturas nuevas (incluido el abierto de cada pozo, combinado o cerrado) con las columnas de COLUMNAS.
+    if abiertos is None:
+        abiertos = pd.DataFrame(columns=COLUMNAS)
+    abiertos = abiertos.astype({"Ciclo": int, "Run_Life": float, "Ultimo_RunLife": float, "Lecturas": int}).set_index("Well_Id")
+
+    lecturas = lecturas.sort_values(["Well_Id", "Date"], kind="stable").reset_index(drop=True)
+    pozos = lecturas["Well_Id"]
+    run_life = lecturas["RunLife"].astype(float)
+
+    # Lectura anterior del mismo pozo; la primera lectura nueva de cada pozo se compara con la última del ciclo abierto
+    anterior = run_life.groupby(pozos).shift()
+    primeras = anterior.isna()
+    anterior[primeras] = pozos[primeras].map(abiertos["Ultimo_RunLife"]).astype(float)
+
+    # Reinicio: RunLife vuelve a 1.0 desde un valor mayor (varias lecturas seguidas en 1.0 son el mismo reinicio).
+    # Las lecturas anteriores al primer reinicio conocido de un pozo forman el ciclo 0 (historia incompleta).
+    reinicio = (run_life <= 1.0) & ~(anterior <= 1.0)
+    base = pozos.map(abiertos["Ciclo"]).fillna(0).astype(int)
+    lecturas["Ciclo"] = base + reinicio.astype(int).groupby(pozos).cumsum()
+    lecturas["RunLife"] = run_life
+
+    nuevos = lecturas.groupby(["Well_Id", "Ciclo"], sort=True).agg(
+        Inicio=("Date", "min"),
+        Fin=("Date", "max"),
+        Run_Life=("RunLife", "max"),
+        Ultimo_RunLife=("RunLife", "last"),
+        Lecturas=("RunLife", "size"),
+    ).reset_index()
+
+    # Combina el ciclo abierto de cada pozo con sus lecturas nuevas que no empezaron con un reinicio
+    previos = abiertos.reset_index()[["Well_Id", "Ciclo", "Inicio", "Run_Life", "Lecturas"]]
+    nuevos = nuevos.merge(previos, on=["Well_Id", "Ciclo"], how="left", suffixes=("", "_previo"))
+    continua = nuevos["Lecturas_previo"].notna()
+    nuevos.loc[continua, "Inicio"] = nuevos.loc[continua, "Inicio_previo"]
+    nuevos["Run_Life"] = nuevos[["Run_Life", "Run_Life_previo"]].max(axis=1)
+    nuevos["Lecturas"] = nuevos["Lecturas"] + nuevos["Lecturas_previo"].fillna(0).astype(int)
+
+    # El ciclo abierto de un pozo cuyas lecturas nuevas empiezan con un reinicio no se extiende, pero se devuelve igual
+    # (cerrado y sin cambios): quien guarda el resultado reemplaza los ciclos abiertos de los pozos con lecturas nuevas
+    cerrados = abiertos.reset_index()
+    cerrados = cerrados[cerrados["Well_Id"].isin(pozos.unique()) & ~cerrados["Well_Id"].isin(nuevos.loc[continua, "Well_Id"])]
+    if not cerrados.empty:
+        nuevos = pd.concat([nuevos, cerrados.drop(columns="Abierto")], ignore_index=True).sort_values(["Well_Id", "Ciclo"], ignore_index=True)
+
+    # Solo el último ciclo de cada pozo queda abierto
+    nuevos["Abierto"] = (nuevos["Ciclo"] == nuevos.groupby("Well_Id")["Ciclo"].transform("max")).astype(int)
+    return nuevos[COLUMNAS]
+
+def _filas(ciclos):
+    # Tipos de Python para el conector (no acepta numpy ni Timestamp de pandas)
+    return [
+        (str(pozo), int(ciclo), pd.Timestamp(inicio).to_pydatetime(), pd.Timestamp(fin).to_pydatetime(),
+         float(run_life), float(ultimo), int(lecturas), int(abierto))
+        for pozo, ciclo, inicio, fin, run_life, ultimo, lecturas, abierto in ciclos.itertuples(index=False)
+    ]
+
+def actualizar_ciclos_conexion(conexion, completo=False):
+    cursor = conexion.cursor()
+
+    marca = None if completo else _valor(cursor, f"SELECT Marca_Agua FROM {TABLA_MARCAS} WHERE Rollup = %s", (TABLA_CICLOS,))
+    nueva_marca = _valor(cursor, f"SELECT MAX(Date) FROM {FUENTE} WHERE RunLife IS NOT NULL")
+    if nueva_marca is None:
+        cursor.close()
+        return 0
+
+    if marca is not None:
+        # Igual que en rollups.py: si hubo borrados o lecturas atrasadas, se reconstruye todo.
+        # Las lecturas nuevas se cuentan antes de decidir que no hay nada que hacer, para no perder las que llegan
+        # después del refresco con la misma fecha de la marca.
+        nuevas = _valor(cursor, f"SELECT COUNT(f.RunLife) {_LECTURAS_NUEVAS}", (marca, str(nueva_marca)))
+        resumidas = _valor(cursor, f"SELECT SUM(Lecturas) FROM {TABLA_CICLOS}") or 0
+        if resumidas + nuevas != _valor(cursor, f"SELECT COUNT(RunLife) FROM {FUENTE} WHERE Date <= %s", (str(nueva_marca),)):
+            marca = None
+        elif not nuevas:
+            cursor.close()
+            return 0
+
+    if marca is None:
+        # Reconstrucción completa
+        cursor.execute(f"DELETE FROM {TABLA_CICLOS}")
+        abiertos = None
+        lecturas = _leer(cursor, f"SELECT Well_Id, Date, RunLife FROM {FUENTE} WHERE RunLife IS NOT NULL AND Date <= %s",
+                         (str(nueva_marca),), ["Well_Id", "Date", "RunLife"])
+    else:
+        lecturas = _leer(cursor, f"SELECT f.Well_Id, f.Date, f.RunLife {_LECTURAS_NUEVAS}",
+                         (marca, str(nueva_marca)), ["Well_Id", "Date", "RunLife"])
+        abiertos = _leer(cursor, f"SELECT {', '.join(COLUMNAS)} FROM {TABLA_CICLOS} WHERE Abierto = 1", (), COLUMNAS)
+        abiertos = abiertos[abiertos["Well_Id"].isin(lecturas["Well_Id"].unique())]
+
+    lecturas["Date"] = pd.to_datetime(lecturas["Date"])
+    ciclos = detectar_ciclos(lecturas, abiertos)
+
+    # El ciclo abierto de cada pozo tocado se reemplaza por su versión extendida (o cerrada) junto con los ciclos nuevos
+    if abiertos is not None and not abiertos.empty:
+        cursor.executemany(f"DELETE FROM {TABLA_CICLOS} WHERE Well_Id = %s AND Ciclo = %s",
+                           [(str(pozo), int(ciclo)) for pozo, ciclo in abiertos[["Well_Id", "Ciclo"]].itertuples(index=False)])
+    cursor.executemany(f"INSERT INTO {TABLA_CICLOS} ({', '.join(COLUMNAS)}) VALUES ({', '.join(['%s'] * len(COLUMNAS))})", _filas(ciclos))
+
+    cursor.execute(f"DELETE FROM {TABLA_MARCAS} WHERE Rollup = %s", (TABLA_CICLOS,))
+    cursor.execute(
+        f"INSERT INTO {TABLA_MARCAS} (Rollup, Marca_Agua, Ultimo_Refresco) VALUES (%s, %s, %s)",
+        (TABLA_CICLOS, str(nueva_marca), time.strftime("%Y-%m-%d %H:%M:%S")),
+    )
+    cursor.close()
+    return len(ciclos)
+
+def actualizar_ciclos(completo=False, espera=0):
+    # Una sola transacción; si falla, la tabla queda como estaba y se reintenta en el siguiente refresco.
+    # Devuelve None (igual que si falla) sin escribir nada si otro proceso tiene el candado después de 'espera' segundos.
+    with _lock, conexion_bd() as conexion, bloqueo_bd(conexion, BLOQUEO_RESUMENES, espera) as obtenido:
+        if not obtenido:
+            print(f"Otro proceso está actualizando '{TABLA_CICLOS}', no se actualiza en este refresco")
+            return None
+        crear_tabla(conexion)
+        conexion.commit()
+        inicio = time.perf_counter()
+        try:
+            ciclos = actualizar_ciclos_conexion(conexion, completo=completo)
+            conexion.commit()
+        except Exception as err:
+            conexion.rollback()
+            print(f"No se pudo actualizar '{TABLA_CICLOS}': {err}")
+            return None
+    print(f"Ciclos de run life: {ciclos} ciclos recalculados en {time.perf_counter() - inicio:.2f} s")
+    return ciclos
+
+
+if __name__ == "__main__":
+    import sys
+    actualizar_ciclos(completo="--completo" in sys.argv, espera=600)
@@ -0,0 +1,89 @@
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+# Este modulo calcula la confiabilidad de los equipos a partir de los ciclos de run life (ciclos_runlife.py), por sistema de levantamiento:
+# tiempo medio entre fallas (MTBF), tasa de fallas y curvas de supervivencia de Kaplan-Meier.
+# Un ciclo cerrado es una falla a los Run_Life días; el ciclo abierto de cada pozo sigue en operación y cuenta como censurado.
+# Todos los sistemas se calculan a la vez con operaciones de NumPy sobre los ciclos ordenados, sin recorrer sistema por sistema.
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+
+import numpy as np
+import pandas as pd
+from utils import cache_consultas, leer_sql_sin_cache
+
+SIN_SISTEMA = "Sin sistema"
+
+def _arreglos(ciclos):
+    # Sistema (código), duración en días y si el ciclo terminó en falla
+    nombres, grupo = np.unique(ciclos["Sistema_Levantamiento"].fillna(SIN_SISTEMA).to_numpy(dtype=str), return_inverse=True)
+    dias = ciclos["Run_Life"].to_numpy(dtype=float)
+    falla = ciclos["Abierto"].to_numpy(dtype=int) == 0
+    return nombres, grupo, dias, falla
+
+def curvas_kaplan_meier(ciclos):
+    # Una fila por sistema y por duración observada, con los equipos en riesgo, las fallas y la supervivencia estimada
+    nombres, grupo, dias, falla = _arreglos(ciclos)
+    if not len(dias):
+        return pd.DataFrame(columns=["Sistema_Levantamiento", "Dias", "En_Riesgo", "Fallas", "Censurados", "Tasa_Fallas", "Supervivencia"])
+
+    orden = np.lexsort((dias, grupo))
+    grupo, dias, falla = grupo[orden], dias[orden], falla[orden]
+
+    # Pares (sistema, duración) distintos
+    nuevo = np.r_[True, (grupo[1:] != grupo[:-1]) | (dias[1:] != dias[:-1])]
+    punto = np.cumsum(nuevo) - 1
+    grupo_punto, dias_punto = grupo[nuevo], dias[nuevo]
+    fallas = np.bincount(punto, weights=falla).astype(int)
+    salidas = np.bincount(punto)
+
+    # En riesgo en cada duración: ciclos del sistema menos los que terminaron (falla o censura) en duraciones anteriores
+    salidas_previas = np.cumsum(salidas) - salidas
+    primero_grupo = np.flatnonzero(np.r_[True, grupo_punto[1:] != grupo_punto[:-1]])
+    en_riesgo = np.bincount(grupo)[grupo_punto] - (salidas_previas - salidas_previas[primero_grupo][grupo_punto])
+
+    # S(t) = producto de (1 - d_i / n_i) hasta t, acumulado dentro de cada sistema
+    tasa = fallas / en_riesgo
+    supervivencia = pd.Series(1.0 - tasa).groupby(grupo_punto).cumprod().to_numpy()
+
+    return pd.DataFrame({
+        "Sistema_Levantamiento": nombres[grupo_punto],
+        "Dias": dias_punto,
+        "En_Riesgo": en_riesgo,
+        "Fallas": fallas,
+        "Censurados": salidas - fallas,
+        "Tasa_Fallas": tasa,
+        "Supervivencia": supervivencia,
+    })
+
+def resumen_confiabilidad(ciclos, curvas=None):
+    # Una fila por sistema: ciclos, fallas, censurados, días de operación, MTBF, fallas por año y mediana de supervivencia
+    nombres, grupo, dias, falla = _arreglos(ciclos)
+    curvas = curvas_kaplan_meier(ciclos) if curvas is None else curvas
+
+    conteo = np.bincount(grupo, minlength=len(nombres))
+    fallas = np.bincount(grupo, weights=falla, minlength=len(nombres)).astype(int)
+    dias_operacion = np.bincount(grupo, weights=dias, minlength=len(nombres))
+    con_fallas = np.where(fallas > 0, fallas, np.nan)
+
+    # Mediana: primera duración en la que la supervivencia baja de 0.5 (nula si ningún sistema llegó ahí)
+    mediana = curvas[curvas["Supervivencia"] <= 0.5].groupby("Sistema_Levantamiento")["Dias"].min()
+
+    resumen = pd.DataFrame({
+        "Sistema_Levantamiento": nombres,
+        "Ciclos": conteo,
+        "Fallas": fallas,
+        "Censurados": conteo - fallas,
+        "Dias_Operacion": dias_operacion,
+        # Tiempo total de operación (incluidos los ciclos en curso) dividido por el número de fallas
+        "MTBF": dias_operacion / con_fallas,
+        "Fallas_por_Año": np.where(dias_operacion > 0, fallas / np.where(dias_operacion > 0, dias_operacion, 1) * 365, np.nan),
+    })
+    resumen["Mediana_Supervivencia"] = resumen["Sistema_Levantamiento"].map(mediana)
+    return resumen
+
+def calcular_confiabilidad(ciclos):
+    curvas = curvas_kaplan_meier(ciclos)
+    return resumen_confiabilidad(ciclos, curvas), curvas
+
+def confiabilidad_en_cache(ciclos, version):
+    # Un resultado por versión de los ciclos, compartido entre workers por el cache de disco. El resultado guardado es
+    # el mismo objeto para todos los callbacks: quien lo use no debe modificar sus DataFrames.
+    return cache_consultas.obtener(f"confiabilidad:{version}", lambda: calcular_confiabilidad(ciclos), leer_sql_sin_cache, tablas=[])
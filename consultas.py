@@ -0,0 +1,83 @@
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+# Este modulo es el registro de consultas SQL que el dashboard carga al iniciar
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+
+from functools import partial
+from utils import (
+    ejecutar_en_cache,
+    obtener_numero_de_pozos,
+)
+from estadisticas_pozo import query_pozos
+from calidad_datos import perfilar_tabla
+from perfiles_columnas import perfiles_actualizados
+from alertas import alertas_actualizadas
+from trayectorias import trayectorias_actualizadas
+
+# Estados diarios por pozo (rollups.py). Las series mensuales, los totales y las métricas por pozo se calculan
+# en memoria a partir de estos estados con agregados.py, sin volver a leer las tablas fuente.
+query_estados_criticas = """
+SELECT * FROM rollup_criticas_diario
+"""
+
+query_estados_volumetrica = """
+SELECT * FROM rollup_volumetrica_diario
+"""
+
+# Ciclos de run life por pozo (ciclos_runlife.py), con su UWI y sistema de levantamiento
+queryrunlife = """
+SELECT c.Well_Id, c.Ciclo, c.Inicio, c.Fin, c.Run_Life, c.Abierto, wmu.UWI, wmu.Sistema_Levantamiento
+FROM runlife_ciclos AS c
+JOIN wells_master_updated AS wmu ON c.Well_Id = wmu.Well_Id
+ORDER BY c.Well_Id, c.Ciclo;
+"""
+
+queryrunstatus = """
+    SELECT cvu.Well_Id, DATE_FORMAT(cvu.Date, '%Y-%m-%d') AS Date, cvu.Run_Status, wm.UWI, wm.Sistema_Levantamiento
+    FROM critical_variables_updated cvu
+    INNER JOIN (
+        SELECT Well_Id, MAX(Date) AS MaxDate
+        FROM critical_variables_updated
+        GROUP BY Well_Id
+    ) max_dates
+    ON cvu.Well_Id = max_dates.Well_Id AND cvu.Date = max_dates.MaxDate
+    INNER JOIN wells_master_updated wm
+    ON cvu.Well_Id = wm.Well_Id;
+    """
+
+querypruebas = """
+    SELECT  wm.UWI, dpp.Test_Date, dpp.Test_Num, dpp.Certified, dpp.Test_Duration, dpp.API, dpp.BSW_P, wm.Sistema_Levantamiento
+    FROM data_prueba_pozo_updated dpp
+    INNER JOIN (
+        SELECT Well_Id, MAX(Test_Date) AS MaxDate
+        FROM data_prueba_pozo_updated
+        GROUP BY Well_Id
+    ) max_dates
+    ON dpp.Well_Id = max_dates.Well_Id AND dpp.Test_Date = max_dates.MaxDate
+    INNER JOIN wells_master_updated wm
+    ON dpp.Well_Id = wm.Well_Id;
+    """
+
+# Lista de nombres de tablas
+tablas = ["data_prueba_pozo_updated", "wells_master_updated", "data_diaria_volumetrica_updated", "critical_variables_updated"]
+
+# Registro de la carga inicial: nombre del resultado -> consulta SQL o función que abre su propia conexión.
+# Las entradas son independientes entre sí, por lo que cargar_consultas las ejecuta en paralelo.
+consultas_iniciales = {
+    'estados_criticas': query_estados_criticas,
+    'estados_volumetrica': query_estados_volumetrica,
+    'df_runlife': queryrunlife,
+    'df_runstatus': queryrunstatus,
+    'df_pruebas': querypruebas,
+    # Alertas de las reglas de reglas_alertas.json: solo se leen los días nuevos de la tabla resumen
+    'alertas': alertas_actualizadas,
+    'pozos': query_pozos,
+    'numero_de_pozos': partial(ejecutar_en_cache, 'numero_de_pozos', ['wells_master_updated'], obtener_numero_de_pozos),
+    # Perfiles aproximados de columnas (distintos, cuantiles, mín/máx): solo se leen las filas nuevas de cada tabla
+    'perfiles_columnas': perfiles_actualizados,
+    # Trayectorias 3D de los surveys direccionales: solo se recalculan los pozos cuyo survey cambió
+    'trayectorias': trayectorias_actualizadas,
+}
+
+# Perfil de nulos de cada tabla para el mapa de calor de "Missing Values", recalculado solo cuando cambia la tabla
+for tabla in tablas:
+    consultas_iniciales[f'nulos_{tabla}'] = partial(ejecutar_en_cache, f'perfil_nulos:{tabla}', [tabla], perfilar_tabla, tabla)
@@ -0,0 +1,244 @@
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+# Este modulo mantiene en memoria los datos del dashboard y los recarga en segundo plano
+# Doble buffer: el refresco arma un ConjuntoDatos nuevo completo y solo al final reemplaza la referencia al actual,
+# así un callback que ya tomó el conjunto anterior nunca ve datos a medio actualizar.
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+
+import os
+import time
+import hashlib
+import calendar
+import threading
+import traceback
+from collections import OrderedDict
+import pytz
+from utils import cargar_consultas, cache_consultas, get_last_updated_time, leer_sql_sin_cache
+from consultas import consultas_iniciales, tablas
+from estadisticas_pozo import construir_estadisticas_pozo, por_pozo_volumetrica, por_pozo_criticas
+from agregados import agregar, estados_mensuales
+from rollups import actualizar_rollups
+from alertas import motor_alertas
+from ciclos_runlife import actualizar_ciclos
+from confiabilidad import confiabilidad_en_cache
+from trayectorias import TABLA_ESTACIONES, asegurar_tabla
+from filtros_tablero import IndicePozos
+
+# Tablas fuente, para declarar de cuáles depende cada tarjeta
+POZOS = "wells_master_updated"
+CRITICAS = "critical_variables_updated"
+VOLUMETRICA = "data_diaria_volumetrica_updated"
+PRUEBAS = "data_prueba_pozo_updated"
+SURVEY = TABLA_ESTACIONES
+
+# Segundos entre revisiones de la base de datos (0 desactiva el refresco en segundo plano)
+INTERVALO_REFRESCO = int(os.environ.get("GEOHALLITIANS_REFRESH_SECONDS", "300"))
+
+# Segundos que la primera carga de un worker espera a que otro termine de escribir las tablas resumen
+ESPERA_RESUMENES = int(os.environ.get("GEOHALLITIANS_LOCK_WAIT_SECONDS", "120"))
+
+# Segundos entre consultas de los navegadores para saber si hay datos nuevos (no toca la base de datos)
+INTERVALO_CLIENTES = int(os.environ.get("GEOHALLITIANS_POLL_SECONDS", "60"))
+
+colombia_tz = pytz.timezone('America/Bogota')
+
+# Conjuntos filtrados que se guardan por conjunto de datos (las últimas combinaciones de filtros usadas)
+CONJUNTOS_FILTRADOS = int(os.environ.get("GEOHALLITIANS_CONJUNTOS_FILTRADOS", "16"))
+
+# Pozos de la gráfica "Top 5 highest Oil production"
+POZOS_PRODUCCION_BOPD = ['Well013', 'Well017', 'Well002', 'Well008', 'Well010']
+
+
+class ConjuntoDatos:
+    # Resultados de una carga completa y los DataFrames derivados que usan las tarjetas. Sus datos no se modifican después de creado.
+
+    def __init__(self, datos, marcas, filtros=()):
+        self.datos = datos
+        self.marcas = marcas  # tabla -> marca de cambios (filas, fecha máxima) con la que se hizo la carga
+        self.filtros = filtros  # clave de filtros con la que se recortaron los datos (filtros_tablero.py), () en el conjunto completo
+        self._derivados = {}  # objetos armados a pedido a partir de estos datos (ver derivado)
+        self._filtrados = OrderedDict()  # clave de filtros -> ConjuntoDatos recortado, en orden de uso (ver filtrado)
+        self._lock_derivados = threading.Lock()
+        self.formatted_time = get_last_updated_time(colombia_tz)
+
+        self.df_runlife = datos['df_runlife']
+        self.df_runstatus = datos['df_runstatus']
+        self.df_pruebas = datos['df_pruebas']
+        self.numero_de_pozos = datos['numero_de_pozos']
+
+        # MTBF y curvas de supervivencia por sistema de levantamiento, calculados una vez por versión de los ciclos
+        self.confiabilidad, self.curvas_supervivencia = confiabilidad_en_cache(self.df_runlife, self.version([POZOS, CRITICAS]))
+
+        # Estados mensuales por pozo: todas las series y totales de abajo se combinan desde aquí
+        self.estados_criticas = datos['estados_criticas']
+        self.estados_volumetrica = datos['estados_volumetrica']
+        uwis = datos['pozos'][['Well_Id', 'UWI']]
+
+        # Variables críticas por mes de todos los pozos: promedios y sumas calculados desde los mismos estados
+        self.df = agregar(self.estados_criticas, 'mes', por_pozo=False)
+
+        # Producción de Oil y Gas y calidad de crudo por pozo y por mes
+        self.df_query_var_3 = (
+            agregar(self.estados_volumetrica, 'mes', medidas=['Oil', 'Gas', 'OIL QUALITY'])
+            .rename(columns={'Promedio_OIL_QUALITY': 'PROMEDIO_OIL_QUALITY'})
+            .merge(uwis, on='Well_Id')
+        )
+
+        # Totales de las tarjetas KPI
+        self.totales_var_3 = agregar(self.estados_volumetrica, 'total', por_pozo=False).iloc[0].rename({
+            'Suma_Hours': 'Total_Hours',
+            'Suma_Oil': 'Total_Oil',
+            'Suma_Water': 'Total_Water',
+            'Suma_Gas': 'Total_Gas',
+        })
+
+        # Métricas por pozo de todas las tarjetas, indexadas por Well_Id
+        self.df_pozos = construir_estadisticas_pozo(
+            datos['pozos'],
+            por_pozo_volumetrica(self.estados_volumetrica),
+            por_pozo_criticas(self.estados_criticas),
+        )
+        self.df_map = self.df_pozos.reset_index()[['Well_Id', 'UWI', 'Geo_latitude', 'Geo_longitude', 'Wellhead_depth', 'Water_depth']]
+
+        # Trayectorias de los surveys direccionales (Norte, Este y TVD desde la cabeza de cada pozo)
+        self.trayectorias = datos['trayectorias']
+
+        # Obtener datos de producción de Oil y Gas por cada Well_Id
+        self.well_production_data = self.df_query_var_3
+
+        # Episodios de alerta de cada regla por pozo (alertas.py)
+        self.filtered_df = datos['alertas'].merge(uwis, on='Well_Id')
+
+        # WCUT y WOR son proporciones: se grafican como promedio del mes y no como suma de lecturas
+        self.df_grouped = self.df[['Año', 'Mes', 'Promedio_WCUT', 'Promedio_WOR']]
+
+        # Producción de BOPD por pozo y por mes de los pozos de la gráfica, con una columna 'Año_Mes' formateada
+        well_production_bopd = agregar(self.estados_criticas, 'mes', medidas=['BOPD']).merge(uwis, on='Well_Id')
+        well_production_bopd = well_production_bopd[well_production_bopd['UWI'].isin(POZOS_PRODUCCION_BOPD)]
+        # map en vez de apply: con filtros que dejan fuera a estos pozos el DataFrame queda vacío
+        well_production_bopd = well_production_bopd.assign(
+            Año_Mes=well_production_bopd['Mes'].map(dict(enumerate(calendar.month_abbr))) + '/' + well_production_bopd['Año'].astype(str).str[-2:]
+        )
+        self.well_production_bopd = well_production_bopd.sort_values(by=['Año', 'Mes'])
+
+    def version(self, fuentes):
+        # Versión de los datos que vienen de las tablas indicadas: solo cambia si cambió alguna de esas tablas.
+        # Depende únicamente de las marcas, así que es la misma en todos los workers que cargaron los mismos datos.
+        marcas = [(tabla, self.marcas.get(tabla)) for tabla in sorted(fuentes)]
+        # Un conjunto filtrado tiene las mismas marcas que el completo pero no los mismos datos
+        clave = (marcas, self.filtros) if self.filtros else marcas
+        return hashlib.sha1(repr(clave).encode("utf-8")).hexdigest()[:12]
+
+    def derivado(self, clave, construir):
+        # Arma una sola vez por conjunto de datos un objeto que dependa solo de ellos (por ejemplo una tabla paginada)
+        # y lo reutiliza en los callbacks siguientes. Se descarta junto con el conjunto en el próximo refresco.
+        with self._lock_derivados:
+            if clave not in self._derivados:
+                self._derivados[clave] = construir()
+            return self._derivados[clave]
+
+    def indice_pozos(self):
+        return self.derivado('indice_pozos', lambda: IndicePozos(self.datos))
+
+    def filtrado(self, filtros):
+        # Conjunto con solo las filas que cumplen la clave de filtros (IndicePozos.clave), armado en memoria a partir de este
+        # y guardado para los callbacks siguientes. Sin filtros es este mismo conjunto.
+        if not filtros:
+            return self
+        indice = self.indice_pozos()
+        with self._lock_derivados:
+            if filtros not in self._filtrados:
+                conjunto = ConjuntoDatos(indice.filtrar(self.datos, filtros), self.marcas, filtros)
+                conjunto.formatted_time = self.formatted_time
+                self._filtrados[filtros] = conjunto
+                while len(self._filtrados) > CONJUNTOS_FILTRADOS:
+                    self._filtrados.popitem(last=False)
+            self._filtrados.move_to_end(filtros)
+            return self._filtrados[filtros]
+
+
+_actual = None
+_lock = threading.Lock()
+_hilo_pid = None
+
+# Solo un callback hace la primera carga; los demás que llegan mientras tanto la esperan. Es otro candado que _lock
+# porque refrescar_conjunto toma _lock para el intercambio.
+_lock_primera_carga = threading.Lock()
+
+
+def marcas_actuales():
+    # Fuerza a leer de nuevo las marcas de cambios de las tablas en vez de usar las guardadas en el cache
+    cache_consultas.invalidar_marcas()
+    # La tabla de surveys puede no existir todavía en la base (se crea con la primera carga de estaciones)
+    asegurar_tabla()
+    return {tabla: cache_consultas.marca_tabla(tabla, leer_sql_sin_cache) for tabla in [*tablas, SURVEY]}
+
+def refrescar_conjunto(forzar=False):
+    # Recarga todo solo si alguna tabla cambió. Las consultas de tablas sin cambios salen del cache de consultas.
+    global _actual
+
+    marcas = marcas_actuales()
+    if not forzar and _actual is not None and marcas == _actual.marcas:
+        return False
+
+    inicio = time.perf_counter()
+    # Una recarga forzada vuelve a leer también la ventana completa de las alertas. Lo mismo si las variables críticas
+    # cambiaron de cantidad de filas sin que avance la fecha máxima: llegaron lecturas atrasadas o se corrigieron días
+    # anteriores, que pueden estar fuera de los últimos días que el motor vuelve a leer en cada refresco.
+    anteriores = _actual.marcas[CRITICAS] if _actual is not None else None
+    if forzar or (anteriores is not None and anteriores[1:] == marcas[CRITICAS][1:] and anteriores != marcas[CRITICAS]):
+        motor_alertas.reiniciar()
+    # Las consultas leen las tablas resumen y la de ciclos: primero se incorporan las filas nuevas.
+    # Solo un proceso las escribe a la vez (candado en la base). Si otro worker las está escribiendo o la escritura falló,
+    # no se leen ahora: un resultado a medio actualizar quedaría en el cache de consultas con la marca nueva de la fuente.
+    # Se sigue mostrando el conjunto anterior y se reintenta en el próximo refresco; la primera carga espera al otro worker.
+    espera = ESPERA_RESUMENES if _actual is None else 0
+    rollups = actualizar_rollups(espera=espera)
+    ciclos = actualizar_ciclos(espera=espera) if rollups is not None else None
+    if (rollups is None or None in rollups.values() or ciclos is None) and _actual is not None:
+        print("Las tablas resumen no están al día, se siguen mostrando los datos anteriores")
+        return False
+    datos, _ = cargar_consultas(consultas_iniciales)
+    # Las tarjetas solo usan series mensuales y totales: los estados diarios se combinan una vez por pozo y por mes,
+    # y los filtros del tablero recortan estos estados mensuales
+    for nombre in ('estados_criticas', 'estados_volumetrica'):
+        datos[nombre] = estados_mensuales(datos[nombre])
+    nuevo = ConjuntoDatos(datos, marcas)
+
+    # Intercambio atómico: los callbacks que ya tomaron el conjunto anterior lo siguen usando completo
+    with _lock:
+        _actual = nuevo
+    print(f"Datos del dashboard actualizados en {time.perf_counter() - inicio:.2f} s ({nuevo.formatted_time})")
+    return True
+
+def _bucle_refresco(intervalo):
+    fallos = 0
+    while True:
+        time.sleep(intervalo)
+        try:
+            refrescar_conjunto()
+            fallos = 0
+        except Exception:
+            # El hilo no puede morir, pero el error completo queda en el log del worker con los intentos fallidos seguidos
+            fallos += 1
+            print(f"No se pudo refrescar los datos del dashboard ({fallos} intentos seguidos), se siguen mostrando los anteriores:")
+            traceback.print_exc()
+
+def iniciar_refresco(intervalo=INTERVALO_REFRESCO):
+    # Un hilo por proceso: los workers de gunicorn creados con fork no heredan el hilo del proceso padre
+    global _hilo_pid
+    if intervalo <= 0:
+        return
+    with _lock:
+        if _hilo_pid == os.getpid():
+            return
+        _hilo_pid = os.getpid()
+    threading.Thread(target=_bucle_refresco, args=(intervalo,), name="refresco-datos", daemon=True).start()
+
+def conjunto_actual():
+    # Cada callback debe tomar el conjunto una sola vez y usar esa referencia hasta terminar
+    if _actual is None:
+        with _lock_primera_carga:
+            if _actual is None:
+                refrescar_conjunto(forzar=True)
+    iniciar_refresco()
+    return _actual
@@ -0,0 +1,54 @@
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+# Este modulo calcula todas las métricas por pozo de las tarjetas a partir del maestro de pozos y de los estados diarios
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+
+import numpy as np
+import pandas as pd
+from agregados import agregar
+
+# Maestro de pozos: atributos de cada pozo (ubicación, profundidades, sistema de levantamiento)
+query_pozos = """
+SELECT Well_Id, UWI, Geo_latitude, Geo_longitude, Wellhead_depth, Water_depth, Sistema_Levantamiento, Purpose
+FROM wells_master_updated
+"""
+
+def por_pozo_volumetrica(estados):
+    # Totales por pozo de data_diaria_volumetrica_updated a partir de sus estados mensuales (agregados.estados_mensuales)
+    totales = agregar(estados, 'total', medidas=['Oil', 'Gas', 'Water', 'Hours']).set_index('Well_Id')
+    return pd.DataFrame({
+        'Registros_Volumetrica': totales['Filas'],
+        'Total_Gas_Pozo': totales['Suma_Gas'],
+        'Total_Oil_Pozo': totales['Suma_Oil'],
+        'Total_Water_Pozo': totales['Suma_Water'],
+        'Average_Gas': totales['Promedio_Gas'],
+        'Total_Hours': totales['Suma_Hours'],
+        'Days_with_Values': totales['Dias_Hours'].fillna(0).astype(int),
+    }).reset_index()
+
+def por_pozo_criticas(estados):
+    # Promedio de BOPD por pozo a partir de los estados mensuales de critical_variables_updated
+    totales = agregar(estados, 'total', medidas=['BOPD'])
+    return totales[['Well_Id', 'Promedio_BOPD']].rename(columns={'Promedio_BOPD': 'Average_BOPD'})
+
+def construir_estadisticas_pozo(pozos, por_pozo_volumetrica, por_pozo_criticas):
+    # Une las agregaciones al maestro de pozos en un solo DataFrame indexado por Well_Id
+    df_pozos = (
+        pozos.set_index('Well_Id')
+        .join(por_pozo_volumetrica.set_index('Well_Id'), how='left')
+        .join(por_pozo_criticas.set_index('Well_Id'), how='left')
+    )
+
+    # Proporciones de cada fluido sobre el total producido por el pozo
+    total_fluidos = df_pozos[['Total_Gas_Pozo', 'Total_Oil_Pozo', 'Total_Water_Pozo']].sum(axis=1, min_count=1)
+    df_pozos['Proporcion_Gas_Pozo'] = df_pozos['Total_Gas_Pozo'] / total_fluidos * 100
+    df_pozos['Proporcion_Oil_Pozo'] = df_pozos['Total_Oil_Pozo'] / total_fluidos * 100
+    df_pozos['Proporcion_Water_Pozo'] = df_pozos['Total_Water_Pozo'] / total_fluidos * 100
+
+    # Horas promedio por día con valores de horas
+    df_pozos['Average_Hours_Per_Day'] = df_pozos['Total_Hours'] / df_pozos['Days_with_Values'].replace(0, np.nan)
+
+    return df_pozos
+
+def pozos_con_produccion(df_pozos):
+    # Pozos con registros en data_diaria_volumetrica_updated (equivale al JOIN de la consulta de sumas por pozo)
+    return df_pozos[df_pozos['Registros_Volumetrica'] > 0]
@@ -0,0 +1,98 @@
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+# Este modulo tiene las funciones de los botones de exportar (PDF, PPT y PNG). El dashboard lo importa solo al hacer clic en un botón.
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+
+import img2pdf
+from pptx import Presentation
+from pptx.util import Inches, Pt
+from pptx.enum.text import PP_ALIGN
+from pptx.dml.color import RGBColor
+
+def capturar_pantalla():
+    # pyautogui necesita una pantalla; se importa aquí para que el resto del módulo funcione en servidores sin display
+    import pyautogui
+    return pyautogui.screenshot()
+
+# Define una función para crear y guardar un archivo de PowerPoint con dos slides personalizados
+def create_custom_pptx():
+    prs = Presentation()
+
+    # Slide 1: Título personalizado en fondo negro
+    slide1 = prs.slides.add_slide(prs.slide_layouts[6])  # Layout en blanco
+
+    # Configurar el fondo negro
+    background1 = slide1.background
+    fill1 = background1.fill
+    fill1.solid()
+    fill1.fore_color.rgb = RGBColor(0, 0, 0)  # Negro
+
+    # Agregar la imagen de fondo (slide 1)
+    left = top = Inches(0)
+    width = prs.slide_width
+    height = prs.slide_height
+    pic1 = slide1.shapes.add_picture("D:/Tablero_prod/assets/spe_logo.png", left, top, width, height)
+
+    # Agregar un cuadro de texto para el título (slide 1)
+    left = Inches(1)
+    top = Inches(0.1)  # Mover hacia arriba
+    width = prs.slide_width - Inches(2)
+    height = Inches(1)
+    txBox1 = slide1.shapes.add_textbox(left, top, width, height)
+    tf1 = txBox1.text_frame
+    p1 = tf1.add_paragraph()
+    p1.text = "Geohallitians Production Kpis Report"
+    p1.alignment = PP_ALIGN.CENTER
+    run1 = p1.runs[0]
+    font1 = run1.font
+    font1.size = Pt(36)  # Tamaño de fuente (ajusta según sea necesario)
+    font1.bold = True
+    font1.color.rgb = RGBColor(255, 255, 255)  # Blanco
+
+    # Captura el área del dashboard usando pyautogui
+    screenshot = capturar_pantalla()
+    screenshot.save("dashboard.png")
+
+    # Slide 2: Título y imagen
+    slide2 = prs.slides.add_slide(prs.slide_layouts[6])  # Layout en blanco
+
+    # Agregar la imagen (slide 2)
+    left = Inches(0)
+    top = Inches(1.5)
+    width = prs.slide_width
+    height = Inches(5.5)  # Reducir la altura de la imagen
+    pic2 = slide2.shapes.add_picture("dashboard.png", left, top, width, height)
+
+    # Agregar el título (slide 2)
+    left = Inches(0)
+    top = Inches(0)
+    width = prs.slide_width
+    height = Inches(1)
+    txBox2 = slide2.shapes.add_textbox(left, top, width, height)
+    tf2 = txBox2.text_frame
+    p2 = tf2.add_paragraph()
+    p2.text = "KPIs Dashboard"
+    p2.alignment = PP_ALIGN.CENTER
+    run2 = p2.runs[0]
+    font2 = run2.font
+    font2.size = Pt(48)  # Aumentar el tamaño de la fuente
+    font2.bold = True
+    font2.color.rgb = RGBColor(0, 0, 0)  # Negro
+
+    prs.save("Geohallitians_dashboard_presentation.pptx")
+
+
+# Define una función para capturar el área del dashboard y exportarla a PDF
+def export_dashboard_to_pdf():
+    # Captura el área del dashboard usando pyautogui
+    screenshot = capturar_pantalla()
+    screenshot.save("dashboard.png")
+    
+    # Convierte la imagen capturada a PDF usando img2pdf
+    with open("Geohallitians_dashboard.pdf", "wb") as f:
+        f.write(img2pdf.convert("dashboard.png"))
+
+# Define una función para capturar el área del dashboard y exportarla a PNG
+def export_dashboard_to_png():
+    # Captura el área del dashboard usando pyautogui
+    screenshot = capturar_pantalla()
+    screenshot.save("Geohallitians_dashboard.png")
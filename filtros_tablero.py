@@ -0,0 +1,126 @@
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+# Este modulo aplica los filtros de la barra lateral del dashboard: período, campo, sistema de levantamiento y propósito del pozo
+# IndicePozos se arma una vez por conjunto de datos: guarda los atributos del maestro de pozos como categorías y, para cada tabla
+# por pozo, la posición en el maestro del pozo de cada fila. Filtrar es combinar máscaras booleanas sobre esos arreglos, sin SQL.
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+
+import numpy as np
+import pandas as pd
+
+# Períodos del filtro: etiqueta -> meses hacia atrás contando el último mes con datos (None = todo el historial)
+PERIODOS = {
+    'All': None,
+    'Last 3 months': 3,
+    'Last 6 months': 6,
+    'Last 9 months': 9,
+    'Last Year': 12,
+}
+
+# wells_master_updated no tiene columna de campo: todos los pozos pertenecen a un único campo
+TODOS_LOS_CAMPOS = 'All Fields'
+
+# Filtros por atributo del pozo: nombre del filtro -> columna del maestro de pozos (None = campo único)
+CATEGORIAS = {
+    'campos': None,
+    'sistemas': 'Sistema_Levantamiento',
+    'propositos': 'Purpose',
+}
+
+# Tablas del conjunto de datos con filas por pozo -> columna que identifica el pozo
+TABLAS_POR_POZO = {
+    'pozos': 'Well_Id',
+    'estados_criticas': 'Well_Id',
+    'estados_volumetrica': 'Well_Id',
+    'df_runlife': 'Well_Id',
+    'df_runstatus': 'Well_Id',
+    'alertas': 'Well_Id',
+    'trayectorias': 'Well_Id',
+    'df_pruebas': 'UWI',
+}
+
+# Tablas que además se recortan al período -> columna de fecha de cada fila (None = columnas Año y Mes de los estados mensuales)
+TABLAS_POR_PERIODO = {
+    'estados_criticas': None,
+    'estados_volumetrica': None,
+    'alertas': 'Day',
+}
+
+
+def _numero_mes(frame, columna):
+    # Mes de cada fila como un número entero (año * 12 + mes - 1), para comparar períodos con una sola resta
+    if columna is None:
+        return (frame['Año'].to_numpy(dtype=np.int64) * 12 + frame['Mes'].to_numpy(dtype=np.int64) - 1)
+    fechas = pd.to_datetime(frame[columna])
+    return (fechas.dt.year * 12 + fechas.dt.month - 1).to_numpy(dtype=np.int64)
+
+def _posiciones(claves, valores):
+    # Posición de cada valor en 'claves' (-1 si no está); ante claves repetidas se usa la primera
+    claves = pd.Index(claves)
+    if not claves.is_unique:
+        claves = claves[~claves.duplicated()]
+    return claves.get_indexer(valores)
+
+def clave_de_json(valor):
+    # La clave de filtros viaja al navegador como lista de [nombre, valor] (JSON no tiene tuplas): se vuelve a armar la tupla
+    return tuple((nombre, tuple(valores) if isinstance(valores, list) else valores) for nombre, valores in (valor or []))
+
+
+class IndicePozos:
+    # Categorías del maestro de pozos y posición del pozo de cada fila de las tablas por pozo de un conjunto de datos
+
+    def __init__(self, datos):
+        pozos = datos['pozos']
+        self.numero_pozos = len(pozos)
+        self.categorias = {
+            nombre: pd.Categorical(pozos[columna] if columna else np.full(len(pozos), TODOS_LOS_CAMPOS))
+            for nombre, columna in CATEGORIAS.items()
+        }
+        self.filas = {tabla: _posiciones(pozos[columna], datos[tabla][columna]) for tabla, columna in TABLAS_POR_POZO.items()}
+        self.meses = {tabla: _numero_mes(datos[tabla], columna) for tabla, columna in TABLAS_POR_PERIODO.items()}
+        self.ultimo_mes = max((int(meses.max()) for meses in self.meses.values() if len(meses)), default=None)
+
+    def opciones(self, nombre):
+        return list(self.categorias[nombre].categories)
+
+    def clave(self, periodo, seleccion):
+        # Estado normalizado y ordenable de los filtros: solo quedan los que restringen algo, así que sin filtros la clave es ()
+        # periodo: etiqueta de PERIODOS | seleccion: nombre de CATEGORIAS -> valores elegidos (None = sin restricción)
+        if periodo is not None and periodo not in PERIODOS:
+            raise ValueError(f"Período desconocido: {periodo}")
+        clave = [('periodo', periodo)] if PERIODOS.get(periodo) else []
+        for nombre, valores in seleccion.items():
+            if nombre not in CATEGORIAS:
+                raise ValueError(f"Filtro desconocido: {nombre}")
+            if valores is None or set(valores) >= set(self.categorias[nombre].categories):
+                continue
+            clave.append((nombre, tuple(sorted(set(valores)))))
+        return tuple(sorted(clave))
+
+    def mascara_pozos(self, clave):
+        # Pozos del maestro que cumplen todos los filtros por atributo de la clave
+        mascara = np.ones(self.numero_pozos, dtype=bool)
+        for nombre, valores in clave:
+            if nombre not in self.categorias:
+                continue
+            categorias = self.categorias[nombre]
+            # Los pozos sin valor tienen código -1 y caen en el False agregado al final
+            elegidas = np.append(categorias.categories.isin(valores), False)
+            mascara &= elegidas[categorias.codes]
+        return mascara
+
+    def filtrar(self, datos, clave):
+        # Copia del diccionario de datos con las tablas por pozo reducidas a las filas que cumplen la clave.
+        # Las demás entradas (perfiles de nulos de las tablas, por ejemplo) no dependen de los pozos y se comparten.
+        # Las filas de pozos que no están en el maestro quedan en la posición -1, que nunca se selecciona.
+        pozos = np.append(self.mascara_pozos(clave), False)
+        meses = PERIODOS[dict(clave).get('periodo', 'All')]
+        desde = self.ultimo_mes - meses + 1 if meses and self.ultimo_mes is not None else None
+
+        filtrados = dict(datos)
+        for tabla, filas in self.filas.items():
+            seleccion = pozos[filas]
+            if desde is not None and tabla in self.meses:
+                seleccion &= self.meses[tabla] >= desde
+            filtrados[tabla] = datos[tabla][seleccion]
+        filtrados['numero_de_pozos'] = filtrados['pozos']['UWI'].nunique()
+        return filtrados
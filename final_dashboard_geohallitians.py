@@ -1,205 +1,51 @@
 import dash
 import pandas as pd
 import plotly.graph_objs as go
-import plotly.express as px
 import plotly.io as pio # Importa el tema oscuro de Plotly
-import pytz
 import dash_leaflet as dl
 import dash_leaflet.express as dlx
-from dash import dcc, html, Input, Output
+from dash import dcc, html, Input, Output, State
+from dash.exceptions import PreventUpdate
 from datetime import datetime
 import calendar
-#import pyautogui
-import io
-import base64
-from PIL import Image
-import openpyxl
-import img2pdf
-from pptx import Presentation
-from pptx.util import Inches, Pt
-from pptx.enum.text import PP_ALIGN
-from pptx.enum.shapes import MSO_SHAPE
-from pptx.dml.color import RGBColor
-import webbrowser
 import dash_table
 import numpy as np
-import seaborn as sns
-import matplotlib.pyplot as plt
 from utils import (
-    get_database_connection,
-    obtener_numero_de_pozos,
     generate_data_card,
-    get_last_updated_time,
+    generate_lazy_card,
+)
+from consultas import tablas
+from tablas_paginadas import TablaPaginada
+from registro_figuras import RegistroFiguras
+from filtros_tablero import PERIODOS, clave_de_json
+from indice_espacial import IndiceEspacial
+from trayectorias import PIES_POR_GRADO
+from estadisticas_pozo import pozos_con_produccion
+from datos_tablero import (
+    conjunto_actual,
+    INTERVALO_CLIENTES,
+    POZOS,
+    CRITICAS,
+    VOLUMETRICA,
+    PRUEBAS,
+    SURVEY,
 )
 
 external_stylesheets = [
     'https://fonts.googleapis.com/css?family=Lato',
     '/assets/style.css',
 ]
-app = dash.Dash(__name__, external_stylesheets=external_stylesheets)
+# Las tablas paginadas están dentro de tarjetas diferidas: sus callbacks se registran antes de que existan en el layout
+app = dash.Dash(__name__, external_stylesheets=external_stylesheets, suppress_callback_exceptions=True)
 server = app.server
 
 # ---------------------------------------------------------------------------------------------------------------------------------------------------
 # SECCION DE CONEXIONES Y CONSULTAS MYSQL
 # ---------------------------------------------------------------------------------------------------------------------------------------------------
 
-# Conexión con el servidor MySQL
-conexion = get_database_connection()
-
-# Consulta SQL para obtener los datos sumados por mes
-query = """SELECT 
-    YEAR(Date) AS Año,
-    MONTH(Date) AS Mes,
-    AVG(Presion_intake) AS Promedio_Presion_intake,
-    AVG(Freq) AS Promedio_Freq,
-    AVG(Caudal) AS Promedio_Caudal,
-    SUM(WOR) AS Suma_WOR,
-    SUM(WCUT) AS Suma_WCUT,
-    SUM(BWPD) AS Suma_BWPD,
-    SUM(BOPD) AS Suma_BOPD
-FROM critical_variables_updated
-GROUP BY Año, Mes
-"""
-
-# Leer los datos desde MySQL y crear un DataFrame
-df = pd.read_sql(query, conexion)
-
-queryrunlife = """
-SELECT 
-    cvu.Well_Id,
-    cvu.Date,
-    MAX(cvu.RunLife) AS Maximo_Antes_de_1_0,
-    wmu.UWI,
-    wmu.Sistema_Levantamiento
-FROM (
-    SELECT *,
-        SUM(CASE WHEN RunLife = 1.0 THEN 1 ELSE 0 END) OVER (PARTITION BY Well_Id ORDER BY Date) AS Cycle
-    FROM critical_variables_updated
-    WHERE RunLife > 1.0
-        AND DATE_FORMAT(Date, '%H:%i') = '00:00'
-        AND (SELECT MAX(RunLife) FROM critical_variables_updated WHERE Well_Id = critical_variables_updated.Well_Id AND RunLife = 1.0) IS NOT NULL
-) AS cvu
-JOIN wells_master_updated AS wmu ON cvu.Well_Id = wmu.Well_Id
-GROUP BY cvu.Well_Id, cvu.Date, wmu.UWI, wmu.Sistema_Levantamiento;
-"""
-
-# Ejecuta la consulta y guarda los resultados en un DataFrame de pandas
-df_runlife = pd.read_sql_query(queryrunlife, conexion)
-
-queryrunstatus = """
-    SELECT cvu.Well_Id, DATE_FORMAT(cvu.Date, '%Y-%m-%d') AS Date, cvu.Run_Status, wm.UWI, wm.Sistema_Levantamiento
-    FROM critical_variables_updated cvu
-    INNER JOIN (
-        SELECT Well_Id, MAX(Date) AS MaxDate
-        FROM critical_variables_updated
-        GROUP BY Well_Id
-    ) max_dates
-    ON cvu.Well_Id = max_dates.Well_Id AND cvu.Date = max_dates.MaxDate
-    INNER JOIN wells_master_updated wm
-    ON cvu.Well_Id = wm.Well_Id;
-    """
-
-# Suponiendo que ya tienes una conexión a tu base de datos llamada 'conexion'
-df_runstatus = pd.read_sql_query(queryrunstatus, conexion)
-
-querypruebas = """
-    SELECT  wm.UWI, dpp.Test_Date, dpp.Test_Num, dpp.Certified, dpp.Test_Duration, dpp.API, dpp.BSW_P, wm.Sistema_Levantamiento
-    FROM data_prueba_pozo_updated dpp
-    INNER JOIN (
-        SELECT Well_Id, MAX(Test_Date) AS MaxDate
-        FROM data_prueba_pozo_updated
-        GROUP BY Well_Id
-    ) max_dates
-    ON dpp.Well_Id = max_dates.Well_Id AND dpp.Test_Date = max_dates.MaxDate
-    INNER JOIN wells_master_updated wm
-    ON dpp.Well_Id = wm.Well_Id;
-    """
-
-# Suponiendo que ya tienes una conexión a tu base de datos llamada 'conexion'
-df_pruebas = pd.read_sql_query(querypruebas, conexion)
-
-# Consulta SQL para obtener los datos
-
-query_var_3 = """
-SELECT a.Well_Id,
-	   YEAR(Volume_Date) AS Año,
-       MONTH(Volume_Date) AS Mes,
-       SUM(Oil) AS Suma_Oil,
-       SUM(Gas) AS Suma_Gas,
-       AVG(`OIL QUALITY`) AS PROMEDIO_OIL_QUALITY,
-       b.UWI
-FROM data_diaria_volumetrica_updated a
-JOIN wells_master_updated b
-ON a. Well_Id = b. Well_Id
-GROUP BY UWI, Mes, Año
-"""
-
-query_tarjetas_var_2 = "SELECT Caudal, WOR FROM critical_variables_updated"
-query_tarjetas_var_3 = "SELECT Hours, Oil, Water, Gas FROM data_diaria_volumetrica_updated"
-
-querymap = "SELECT UWI, Geo_latitude, Geo_longitude, Wellhead_depth, Water_depth FROM wells_master_updated"
-
-# Obtener datos
-df_query_var_3 = pd.read_sql(query_var_3, conexion)
-df_var_2 = pd.read_sql(query_tarjetas_var_2, conexion)
-df_var_3 = pd.read_sql(query_tarjetas_var_3, conexion)
-
-# Obtener datos de producción de Oil y Gas por cada Well_Id
-well_production_data = df_query_var_3
-
-df_map = pd.read_sql(querymap, conexion)
-
-# Obtener la hora actual en Colombia
-colombia_tz = pytz.timezone('America/Bogota')
-formatted_time = get_last_updated_time(colombia_tz)
-
-# Obtener el número de pozos
-numero_de_pozos = obtener_numero_de_pozos(conexion)
-
-# Consulta SQL para obtener las sumas agrupadas por "Well Id"
-query_sumas_por_pozo = """
-SELECT a.Well_Id,
-       SUM(Gas) AS Total_Gas_Pozo,
-       SUM(Oil) AS Total_Oil_Pozo,
-       SUM(Water) AS Total_Water_Pozo,
-       b.UWI,
-       b.Geo_latitude,
-       b.Geo_longitude,
-       b.Sistema_Levantamiento,
-       b.Purpose
-FROM data_diaria_volumetrica_updated a
-JOIN wells_master_updated b
-ON a. Well_Id = b. Well_Id
-GROUP BY Well_Id
-"""
-
-# Ejecutar la consulta SQL y cargar los resultados en un DataFrame
-df_sumas_por_pozo = pd.read_sql(query_sumas_por_pozo, conexion)
-
-# Calcular las proporciones por pozo
-df_sumas_por_pozo['Proporcion_Gas_Pozo'] = (df_sumas_por_pozo['Total_Gas_Pozo'] / (df_sumas_por_pozo['Total_Gas_Pozo'] + df_sumas_por_pozo['Total_Oil_Pozo'] + df_sumas_por_pozo['Total_Water_Pozo'])) * 100
-df_sumas_por_pozo['Proporcion_Oil_Pozo'] = (df_sumas_por_pozo['Total_Oil_Pozo'] / (df_sumas_por_pozo['Total_Gas_Pozo'] + df_sumas_por_pozo['Total_Oil_Pozo'] + df_sumas_por_pozo['Total_Water_Pozo'])) * 100
-df_sumas_por_pozo['Proporcion_Water_Pozo'] = (df_sumas_por_pozo['Total_Water_Pozo'] / (df_sumas_por_pozo['Total_Gas_Pozo'] + df_sumas_por_pozo['Total_Oil_Pozo'] + df_sumas_por_pozo['Total_Water_Pozo'])) * 100
-
-# Consulta SQL
-query_hours = """
-SELECT
-    b.UWI,
-    SUM(a.Hours) AS Total_Hours,
-    COUNT(DISTINCT a.VOLUME_DATE) AS Days_with_Values,
-    SUM(a.Hours) / COUNT(DISTINCT a.VOLUME_DATE) AS Average_Hours_Per_Day
-FROM
-    tablero_geohallitians.data_diaria_volumetrica_updated AS a
-INNER JOIN 
-    wells_master_updated AS b ON a.Well_Id = b.Well_Id
-WHERE
-    a.Hours IS NOT NULL
-GROUP BY
-    a.Well_Id, b.UWI;
-"""
-
-# Cargar datos en un DataFrame de Pandas
-df_hours = pd.read_sql(query_hours, conexion)
+# Carga inicial de todas las consultas registradas en consultas.py. Después, un hilo por proceso vuelve a cargar
+# los datos cada INTERVALO_REFRESCO segundos si alguna tabla cambió (ver datos_tablero.py).
+conjunto_actual()
 
 def generate_pie_chart(row, text_size=11):
     labels = ['Gas', 'Oil', 'Water']
@@ -224,86 +70,51 @@ def generate_pie_chart(row, text_size=11):
 
     return dcc.Graph(figure=fig, config={'displayModeBar': False})
 
-# Consulta SQL
-query_prom_bopd = """
-SELECT
-    a.Well_Id,
-    AVG(a.BOPD) AS Average_BOPD,
-    b.UWI
-FROM
-    tablero_geohallitians.critical_variables_updated AS a
-INNER JOIN 
-    wells_master_updated AS b ON a.Well_Id = b.Well_Id
-GROUP BY
-    a.Well_Id, b.UWI;
-"""
-
-# Cargar datos en un DataFrame de Pandas
-df_prom = pd.read_sql(query_prom_bopd, conexion)
-
-query_bopd = """
-SELECT Well_Id, BOPD, Day
-FROM critical_variables_updated
-GROUP BY Well_Id, BOPD, Day;
-"""
-
-df_bopd = pd.read_sql(query_bopd, conexion)
-
-# Realiza la consulta SQL
-query_minus_gas = """
-SELECT
-    a.Well_Id,
-    AVG(a.Gas) AS Average_Gas,
-    b.UWI
-FROM
-    tablero_geohallitians.data_diaria_volumetrica_updated AS a
-INNER JOIN 
-    wells_master_updated AS b ON a.Well_Id = b.Well_Id
-GROUP BY
-    a.Well_Id, b.UWI;
-"""
-df_minus_gas = pd.read_sql_query(query_minus_gas, conexion)
-
-# Realiza la consulta SQL
-query_minus_oil = """
-SELECT
-    a.Well_Id,
-    AVG(a.BOPD) AS Average_BOPD,
-    b.UWI
-FROM
-    tablero_geohallitians.critical_variables_updated AS a
-INNER JOIN 
-    wells_master_updated AS b ON a.Well_Id = b.Well_Id
-GROUP BY
-    a.Well_Id, b.UWI;
-"""
-df_minus_oil = pd.read_sql_query(query_minus_oil, conexion)
-
-
-# Realiza la consulta SQL con filtrado por UWI
-query_production_bopd = """
-SELECT
-    a.Well_Id,
-    YEAR(Date) AS Año,
-    MONTH(Date) AS Mes,
-    SUM(a.BOPD) AS Suma_BOPD,
-    b.UWI
-FROM
-    tablero_geohallitians.critical_variables_updated AS a
-INNER JOIN 
-    wells_master_updated AS b ON a.Well_Id = b.Well_Id
-WHERE
-    b.UWI IN ('Well013', 'Well017', 'Well002', 'Well008', 'Well010')
-GROUP BY
-    a.Well_Id, b.UWI, Mes, Año;
-"""
-
-well_production_bopd = pd.read_sql_query(query_production_bopd, conexion)
-
 # ---------------------------------------------------------------------------------------------------------------------------------------------------
 # SECCION DE GRAFICAS Y TARJETAS
 # ---------------------------------------------------------------------------------------------------------------------------------------------------
 
+# Las tarjetas pesadas se envían como marcadores de posición (título + spinner) y cada una pide su contenido
+# con su propio callback: id de la tarjeta -> (tablas fuente, función que construye el contenido a partir del ConjuntoDatos)
+contenido_tarjetas = {}
+
+# Contenido ya construido de cada tarjeta por versión de sus datos (registro_figuras.py): las funciones de contenido_tarjetas
+# no modifican el ConjuntoDatos, así que una tarjeta se construye una vez por versión y se comparte entre navegadores y callbacks
+figuras = RegistroFiguras()
+
+# Tarjetas que no se vuelven a construir cuando cambian los filtros de la barra lateral: el mapa de calor describe las tablas
+# completas y no los pozos, y el mapa de pozos actualiza sus marcadores en su propio callback sin perder la vista actual
+tarjetas_sin_filtros = {'heatmap', 'wells-location'}
+
+# Tablas paginadas, ordenadas y filtradas en el servidor (tablas_paginadas.py): id de la tabla -> función que arma su DataFrame
+# ya formateado a partir del ConjuntoDatos. Al navegador solo viajan las filas de la página visible.
+tablas_servidor = {}
+
+FILAS_POR_PAGINA = 25
+
+def tabla_servidor(datos, id_tabla):
+    # Una TablaPaginada por tabla y por conjunto de datos: sus órdenes y filtros se reutilizan hasta el próximo refresco
+    return datos.derivado(('tabla', id_tabla), lambda: TablaPaginada(tablas_servidor[id_tabla](datos)))
+
+def datatable_paginada(datos, id_tabla, **propiedades):
+    # DataTable que pide al servidor cada página, orden y filtro; se envía ya con la primera página
+    data, page_count = tabla_servidor(datos, id_tabla).pagina(0, FILAS_POR_PAGINA)
+    return dash_table.DataTable(
+        id=id_tabla,
+        data=data,
+        page_current=0,
+        page_size=FILAS_POR_PAGINA,
+        page_count=page_count,
+        page_action='custom',
+        sort_action='custom',
+        sort_mode='single',
+        sort_by=[],
+        filter_action='custom',
+        filter_query='',
+        fixed_rows={'headers': True},
+        **propiedades,
+    )
+
 # Estilos comunes de las gráficas de dispersión
 common_style = {
     'display': 'inline-block',
@@ -313,12 +124,9 @@ common_style = {
     'color': 'white',
 }
 
-# Ordena el DataFrame por Average_Gas de manera ascendente y toma las primeras 5 filas
-df_minus_gas = df_minus_gas.sort_values(by='Average_Gas', ascending=True).head(5)
-
-def create_bar_chart(df_minus_gas):
-    # Ordena el DataFrame por Average_Gas de manera ascendente y toma las primeras 5 filas
-    df_minus_gas = df_minus_gas.sort_values(by='Average_Gas', ascending=True).head(5)
+def create_bar_chart(df_pozos):
+    # Toma los 5 pozos con menor Average_Gas
+    df_minus_gas = df_pozos.nsmallest(5, 'Average_Gas')
 
     # Crea el gráfico de barras invertidas con márgenes personalizados
     fig = go.Figure(data=[go.Bar(
@@ -347,31 +155,12 @@ def create_bar_chart(df_minus_gas):
 
 
 # Agrega el título de la tarjeta aquí
-top5minusgas_card = html.Div(
-    style={'height': '300px', 'textAlign': 'center', 'align-content': 'right', 'align-items': 'right', 'border-radius':'7px', 'box-shadow': '0px 0px 5px 2px rgba(255, 255, 255, 0.2)', 'backgroundColor': '#131313', 'margin-bottom': '30px'},
-    children=[
-        html.Div(
-            "Top 5 lowest gas production",
-            style={
-                'paddingTop': '10px',
-                'textAlign': 'center',
-                'align-content': 'center',
-                'color': 'white',
-                'borderBottom': '1px solid white',
-                'paddingBottom': '10px',
-                'fontWeight': 'bold',
-            },
-        ),
-        create_bar_chart(df_minus_gas)  # Llama a la función para crear el gráfico
-    ],
-)
+top5minusgas_card = generate_lazy_card('top5minusgas', "Top 5 lowest gas production", {'height': '300px', 'textAlign': 'center', 'align-content': 'right', 'align-items': 'right', 'border-radius':'7px', 'box-shadow': '0px 0px 5px 2px rgba(255, 255, 255, 0.2)', 'backgroundColor': '#131313', 'margin-bottom': '30px'})
+contenido_tarjetas['top5minusgas'] = ([POZOS, VOLUMETRICA], lambda datos: create_bar_chart(datos.df_pozos))
 
-# Ordena el DataFrame por Average_Gas de manera ascendente y toma las primeras 5 filas
-df_minus_oil = df_minus_oil.sort_values(by='Average_BOPD', ascending=True).head(5)
-
-def create_bar_oil(df_minus_oil):
-    # Ordena el DataFrame por Average_BOPD de manera ascendente y toma las primeras 5 filas
-    df_minus_oil = df_minus_oil.sort_values(by='Average_BOPD', ascending=True).head(5)
+def create_bar_oil(df_pozos):
+    # Toma los 5 pozos con menor Average_BOPD
+    df_minus_oil = df_pozos.nsmallest(5, 'Average_BOPD')
     
     # Crea el gráfico de barras invertidas con márgenes personalizados
     fig = go.Figure(data=[go.Bar(
@@ -400,206 +189,121 @@ def create_bar_oil(df_minus_oil):
 
 
 # Agrega el título de la tarjeta aquí
-top5minusoil_card = html.Div(
-    style={'height': '300px', 'textAlign': 'center', 'align-content': 'right', 'align-items': 'right', 'border-radius':'7px', 'box-shadow': '0px 0px 5px 2px rgba(255, 255, 255, 0.2)', 'backgroundColor': '#131313', 'margin-bottom': '30px'},
-    children=[
-        html.Div(
-            "Top 5 lowest oil production",
-            style={
-                'paddingTop': '10px',
-                'textAlign': 'center',
-                'align-content': 'center',
-                'color': 'white',
-                'borderBottom': '1px solid white',
-                'paddingBottom': '10px',
-                'fontWeight': 'bold',
-            },
-        ),
-        create_bar_oil(df_minus_oil)  # Llama a la función para crear el gráfico
-    ],
-)
-
-# Lista de nombres de tablas
-tablas = ["data_prueba_pozo_updated", "wells_master_updated", "data_diaria_volumetrica_updated", "critical_variables_updated"]
-
-def generate_heatmap(tables):
-    cursor = conexion.cursor()
-
-    resultado_final = pd.DataFrame(columns=["Tabla", "Columna", "Total nulos"])
-    data_traces = []  # Lista para almacenar objetos de datos (traces)
-
-    for tabla in tables:
-        # Obtiene la lista de columnas en la tabla
-        cursor.execute(f"DESCRIBE {tabla}")
-        columnas = [columna[0] for columna in cursor.fetchall()]
+top5minusoil_card = generate_lazy_card('top5minusoil', "Top 5 lowest oil production", {'height': '300px', 'textAlign': 'center', 'align-content': 'right', 'align-items': 'right', 'border-radius':'7px', 'box-shadow': '0px 0px 5px 2px rgba(255, 255, 255, 0.2)', 'backgroundColor': '#131313', 'margin-bottom': '30px'})
+contenido_tarjetas['top5minusoil'] = ([POZOS, CRITICAS], lambda datos: create_bar_oil(datos.df_pozos))
 
-        # Crea una consulta SQL dinámica para contar valores nulos en cada columna
-        consulta = "SELECT COUNT(*) AS TotalRegistros, " + ", ".join([
-            f"SUM(CASE WHEN `{col}` IS NULL THEN 1 ELSE 0 END) AS `{col}_Nulos`"
-            for col in columnas
-        ]) + f" FROM {tabla}"
+def generate_heatmap(tables, datos):
+    # Perfiles de nulos de todas las tablas, ya cargados en paralelo al iniciar: se unen y se pivotean una sola vez
+    resultado_final = pd.concat([datos[f'nulos_{tabla}'] for tabla in tables], ignore_index=True)
 
-        # Ejecuta la consulta
-        cursor.execute(consulta)
+    # Modificar nombres de columnas (eliminar "_updated")
+    resultado_final["Columna"] = resultado_final["Columna"].str.replace("_updated", "")
 
-        # Obtiene los resultados
-        resultado = cursor.fetchone()
+    pivote = resultado_final.pivot_table(index="Tabla", columns="Columna", values=["Total nulos", "Nulos_Min", "Nulos_Max"], aggfunc="sum")
+    total_nulos = pivote["Total nulos"]
 
-        # Crear un DataFrame a partir de los resultados
-        data = []
-        for col, value in zip(columnas, resultado[1:]):
-            total_vacios = value
-            data.append([tabla, col, int(total_vacios)])
+    # Rango del intervalo de confianza en el tooltip (mínimo = máximo cuando el conteo es exacto)
+    rangos = pivote["Nulos_Min"].astype("Int64").astype(str) + " – " + pivote["Nulos_Max"].astype("Int64").astype(str)
 
-        df = pd.DataFrame(data, columns=["Tabla", "Columna", "Total nulos"])
+    return [go.Heatmap(
+        z=total_nulos.values,
+        x=total_nulos.columns.tolist(),
+        y=total_nulos.index.tolist(),
+        customdata=rangos.values,
+        coloraxis='coloraxis',
+        hovertemplate='Tabla: %{y}<br>Columna: %{x}<br>Total nulos: %{z}<br>IC 95 %: %{customdata}<extra></extra>',
+    )]
 
-        # Agregar los resultados al DataFrame final
-        resultado_final = pd.concat([resultado_final, df], ignore_index=True)
+def tabla_perfiles(perfiles):
+    # Perfil aproximado de cada columna (perfiles_columnas.py): valores distintos, rango y cuantiles, para vigilar los sensores
+    tabla = perfiles.assign(Tabla=perfiles['Tabla'].str.replace('_updated', ''))
+    for columna in ['Minimo', 'P01', 'P50', 'P99', 'Maximo']:
+        tabla[columna] = [round(valor, 2) if isinstance(valor, float) else ('' if valor is None else str(valor)) for valor in tabla[columna]]
 
-        # Convertir la columna "Total nulos" a tipo numérico
-        resultado_final["Total nulos"] = pd.to_numeric(resultado_final["Total nulos"])
-
-        # Modificar nombres de columnas (eliminar "_updated")
-        resultado_final["Columna"] = resultado_final["Columna"].str.replace("_updated", "")
-
-        # Crear un mapa de calor con paleta cálida (YlOrRd) usando Plotly Express
-        fig = px.imshow(resultado_final.pivot_table(index="Tabla", columns="Columna", values="Total nulos", aggfunc="sum"),
-                        labels=dict(x="Columnas", y="Tablas", color="Total nulos"), color_continuous_scale="YlOrRd")
-        
-        # Agregar el objeto de datos (trace) a la lista
-        data_traces.append(fig['data'][0])
-        
-    return data_traces  # Devolver la lista de objetos de datos (traces)
+    return dash_table.DataTable(
+        id='tabla_perfiles',
+        columns=[
+            {"name": "Table", "id": "Tabla"},
+            {"name": "Column", "id": "Columna"},
+            {"name": "Rows", "id": "Filas"},
+            {"name": "Nulls", "id": "Nulos"},
+            {"name": "Distinct (~)", "id": "Distintos"},
+            {"name": "Min", "id": "Minimo"},
+            {"name": "P1 (~)", "id": "P01"},
+            {"name": "Median (~)", "id": "P50"},
+            {"name": "P99 (~)", "id": "P99"},
+            {"name": "Max", "id": "Maximo"},
+        ],
+        data=tabla.to_dict('records'),
+        sort_action='native',
+        style_table={'width': '1250px', 'maxHeight': '300px', 'overflowY': 'auto'},
+        style_header={'textAlign': 'center', 'backgroundColor': '#131313', 'color': 'white'},
+        style_cell={'textAlign': 'left', 'backgroundColor': 'black', 'color': 'white', 'fontSize': 11},
+    )
 
 # Agrega el título de la tarjeta aquí
-heatmap_card = html.Div(
-    style={'height': '100%', 'width': '100%', 'textAlign': 'center', 'align-content': 'right', 'align-items': 'right', 'border-radius':'7px', 'box-shadow': '0px 0px 5px 2px rgba(255, 255, 255, 0.2)', 'backgroundColor': '#131313', 'margin-bottom': '30px'},
-    children=[
-        html.Div(
-            "Missing Values",
-            style={
-                'paddingTop': '10px',
-                'textAlign': 'center',
-                'align-content': 'center',
-                'color': 'white',
-                'borderBottom': '1px solid white',
-                'paddingBottom': '10px',
-                'fontWeight': 'bold',
-            },
-        ),
-        dcc.Graph(
-            id='heatmap-graph',
-            figure={
-                'data': generate_heatmap(tablas),  # Llama a tu función para generar el heatmap
-                'layout': go.Layout(
-                    plot_bgcolor='black',  # Cambia el fondo del gráfico a negro
-                    paper_bgcolor='black',  # Cambia el fondo del área de papel a negro
-                    margin={'t': 30, 'l': 100, 'r': 50, 'b': 70},
-                    coloraxis_colorbar=dict(title='Total Nulls', title_font=dict(color='white')),  # Color del texto de la leyenda
-                    xaxis=dict(tickangle=45, tickfont=dict(size=9)),
-                    yaxis=dict(tickangle=45, tickfont=dict(size=8))
-                ),
-            },
-            style={'height': '400px', 'width': '1250px'}  # Define el alto y ancho deseados para la gráfica
-        )
-    ],
-)
-
-
-# Unir los dataframes en función del campo "Well_Id"
-merged_df = df_bopd.merge(df_prom, on='Well_Id', how='inner')
-
-# Calcular el umbral del 10% del valor PROMEDIO_BOPD
-merged_df['Umbral'] = 0.10 * merged_df['Average_BOPD']
-
-# Filtrar los valores de BOPD que son menores que el umbral
-filtered_df = merged_df[merged_df['BOPD'] < merged_df['Umbral']]
+heatmap_card = generate_lazy_card('heatmap', "Missing Values", {'height': '100%', 'width': '100%', 'textAlign': 'center', 'align-content': 'right', 'align-items': 'right', 'border-radius':'7px', 'box-shadow': '0px 0px 5px 2px rgba(255, 255, 255, 0.2)', 'backgroundColor': '#131313', 'margin-bottom': '30px'})
+contenido_tarjetas['heatmap'] = (tablas, lambda datos: html.Div([
+    dcc.Graph(
+        id='heatmap-graph',
+        figure={
+            'data': generate_heatmap(tablas, datos.datos),  # Llama a tu función para generar el heatmap
+            'layout': go.Layout(
+                plot_bgcolor='black',  # Cambia el fondo del gráfico a negro
+                paper_bgcolor='black',  # Cambia el fondo del área de papel a negro
+                margin={'t': 30, 'l': 100, 'r': 50, 'b': 70},
+                coloraxis=dict(colorscale='YlOrRd', colorbar=dict(title='Total Nulls', title_font=dict(color='white'))),  # Paleta cálida y color del texto de la leyenda
+                xaxis=dict(tickangle=45, tickfont=dict(size=9)),
+                yaxis=dict(tickangle=45, tickfont=dict(size=8))
+            ),
+        },
+        style={'height': '400px', 'width': '1250px'}  # Define el alto y ancho deseados para la gráfica
+    ),
+    tabla_perfiles(datos.datos['perfiles_columnas']),
+]))
 
-# Estilo para la tabla
-table_style = {
-    'width': '240px',
-    'border-collapse': 'collapse',
-}
 
-# Estilo para las celdas de la tabla, incluyendo el tamaño de fuente
-cell_style = {
-    'padding': '4px',
-    'text-align': 'left',
-    'color': 'white',
-    'font-size': '9px',  # Tamaño de fuente deseado, puedes ajustarlo según tus preferencias
-    'height': 'auto',  # Altura automática basada en el contenido
-}
+def frame_critical(filtered_df):
+    # Filtra el DataFrame para incluir solo las columnas deseadas y en el orden deseado
+    filtered_df_subset = filtered_df[['UWI', 'Valor', 'Referencia', 'Desde', 'Day', 'Descripcion']].rename(columns={
+        'Valor': 'Value',
+        'Referencia': 'Reference',
+        'Desde': 'Since',
+        'Descripcion': 'Type',
+    })
+
+    # Redondear el valor y la referencia a 2 decimales (vacío si la regla no tiene referencia) y mostrar solo la fecha
+    for col in ['Value', 'Reference']:
+        filtered_df_subset[col] = filtered_df_subset[col].astype(float).round(2).astype(object).where(filtered_df_subset[col].notna(), '')
+    for col in ['Since', 'Day']:
+        filtered_df_subset[col] = pd.to_datetime(filtered_df_subset[col]).dt.strftime('%Y-%m-%d')
 
-# Estilo para las celdas de encabezado de la tabla, incluyendo el tamaño de fuente
-header_cell_style = {
-    'padding': '2px',
-    'text-align': 'left',
-    'color': 'black',
-    'font-size': '9px',  # Tamaño de fuente deseado para las celdas de encabezado
-}
+    # Ordena el DataFrame por la columna "Day" de mayor a menor
+    return filtered_df_subset.sort_values(by='Day', ascending=False)
 
-# Estilo para el contenedor de la tabla
-table_container_style = {
-    'overflowY': 'auto',  # Agrega scroll vertical si es necesario
-    'maxHeight': '270px',  # Establece la altura máxima de la tabla
-    'margin': '0px',  # Margen cero
-}
+tablas_servidor['tabla_critical'] = lambda datos: frame_critical(datos.filtered_df)
 
 # Definir el diseño de la tabla en la función tabla_critical
-def tabla_critical():
-    # Filtra el DataFrame para incluir solo las columnas deseadas y en el orden deseado
-    filtered_df_subset = filtered_df[['UWI', 'BOPD', 'Average_BOPD', 'Day']]
-    
-    # Redondear la columna "Average BOPD" a 2 decimales
-    filtered_df_subset['Average_BOPD'] = filtered_df_subset['Average_BOPD'].round(2)
-    
-    # Ordena el DataFrame por la columna "Day" de mayor a menor
-    filtered_df_subset = filtered_df_subset.sort_values(by='Day', ascending=False)
-    
-    # Agrega una nueva columna "Type" con el valor "bopd production less than 10% average"
-    filtered_df_subset['Type'] = "bopd production less than 10% average"
-    
-    return html.Div(
-        style=table_container_style,  # Aplicar estilo al contenedor de la tabla
-        children=[
-            html.Table(
-                # Encabezados de la tabla
-                [html.Tr([html.Th(col, style=header_cell_style) for col in filtered_df_subset.columns])],
-                style=table_style,
-            )] +
-            # Filas de datos
-            [html.Table(
-                # Celdas de datos con estilo de fuente
-                [html.Tr([html.Td(filtered_df_subset.iloc[i][col], style=cell_style) for col in filtered_df_subset.columns])],
-                style=table_style,
-            ) for i in range(len(filtered_df_subset))]
+def tabla_critical(datos):
+    return datatable_paginada(
+        datos,
+        'tabla_critical',
+        columns=[{'name': col, 'id': col} for col in ['UWI', 'Value', 'Reference', 'Since', 'Day', 'Type']],
+        style_table={'maxHeight': '270px', 'overflowY': 'auto'},  # Agrega scroll vertical si es necesario
+        style_header={'textAlign': 'left', 'backgroundColor': 'transparent', 'color': 'black', 'fontSize': '9px', 'padding': '2px'},
+        style_filter={'backgroundColor': 'transparent', 'color': 'white', 'fontSize': '9px'},
+        style_cell={'textAlign': 'left', 'backgroundColor': 'transparent', 'color': 'white', 'fontSize': '9px', 'padding': '4px', 'height': 'auto'},
     )
 
 # Agrega el título de la tarjeta aquí
-alertas_card = html.Div(
-    style={'height': '300px', 'textAlign': 'center', 'align-content': 'right', 'align-items': 'right', 'border-radius':'7px', 'box-shadow': '0px 0px 5px 2px rgba(255, 255, 255, 0.2)', 'backgroundColor': 'rgba(255, 0, 0, 0.4)', 'margin-bottom': '30px'},
-    children=[
-        html.Div(
-            "Critical Alerts",
-            style={
-                'paddingTop': '10px',
-                'textAlign': 'center',
-                'align-content': 'center',
-                'color': 'white',
-                'borderBottom': '1px solid white',
-                'paddingBottom': '10px',
-                'fontWeight': 'bold',
-            },
-        ),
-        tabla_critical()
-    ],
-)
+alertas_card = generate_lazy_card('alertas', "Critical Alerts", {'height': '300px', 'textAlign': 'center', 'align-content': 'right', 'align-items': 'right', 'border-radius':'7px', 'box-shadow': '0px 0px 5px 2px rgba(255, 255, 255, 0.2)', 'backgroundColor': 'rgba(255, 0, 0, 0.4)', 'margin-bottom': '30px'})
+contenido_tarjetas['alertas'] = ([POZOS, CRITICAS], tabla_critical)
 
 
-# Calcular el promedio de "Average_Hours_Per_Day"
-average_hours_per_day = df_hours['Average_Hours_Per_Day'].mean()
+def hours(df_pozos):
+    # Calcular el promedio de "Average_Hours_Per_Day"
+    average_hours_per_day = df_pozos['Average_Hours_Per_Day'].mean()
 
-def hours():
     # Crear la figura del velocímetro
     figure = {
         'data': [
@@ -610,12 +314,12 @@ def hours():
                 title={'text': "Average Hours Per Day", 'font': {'color': 'white'}},  # Estilo para el título
                 gauge={
                     'axis': {
-                        'range': [None, max(df_hours['Average_Hours_Per_Day'])],  # Cambio aquí
+                        'range': [None, df_pozos['Average_Hours_Per_Day'].max()],  # Cambio aquí
                         'tickvals': [0, 5, 10, 15, 20],
                         'tickfont': {'color': 'white'}
                     },
                     'steps': [
-                        {'range': [0, max(df_hours['Average_Hours_Per_Day'])], 'color': "white"},  # Cambio aquí
+                        {'range': [0, df_pozos['Average_Hours_Per_Day'].max()], 'color': "white"},  # Cambio aquí
                         {'range': [0, average_hours_per_day], 'color': "green"}
                     ],
                 },
@@ -633,88 +337,32 @@ def hours():
 
 
 # Agrega el título de la tarjeta aquí
-hours_card = html.Div(
-    style={'height': '150px', 'textAlign': 'center', 'align-content': 'right', 'align-items': 'right', 'border-radius':'7px', 'box-shadow': '0px 0px 5px 2px rgba(255, 255, 255, 0.2)', 'backgroundColor': '#131313', 'margin-bottom': '30px'},
-    children=[
-        html.Div(
-            "Average Hours/Day",
-            style={
-                'paddingTop': '10px',
-                'textAlign': 'center',
-                'align-content': 'center',
-                'color': 'white',
-                'borderBottom': '1px solid white',
-                'paddingBottom': '10px',
-                'fontWeight': 'bold',
-            },
-        ),
-        hours(),
-    ],
-)
-
-def tabla_runlife():
-
-    # Identificar los índices donde Maximo_Antes_de_1_0 es 2.0 (inicio de un nuevo ciclo)
-    new_cycle_indices = df_runlife[df_runlife['Maximo_Antes_de_1_0'] == 2.0].index
-
-    # Crear un array con los valores de ciclo actual
-    cycle_values = np.zeros(len(df_runlife))
-
-    current_cycle = 1  # Inicializar el contador de ciclos
-
-    # Modificar los valores de ciclo para que comiencen un nuevo ciclo
-    for index in new_cycle_indices:
-        cycle_values[index:] = current_cycle
-        current_cycle += 1  # Incrementar el contador de ciclos
-
-    # Agregar la columna 'Cycle' al DataFrame
-    df_runlife['Cycle'] = cycle_values
-
-    # Calcular los máximos valores por ciclo para cada pozo
-    max_values_by_cycle = df_runlife.groupby(['Well_Id', 'Cycle'])['Maximo_Antes_de_1_0'].max()
-
-    # Crear un DataFrame con los máximos valores por ciclo
-    max_values_df = max_values_by_cycle.reset_index()
-
-    # Agregar la columna 'Date' al DataFrame max_values_df
-    max_values_df['Date'] = df_runlife.groupby(['Well_Id', 'Cycle'])['Date'].max().values
-
-    # Agregar la columna 'Date' al DataFrame max_values_df y formatearla en el formato "año-mes-día"
-    max_values_df['Date'] = pd.to_datetime(max_values_df['Date']).apply(lambda x: x.strftime('%Y-%m-%d'))
-
-    # Obtener las columnas 'UWI' y 'Sistema_Levantamiento' correspondientes al valor máximo de 'Maximo_Antes_de_1_0' en cada ciclo
-    uwis_sistema_levantamiento = df_runlife[df_runlife.groupby(['Well_Id', 'Cycle'])['Maximo_Antes_de_1_0'].transform('max') == df_runlife['Maximo_Antes_de_1_0']][['Well_Id', 'Cycle', 'UWI', 'Sistema_Levantamiento']]
-
-    # Fusionar los DataFrames para agregar 'UWI' y 'Sistema_Levantamiento' a max_values_df
-    max_values_df = max_values_df.merge(uwis_sistema_levantamiento, on=['Well_Id', 'Cycle'])
-
-    # Eliminar la columna 'Cycle'
-    max_values_df = max_values_df.drop(columns=['Cycle'])
-
-    # Cambiar el nombre de la columna 'Maximo_Antes_de_1_0' a 'Run Life'
-    max_values_df = max_values_df.rename(columns={'Maximo_Antes_de_1_0': 'Run Life'})
-
-    # Agregar la columna 'Cycle' con valores incrementales por 'Well_Id'
-    max_values_df['Cycle'] = max_values_df.groupby('Well_Id').cumcount() + 1
-
-    # Cambiar el nombre de la columna 'Sistema_Levantamiento' a 'Lift_System'
-    max_values_df = max_values_df.rename(columns={'Sistema_Levantamiento': 'Lift System'})
-
-    # Trasladar la columna 'UWI' a la primera columna
-    max_values_df = max_values_df[['UWI'] + [col for col in max_values_df.columns if col != 'UWI']]
-
-    # Eliminar la columna 'Well_Id'
-    max_values_df = max_values_df.drop(columns=['Well_Id'])
-
+hours_card = generate_lazy_card('hours', "Average Hours/Day", {'height': '150px', 'textAlign': 'center', 'align-content': 'right', 'align-items': 'right', 'border-radius':'7px', 'box-shadow': '0px 0px 5px 2px rgba(255, 255, 255, 0.2)', 'backgroundColor': '#131313', 'margin-bottom': '30px'})
+contenido_tarjetas['hours'] = ([POZOS, VOLUMETRICA], lambda datos: hours(datos.df_pozos))
+
+def frame_runlife(df_runlife):
+    # Los ciclos ya vienen detectados y resumidos por pozo (ciclos_runlife.py): aquí solo se les da formato
+    return pd.DataFrame({
+        'UWI': df_runlife['UWI'],
+        'Run Life': df_runlife['Run_Life'],
+        'Date': pd.to_datetime(df_runlife['Fin']).dt.strftime('%Y-%m-%d'),
+        'Lift System': df_runlife['Sistema_Levantamiento'],
+        # Número de ciclo dentro de cada pozo, empezando en 1
+        'Cycle': df_runlife.groupby('Well_Id').cumcount() + 1,
+    })
+
+tablas_servidor['tabla_runlife'] = lambda datos: frame_runlife(datos.df_runlife)
+
+def tabla_runlife(datos):
     valores_verdes = [1426, 413, 343, 167, 496, 573, 868]
 
     # Crea la tabla de Dash
-    table = dash_table.DataTable(
-        id='tabla_runlife',
+    table = datatable_paginada(
+        datos,
+        'tabla_runlife',
         columns=[
-            {'name': col, 'id': col} for col in max_values_df.columns
+            {'name': col, 'id': col} for col in ['UWI', 'Run Life', 'Date', 'Lift System', 'Cycle']
         ],
-        data=max_values_df.to_dict('records'),
         style_table={'width': '400px', 'maxHeight': '300px', 'overflowY': 'auto'},
         style_header={
             'textAlign': 'center'  # Centrar los encabezados de las columnas
@@ -742,17 +390,19 @@ def tabla_runlife():
 
     return table
 
-def tabla_runstatus():
+tablas_servidor['tabla_runstatus'] = lambda datos: datos.df_runstatus[['UWI', 'Run_Status', 'Date', 'Sistema_Levantamiento']]
+
+def tabla_runstatus(datos):
     # Crear la tabla Dash y devolverla como un componente
-    return dash_table.DataTable(
-        id='table',
+    return datatable_paginada(
+        datos,
+        'tabla_runstatus',
         columns=[
             {"name": "UWI", "id": "UWI"},
             {"name": "Run Status", "id": "Run_Status"},
             {"name": "Date", "id": "Date"},
             {"name": "Lift System", "id": "Sistema_Levantamiento"},
         ],
-        data=df_runstatus.to_dict('records'),
         style_table={'width': '400px', 'maxHeight': '300px', 'overflowY': 'auto'},
         style_header={
             'textAlign': 'center'  # Centrar los encabezados de las columnas
@@ -786,9 +436,13 @@ def tabla_runstatus():
         ]
     )
 
-def tabla_pruebas(df_pruebas):
-    return dash_table.DataTable(
-        id='table-pruebas',
+# Última prueba de cada pozo, con la fecha sin hora
+tablas_servidor['table-pruebas'] = lambda datos: datos.df_pruebas.assign(Test_Date=pd.to_datetime(datos.df_pruebas['Test_Date']).dt.strftime('%Y-%m-%d'))
+
+def tabla_pruebas(datos):
+    return datatable_paginada(
+        datos,
+        'table-pruebas',
         columns=[
             {"name": "UWI", "id": "UWI"},
             {"name": "Date", "id": "Test_Date"},
@@ -799,7 +453,6 @@ def tabla_pruebas(df_pruebas):
             {"name": "BSW_P", "id": "BSW_P"},
             {"name": "Lift System", "id": "Sistema_Levantamiento"},
         ],
-        data=df_pruebas.to_dict('records'),
         style_table={'width': '400px', 'maxHeight': '300px', 'overflowY': 'auto', 'backgroundColor': 'black'},
         style_header={'textAlign': 'center'},
         style_cell={'textAlign': 'left', 'backgroundColor': 'black', 'color': 'white'},
@@ -858,66 +511,78 @@ colors_UWIS = {
 }
 
 # Agrega el título de la tarjeta aquí
-efficiency_card = html.Div(
-    style={'height': '350px', 'width': '100%', 'textAlign': 'center', 'border-radius': '10px', 'backgroundColor': '#131313'},
-    children=[
-        html.Div(
-            "Operational efficiency",
-            style={
-                'paddingTop': '10px',
-                'textAlign': 'center',
-                'align-content': 'center',
-                'color': 'white',
-                'borderBottom': '1px solid white',
-                'paddingBottom': '10px',
-                'fontWeight': 'bold',
-            },
+efficiency_card = generate_lazy_card('efficiency', "Operational efficiency", {'height': '350px', 'width': '100%', 'textAlign': 'center', 'border-radius': '10px', 'backgroundColor': '#131313'})
+contenido_tarjetas['efficiency'] = ([POZOS, CRITICAS], tabla_runlife)
+
+colors_sistemas = {
+    'BES': '#0099FF',
+    'BME': '#FF6633',
+    'GAS LIFT': '#33FFCC',
+    'PCP': '#CC66FF',
+}
+
+def confiabilidad_graph(resumen, curvas):
+    # Curvas de Kaplan-Meier en escalones, empezando en supervivencia 1 el día 0, y el MTBF de cada sistema en la leyenda
+    mtbf = resumen.set_index('Sistema_Levantamiento')['MTBF']
+    data = []
+    for sistema, curva in curvas.groupby('Sistema_Levantamiento'):
+        data.append(go.Scatter(
+            x=[0] + curva['Dias'].tolist(),
+            y=[1.0] + curva['Supervivencia'].tolist(),
+            mode='lines',
+            line=dict(shape='hv', color=colors_sistemas.get(sistema, 'white')),
+            name=f"{sistema} (MTBF {mtbf[sistema]:.0f} d)" if pd.notna(mtbf[sistema]) else f"{sistema} (sin fallas)",
+        ))
+
+    figure = go.Figure(data=data, layout=go.Layout(
+        xaxis={'title': 'Run Life (days)', 'color': 'white', 'titlefont': {'color': 'white', 'size': 12}, 'tickfont': {'color': 'white', 'size': 10}},
+        yaxis={'title': 'Survival', 'range': [0, 1.05], 'color': 'white', 'titlefont': {'color': 'white', 'size': 12}, 'tickfont': {'color': 'white', 'size': 10}},
+        legend={'font': {'color': 'white', 'size': 10}},
+        hovermode='closest',
+        plot_bgcolor='#000000',
+        paper_bgcolor='#000000',
+        margin=dict(l=50, r=0, b=50, t=30),
+        height=230,
+        width=450,
+    ))
+
+    tabla = resumen.assign(
+        MTBF=resumen['MTBF'].round(0),
+        Fallas_por_Año=resumen['Fallas_por_Año'].round(2),
+    )[['Sistema_Levantamiento', 'Ciclos', 'Fallas', 'Censurados', 'MTBF', 'Fallas_por_Año']]
+
+    return html.Div([
+        dcc.Graph(id='confiabilidad-graph', config={'displayModeBar': False}, figure=figure),
+        dash_table.DataTable(
+            id='tabla_confiabilidad',
+            columns=[
+                {"name": "Lift System", "id": "Sistema_Levantamiento"},
+                {"name": "Cycles", "id": "Ciclos"},
+                {"name": "Failures", "id": "Fallas"},
+                {"name": "Running", "id": "Censurados"},
+                {"name": "MTBF (days)", "id": "MTBF"},
+                {"name": "Failures/year", "id": "Fallas_por_Año"},
+            ],
+            data=tabla.to_dict('records'),
+            style_header={'textAlign': 'center', 'backgroundColor': '#131313', 'color': 'white'},
+            style_cell={'textAlign': 'left', 'backgroundColor': 'black', 'color': 'white', 'fontSize': 11},
         ),
-        tabla_runlife(),
-    ],
-)
+    ])
 
 # Agrega el título de la tarjeta aquí
-runstatus_card = html.Div(
-    style={'height': '350px', 'width': '100%', 'textAlign': 'center', 'border-radius': '10px', 'backgroundColor': '#131313'},
-    children=[
-        html.Div(
-            "Run Status updated",
-            style={
-                'paddingTop': '10px',
-                'textAlign': 'center',
-                'align-content': 'center',
-                'color': 'white',
-                'borderBottom': '1px solid white',
-                'paddingBottom': '10px',
-                'fontWeight': 'bold',
-            },
-        ),
-        tabla_runstatus()
-    ],
-)
+confiabilidad_card = generate_lazy_card('confiabilidad', "Run Life reliability", {'height': '350px', 'width': '100%', 'textAlign': 'center', 'border-radius': '10px', 'backgroundColor': '#131313'})
+contenido_tarjetas['confiabilidad'] = ([POZOS, CRITICAS], lambda datos: confiabilidad_graph(datos.confiabilidad, datos.curvas_supervivencia))
 
 # Agrega el título de la tarjeta aquí
-Pruebas_card = html.Div(
-    style={'height': '350px', 'width': '100%', 'textAlign': 'center', 'border-radius': '10px', 'backgroundColor': '#131313'},
-    children=[
-        html.Div(
-            "Latest tests",
-            style={
-                'paddingTop': '10px',
-                'textAlign': 'center',
-                'align-content': 'center',
-                'color': 'white',
-                'borderBottom': '1px solid white',
-                'paddingBottom': '10px',
-                'fontWeight': 'bold',
-            },
-        ),
-        tabla_pruebas(df_pruebas)
-    ],
-)
+runstatus_card = generate_lazy_card('runstatus', "Run Status updated", {'height': '350px', 'width': '100%', 'textAlign': 'center', 'border-radius': '10px', 'backgroundColor': '#131313'})
+contenido_tarjetas['runstatus'] = ([POZOS, CRITICAS], tabla_runstatus)
+
+# Agrega el título de la tarjeta aquí
+Pruebas_card = generate_lazy_card('pruebas', "Latest tests", {'height': '350px', 'width': '100%', 'textAlign': 'center', 'border-radius': '10px', 'backgroundColor': '#131313'})
+contenido_tarjetas['pruebas'] = ([POZOS, PRUEBAS], tabla_pruebas)
 
-def formatar_mes_año(mes, año):
+def formatar_mes_año(meses, años):
+    # Etiquetas 'Mmm/aaaa' de las columnas Mes y Año (Series), calculadas de una vez para todas las filas
     meses_abreviados = {
         1: 'Jan',
         2: 'Feb',
@@ -932,20 +597,20 @@ def formatar_mes_año(mes, año):
         11: 'Nov',
         12: 'Dec'
     }
-    return f"{meses_abreviados.get(mes, 'N/A')}/{año}"
+    return meses.map(meses_abreviados).fillna('N/A') + '/' + años.astype(str)
 
 
 def graficar_tendencia_oil_quality(df):
-    # Ordena el DataFrame por la columna 'Mes' antes de la agrupación
-    df = df.sort_values(by='Mes')
+    # Ordena el DataFrame por la columna 'Mes' antes de la agrupación y agrega la etiqueta del eje X.
+    # sort_values y assign devuelven un DataFrame nuevo: el recibido es del ConjuntoDatos y no se modifica.
+    df = df.sort_values(by='Mes').assign(Etiqueta_Mes=lambda d: formatar_mes_año(d['Mes'], d['Año']))
 
     # Crear una figura de tendencia utilizando Plotly
     fig = go.Figure()
     
     for pozo_id, data in df.groupby('UWI'):
-        data['Mes'] = data.apply(lambda row: formatar_mes_año(row['Mes'], row['Año']), axis=1)  # Formatea el eje X
         figura_pozo = go.Scatter(
-            x=data['Mes'],
+            x=data['Etiqueta_Mes'],
             y=data['PROMEDIO_OIL_QUALITY'],
             mode='lines+markers',
             name=pozo_id,
@@ -978,42 +643,26 @@ def graficar_tendencia_oil_quality(df):
         config={'displayModeBar': True},  # Configura displayModeBar aquí
     )
 
-# Suponiendo que ya tienes tu DataFrame df_query_var_3
-grafica_oil_quality = graficar_tendencia_oil_quality(df_query_var_3)
-    
-
 # Agrega el título de la tarjeta aquí
-API_card = html.Div(
-    style={'height': '350px', 'width': '100%', 'textAlign': 'center', 'border-radius': '10px', 'backgroundColor': '#131313'},
-    children=[
-        html.Div(
-            "API",
-            style={
-                'paddingTop': '10px',
-                'textAlign': 'center',
-                'align-content': 'center',
-                'color': 'white',
-                'borderBottom': '1px solid white',
-                'paddingBottom': '10px',
-                'fontWeight': 'bold',
-            },
-        ),
-        graficar_tendencia_oil_quality(df_query_var_3),  # Inserta el mapa directamente después del título
-    ],
-)
+API_card = generate_lazy_card('api', "API", {'height': '350px', 'width': '100%', 'textAlign': 'center', 'border-radius': '10px', 'backgroundColor': '#131313'})
+contenido_tarjetas['api'] = ([POZOS, VOLUMETRICA], lambda datos: graficar_tendencia_oil_quality(datos.df_query_var_3))
 
 # Profundidad de pozos
 
-def trajectory_wells(df_map):
-    wellhead_depth = df_map['Wellhead_depth']
-    water_depth = df_map['Water_depth']
-    geo_longitude = df_map['Geo_longitude']
-    geo_latitude = df_map['Geo_latitude']
-    uwi_list = df_map['UWI']
-    wellhead_depth_invertido = [-depth for depth in wellhead_depth]
-    water_depth_invertido = [-depth for depth in water_depth]
-
-    fig = go.Figure()
+def trazos_por_pozo(inicio, pozos, valores):
+    # Las líneas de todos los pozos en un solo arreglo: [inicio, valores del pozo..., NaN] por pozo; el NaN corta la línea
+    # entre un pozo y el siguiente. 'pozos' es la posición en 'inicio' del pozo de cada valor, con los valores agrupados por pozo.
+    conteos = np.bincount(pozos, minlength=len(inicio))
+    comienzos = np.cumsum(conteos + 2) - (conteos + 2)
+    salida = np.full(len(valores) + 2 * len(inicio), np.nan)
+    salida[comienzos] = inicio
+    salida[comienzos[pozos] + 1 + np.arange(len(valores)) - (np.cumsum(conteos) - conteos)[pozos]] = valores
+    return salida
+
+def trajectory_wells(df_map, trayectorias):
+    geo_longitude = df_map['Geo_longitude'].to_numpy(dtype=float)
+    geo_latitude = df_map['Geo_latitude'].to_numpy(dtype=float)
+    uwi_list = df_map['UWI'].to_numpy(dtype=object)
 
     colors_UWIS = {
         'Well001': 'rgba(67, 160, 71, 0.6)',
@@ -1034,52 +683,76 @@ def trajectory_wells(df_map):
         'Well018': 'rgba(97, 97, 97, 0.6)',
         'Well019': 'rgba(141, 110, 99, 0.6)'
     }
-
-    for i in range(len(wellhead_depth)):
-        fig.add_trace(go.Scatter3d(
-            x=[geo_longitude[i]],
-            y=[geo_latitude[i]],
-            z=[0],
-            mode='markers+text',
+    # Color de cada pozo como arreglo, un valor por punto
+    colores = df_map['UWI'].map(colors_UWIS).fillna('rgba(0, 0, 0, 0.6)').to_numpy(dtype=object)
+    ceros = np.zeros(len(df_map))
+    todos = np.arange(len(df_map))
+
+    # Profundidad del pozo: la trayectoria de su survey (trayectorias.py) o, si no tiene survey, una línea vertical hasta Wellhead_depth
+    posicion = pd.Index(df_map['Well_Id']).get_indexer(trayectorias['Well_Id'])
+    survey = trayectorias[posicion >= 0]
+    sin_survey = np.setdiff1d(todos, posicion)
+    pozos_puntos = np.r_[posicion[posicion >= 0], sin_survey]
+    orden = np.argsort(pozos_puntos, kind='stable')  # agrupa por pozo sin cambiar el orden por MD de cada survey
+    pozos_puntos = pozos_puntos[orden]
+    norte = np.r_[survey['Norte'].to_numpy(dtype=float), np.zeros(len(sin_survey))][orden]
+    este = np.r_[survey['Este'].to_numpy(dtype=float), np.zeros(len(sin_survey))][orden]
+    tvd = np.r_[survey['TVD'].to_numpy(dtype=float), df_map['Wellhead_depth'].to_numpy(dtype=float)[sin_survey]][orden]
+
+    # Desplazamientos en pies -> grados alrededor de la cabeza de cada pozo
+    x_pozo = trazos_por_pozo(geo_longitude, pozos_puntos, geo_longitude[pozos_puntos] + este / (PIES_POR_GRADO * np.cos(np.radians(geo_latitude[pozos_puntos]))))
+    y_pozo = trazos_por_pozo(geo_latitude, pozos_puntos, geo_latitude[pozos_puntos] + norte / PIES_POR_GRADO)
+    # Pozo de cada punto de la línea (los NaN de corte toman el primer pozo, no se dibujan)
+    pozo_de_punto = np.nan_to_num(trazos_por_pozo(todos, pozos_puntos, pozos_puntos)).astype(int)
+
+    # Tres trazos para todos los pozos (cabezas, profundidad del agua y profundidad del pozo), sin importar cuántos pozos haya
+    x_agua = trazos_por_pozo(geo_longitude, todos, geo_longitude)
+    y_agua = trazos_por_pozo(geo_latitude, todos, geo_latitude)
+
+    fig = go.Figure([
+        go.Scatter3d(
+            x=geo_longitude,
+            y=geo_latitude,
+            z=ceros,
+            mode='markers',
             marker=dict(
                 size=5,
-                color=colors_UWIS.get(uwi_list[i], 'rgba(0, 0, 0, 0.6)'),
+                color=colores,
                 opacity=1
             ),
-            textposition='bottom center',
-            showlegend=True,
-            name=uwi_list[i]
-        ))
-
-    # Después de agregar los trazos de la profundidad del pozo, agrega los trazos de profundidad del agua
-    for i in range(len(wellhead_depth)):    
+            text=uwi_list,
+            hovertemplate='%{text}<extra></extra>',
+            name='Wellhead',
+        ),
         # Trazo para la profundidad del agua (azul)
-        fig.add_trace(go.Scatter3d(
-            x=[geo_longitude[i], geo_longitude[i]],
-            y=[geo_latitude[i], geo_latitude[i]],
-            z=[0, water_depth_invertido[i]],  # Utiliza los valores de Water depth
-            mode='lines+text',
+        go.Scatter3d(
+            x=x_agua,
+            y=y_agua,
+            z=trazos_por_pozo(ceros, todos, -df_map['Water_depth'].to_numpy(dtype=float)),
+            mode='lines',
             line=dict(
                 color='#0066FF',  # Color azul para las líneas de profundidad del agua
                 width=2
             ),
-            showlegend=False,
-            name=uwi_list[i] + ' (Water)'
-        ))
-
-        # Trazo para la profundidad del pozo (como antes, invertido)
-        fig.add_trace(go.Scatter3d(
-            x=[geo_longitude[i], geo_longitude[i]],
-            y=[geo_latitude[i], geo_latitude[i]],
-            z=[0, wellhead_depth_invertido[i]],
-            mode='lines+text',
+            text=np.repeat(uwi_list, 3),
+            hovertemplate='%{text} (Water): %{z}<extra></extra>',
+            name='Water depth',
+        ),
+        # Trazo para la profundidad del pozo (invertido), con el color de cada pozo en cada punto de su línea
+        go.Scatter3d(
+            x=x_pozo,
+            y=y_pozo,
+            z=trazos_por_pozo(ceros, pozos_puntos, -tvd),
+            mode='lines',
             line=dict(
-                color=colors_UWIS.get(uwi_list[i], 'rgba(0, 0, 0, 0.6)'),
+                color=colores[pozo_de_punto],
                 width=2
             ),
-            showlegend=False,
-            name=uwi_list[i] + ' (Depth)'
-    ))
+            text=uwi_list[pozo_de_punto],
+            hovertemplate='%{text} (Depth): %{z}<extra></extra>',
+            name='Well depth',
+        ),
+    ])
 
     fig.update_scenes(
         aspectmode='cube'
@@ -1111,36 +784,16 @@ def trajectory_wells(df_map):
 
     return fig
 
-# Crea una lista de elementos que deseas incluir en wells_depth_card
-wells_depth_children = [
-    html.Div(
-        "Well depth and aquifer depth",
-        style={
-            'paddingTop': '10px',
-            'textAlign': 'center',
-            'align-content': 'center',
-            'color': 'white',
-            'borderBottom': '1px solid white',
-            'paddingBottom': '10px',
-            'fontWeight': 'bold',
-        },
-    ),
-    html.Div(
-        dcc.Graph(
-            figure=trajectory_wells(df_map),
-            config={
-                'displayModeBar': True  # Asegúrate de que displayModeBar esté configurado como True
-            }
-        ),
-        # style={'maxHeight': '300px', 'overflowY': 'auto'}  # Establece una altura máxima y activa la barra de desplazamiento vertical
+# Tarjeta de profundidad de pozos
+wells_depth_card = generate_lazy_card('wells-depth', "Well depth and aquifer depth", {'height': '350px', 'width': '100%', 'textAlign': 'center', 'border-radius': '10px', 'backgroundColor': '#131313'})
+contenido_tarjetas['wells-depth'] = ([POZOS, SURVEY], lambda datos: html.Div(
+    dcc.Graph(
+        figure=trajectory_wells(datos.df_map, datos.trayectorias),
+        config={
+            'displayModeBar': True  # Asegúrate de que displayModeBar esté configurado como True
+        }
     ),
-]
-
-# Ahora, crea wells_depth_card y pasa la lista de children
-wells_depth_card = html.Div(
-    style={'height': '350px', 'width': '100%', 'textAlign': 'center', 'border-radius': '10px', 'backgroundColor': '#131313'},
-    children=wells_depth_children,
-)
+))
 
 
 def create_map():
@@ -1153,66 +806,62 @@ def create_map():
         'PCP': 'assets/PCP.png'
     }
 
-    # Crea el mapa y los marcadores
-    map_ = dl.Map(
-        center=[5.533995902516049, -73.35830183000226],
-        zoom=6.49,  # Nivel de zoom
-        children=[
-            dl.TileLayer(url='https://{s}.basemaps.cartocdn.com/dark_all/{z}/{x}/{y}{r}.png')
-        ],
-        style={'width': '400px', 'height': '300px'}
-    )
-
-    # Agrega marcadores para cada pozo en el DataFrame df_sumas_por_pozo
-    for _, row in df_sumas_por_pozo.iterrows():  # Utiliza df_sumas_por_pozo en lugar de df_map
-        sistema_levantamiento = row['Sistema_Levantamiento']
-        purpose = row['Purpose']
-
-        # Obtiene la ruta del icono basado en el sistema de levantamiento
-        icon_url = sistema_icon_mapping.get(sistema_levantamiento, 'assets/icono_pozo6.png')
-
-        custom_icon = {
-            'iconUrl': icon_url,  # Usa la ruta del icono correspondiente
-            'iconSize': [45, 45],  # Tamaño del icono personalizado (ajusta según tus necesidades)
-        }
-
-        # Crea el texto para el tooltip con UWI y Purpose
-        tooltip_text = f'*UWI: {row["UWI"]}, *Purpose: {purpose}'
-
-        # Crea el marcador con el icono personalizado y el tooltip modificado
-        marker = dl.Marker(
-            position=[row['Geo_latitude'], row['Geo_longitude']],
-            icon=custom_icon,
+    # Un solo GeoJSON con un punto por pozo. El icono y el tooltip se arman en el navegador (assets/mapa_pozos.js) y los pozos
+    # cercanos se agrupan en clusters. La capa empieza vacía: al cargar y al mover el mapa, un callback envía solo los pozos
+    # dentro de la vista (pozos_en_vista), y al hacer clic en un pozo se pide el popup con su torta de producción.
+    return html.Div([
+        dl.Map(
+            id='mapa-pozos',
+            center=[5.533995902516049, -73.35830183000226],
+            zoom=6.49,  # Nivel de zoom
+            trackViewport=True,
             children=[
-                dl.Tooltip(tooltip_text, direction='top'),  # Muestra UWI y Purpose en el tooltip
-                dl.Popup(html.Div([generate_pie_chart(row)]))
-            ]
-        )
-
-        # Agrega todos los marcadores al mapa usando la propiedad 'children'
-        map_.children.append(marker)
-
-    return map_
+                dl.TileLayer(url='https://{s}.basemaps.cartocdn.com/dark_all/{z}/{x}/{y}{r}.png'),
+                dl.GeoJSON(
+                    id='geojson-pozos',
+                    data={'type': 'FeatureCollection', 'features': []},
+                    cluster=True,
+                    zoomToBoundsOnClick=True,
+                    superClusterOptions={'radius': 60},
+                    pointToLayer={'variable': 'geohallitians.marcadorPozo'},
+                    hideout={'iconos': sistema_icon_mapping, 'icono_defecto': 'assets/icono_pozo6.png'},
+                ),
+                dl.LayerGroup(id='popup-pozo'),
+            ],
+            style={'width': '400px', 'height': '280px'}
+        ),
+        # Número de pozos y producción acumulada de los pozos visibles
+        html.Div(id='resumen-mapa', style={'color': 'white', 'fontSize': '11px', 'marginTop': '4px'}),
+    ])
+
+# Fracción del alto y el ancho de la vista que se agrega en cada borde, para que los pozos no aparezcan de golpe al mover el mapa
+MARGEN_VISTA = 0.2
+
+def pozos_mapa(datos):
+    # Pozos con producción registrada e índice espacial de sus coordenadas, una vez por conjunto de datos
+    pozos = pozos_con_produccion(datos.df_pozos).reset_index()
+    return pozos, IndiceEspacial(pozos['Geo_latitude'], pozos['Geo_longitude'])
+
+def pozos_en_vista(datos, bounds):
+    # GeoJSON de los pozos dentro de bounds ([[sur, oeste], [norte, este]], más el margen) y resumen de su producción
+    pozos, indice = datos.derivado(('mapa',), lambda: pozos_mapa(datos))
+    (sur, oeste), (norte, este) = bounds
+    alto, ancho = (norte - sur) * MARGEN_VISTA, (este - oeste) * MARGEN_VISTA
+    visibles = pozos.iloc[indice.consultar(sur - alto, oeste - ancho, norte + alto, este + ancho)]
+
+    columnas = ['Well_Id', 'UWI', 'Purpose', 'Sistema_Levantamiento', 'Geo_latitude', 'Geo_longitude']
+    geojson = dlx.dicts_to_geojson(visibles[columnas].to_dict('records'), lat='Geo_latitude', lon='Geo_longitude')
+    resumen = (
+        f"{len(visibles)} of {len(pozos)} wells in view · "
+        f"Oil {format_number(visibles['Total_Oil_Pozo'].sum())} · "
+        f"Gas {format_number(visibles['Total_Gas_Pozo'].sum())} · "
+        f"Water {format_number(visibles['Total_Water_Pozo'].sum())}"
+    )
+    return geojson, resumen
 
 # Agrega el título de la tarjeta aquí
-wells_location_card = html.Div(
-    style={'height': '350px', 'width': '60%', 'textAlign': 'center', 'border-radius': '10px', 'backgroundColor': '#131313'},
-    children=[
-        html.Div(
-            "Wells Location",
-            style={
-                'paddingTop': '10px',
-                'textAlign': 'center',
-                'align-content': 'center',
-                'color': 'white',
-                'borderBottom': '1px solid white',
-                'paddingBottom': '10px',
-                'fontWeight': 'bold',
-            },
-        ),
-        create_map(),  # Inserta el mapa directamente después del título
-    ],
-)
+wells_location_card = generate_lazy_card('wells-location', "Wells Location", {'height': '350px', 'width': '60%', 'textAlign': 'center', 'border-radius': '10px', 'backgroundColor': '#131313'})
+contenido_tarjetas['wells-location'] = ([POZOS, VOLUMETRICA], lambda datos: create_map())
 
 def barrel_price():
     return html.Iframe(
@@ -1334,44 +983,12 @@ def freq_caudal_graph(df):
     )
 
 # Agrega el título de la tarjeta aquí
-presion_caudal_card = html.Div(
-    style={'height': '350px', 'width': '100%', 'textAlign': 'center', 'border-radius': '10px', 'backgroundColor': '#131313'},
-    children=[
-        html.Div(
-            "Intake Pressure vs Flow",
-            style={
-                'paddingTop': '10px',
-                'textAlign': 'center',
-                'align-content': 'center',
-                'color': 'white',
-                'borderBottom': '1px solid white',
-                'paddingBottom': '10px',
-                'fontWeight': 'bold',
-            },
-        ),
-        presion_caudal_graph(df),  # Inserta el mapa directamente después del título
-    ],
-)
+presion_caudal_card = generate_lazy_card('presion-caudal', "Intake Pressure vs Flow", {'height': '350px', 'width': '100%', 'textAlign': 'center', 'border-radius': '10px', 'backgroundColor': '#131313'})
+contenido_tarjetas['presion-caudal'] = ([CRITICAS], lambda datos: presion_caudal_graph(datos.df))
 
 # Agrega el título de la tarjeta aquí
-freq_caudal_card = html.Div(
-    style={'height': '350px', 'width': '100%', 'textAlign': 'center', 'border-radius': '10px', 'backgroundColor': '#131313'},
-    children=[
-        html.Div(
-            "Frequency vs Flow",
-            style={
-                'paddingTop': '10px',
-                'textAlign': 'center',
-                'align-content': 'center',
-                'color': 'white',
-                'borderBottom': '1px solid white',
-                'paddingBottom': '10px',
-                'fontWeight': 'bold',
-            },
-        ),
-        freq_caudal_graph(df),  # Inserta el mapa directamente después del título
-    ],
-)
+freq_caudal_card = generate_lazy_card('freq-caudal', "Frequency vs Flow", {'height': '350px', 'width': '100%', 'textAlign': 'center', 'border-radius': '10px', 'backgroundColor': '#131313'})
+contenido_tarjetas['freq-caudal'] = ([CRITICAS], lambda datos: freq_caudal_graph(datos.df))
 
 # Define un diccionario de colores para WCUT y WOR por año
 custom_colors_wcut = {
@@ -1386,15 +1003,6 @@ custom_colors_wor = {
     2023: 'rgba(183, 28, 28, 1)', #rojo
 }
 
-# Agrupar los datos por año y mes
-df_grouped = df.groupby(['Año', 'Mes']).agg({
-    'Suma_WCUT': 'mean',  # Puedes usar 'mean', 'sum', o cualquier otra función de agregación que necesites
-    'Suma_WOR': 'mean'
-}).reset_index()
-
-# Obtener la lista de años en tus datos
-años = df_grouped['Año'].unique()
-
 meses_abreviados = {
         1: 'Jan',
         2: 'Feb',
@@ -1416,15 +1024,14 @@ def create_wc_wor_graph(df_grouped, custom_colors_wcut, custom_colors_wor):
     años = df_grouped['Año'].unique()
     traces = []
 
-    # Actualizar el formato del eje X
-    df_grouped['Mes'] = df_grouped['Mes'].map(meses_abreviados) + '/' + df_grouped['Año'].apply(str).str[-2:]
-
+    # Formato del eje X en una columna nueva: df_grouped es del ConjuntoDatos y no se modifica
+    df_grouped = df_grouped.assign(Etiqueta_Mes=df_grouped['Mes'].map(meses_abreviados) + '/' + df_grouped['Año'].astype(str).str[-2:])
 
     for año in años:
         data_año = df_grouped[df_grouped['Año'] == año]
         trace_wcut = go.Scatter(
-            x=data_año['Mes'],
-            y=data_año['Suma_WCUT'],
+            x=data_año['Etiqueta_Mes'],
+            y=data_año['Promedio_WCUT'],
             mode='lines',
             name=f'WCUT {año}',
             line=dict(
@@ -1433,8 +1040,8 @@ def create_wc_wor_graph(df_grouped, custom_colors_wcut, custom_colors_wor):
             )
         )
         trace_wor = go.Scatter(
-            x=data_año['Mes'],
-            y=data_año['Suma_WOR'],
+            x=data_año['Etiqueta_Mes'],
+            y=data_año['Promedio_WOR'],
             mode='lines',
             name=f'WOR {año}',
             line=dict(
@@ -1496,13 +1103,13 @@ def create_bopd_bwpd_graph(df, colors_bopd, colors_bwpd):
     años = df['Año'].unique()
     traces_bopd_bwpd = []
 
-    # Actualizar el formato del eje X
-    df['Mes'] = df['Mes'].map(meses_abreviados) + '/' + df['Año'].apply(str).str[-2:]
+    # Formato del eje X en una columna nueva: df es del ConjuntoDatos y no se modifica
+    df = df.assign(Etiqueta_Mes=df['Mes'].map(meses_abreviados) + '/' + df['Año'].astype(str).str[-2:])
 
     for año in años:
         data_año = df[df['Año'] == año]
         trace_bopd = go.Scatter(
-            x=data_año['Mes'],
+            x=data_año['Etiqueta_Mes'],
             y=data_año['Suma_BOPD'],
             mode='lines',
             name=f'BOPD {año}',
@@ -1512,7 +1119,7 @@ def create_bopd_bwpd_graph(df, colors_bopd, colors_bwpd):
             )
         )
         trace_bwpd = go.Scatter(
-            x=data_año['Mes'],
+            x=data_año['Etiqueta_Mes'],
             y=data_año['Suma_BWPD'],
             mode='lines',
             name=f'BWPD {año}',
@@ -1558,48 +1165,16 @@ def create_bopd_bwpd_graph(df, colors_bopd, colors_bwpd):
     return bopd_bwpd_graph
 
 # Agrega el título de la tarjeta aquí
-wc_wor_card = html.Div(
-    style={'height': '350px', 'width': '100%', 'textAlign': 'center', 'border-radius': '10px', 'backgroundColor': '#131313'},
-    children=[
-        html.Div(
-            "WC and WOR",
-            style={
-                'paddingTop': '10px',
-                'textAlign': 'center',
-                'align-content': 'center',
-                'color': 'white',
-                'borderBottom': '1px solid white',
-                'paddingBottom': '10px',
-                'fontWeight': 'bold',
-            },
-        ),
-        create_wc_wor_graph(df_grouped, custom_colors_wcut, custom_colors_wor),  # Pasar los argumentos aquí
-    ],
-)
+wc_wor_card = generate_lazy_card('wc-wor', "WC and WOR", {'height': '350px', 'width': '100%', 'textAlign': 'center', 'border-radius': '10px', 'backgroundColor': '#131313'})
+contenido_tarjetas['wc-wor'] = ([CRITICAS], lambda datos: create_wc_wor_graph(datos.df_grouped, custom_colors_wcut, custom_colors_wor))
 
 # Agrega el título de la tarjeta aquí
-bopd_bwpd_card = html.Div(
-    style={'height': '350px', 'width': '100%', 'textAlign': 'center', 'border-radius': '10px', 'backgroundColor': '#131313'},
-    children=[
-        html.Div(
-            "BOPD and BWPD",
-            style={
-                'paddingTop': '10px',
-                'textAlign': 'center',
-                'align-content': 'center',
-                'color': 'white',
-                'borderBottom': '1px solid white',
-                'paddingBottom': '10px',
-                'fontWeight': 'bold',
-            },
-        ),
-        create_bopd_bwpd_graph(df, colors_bopd, colors_bwpd),  # Pasar los argumentos aquí
-    ],
-)
+bopd_bwpd_card = generate_lazy_card('bopd-bwpd', "BOPD and BWPD", {'height': '350px', 'width': '100%', 'textAlign': 'center', 'border-radius': '10px', 'backgroundColor': '#131313'})
+contenido_tarjetas['bopd-bwpd'] = ([CRITICAS], lambda datos: create_bopd_bwpd_graph(datos.df, colors_bopd, colors_bwpd))
 
 
-# Diccionario de colores personalizados por UWI
-colors_UWIS = {
+# Diccionario de colores personalizados por UWI del gráfico de BOPD (la paleta colors_UWIS es la de calidad de aceite)
+colors_UWIS_bopd = {
     'Well013': 'rgba(188, 170, 164, 0.1)', # Color Gris
     'Well017': 'rgba(67, 160, 71, 0.1)', # Color Verde
     'Well002': 'rgba(255, 87, 34, 0.6)', # Color Naranja
@@ -1608,18 +1183,12 @@ colors_UWIS = {
 }
 
 
-# Agregar una columna 'Año_Mes' formateada para ordenar correctamente
-well_production_bopd['Año_Mes'] = well_production_bopd['Mes'].apply(lambda x: calendar.month_abbr[x]) + '/' + well_production_bopd['Año'].astype(str).str[-2:]
-
-# Ordenar el DataFrame por 'Año' y 'Mes' de manera descendente
-well_production_bopd = well_production_bopd.sort_values(by=['Año', 'Mes'])
-
 def crear_grafico_lineas(well_production_bopd):
     fig = go.Figure()
 
     for uwi, data in well_production_bopd.groupby('UWI'):
         fig.add_trace(go.Scatter(x=data['Año_Mes'], y=data['Suma_BOPD'], mode='lines', name=uwi, fill='tozeroy', 
-                                 line=dict(color=colors_UWIS.get(uwi, 'rgba(255, 255, 255, 0.6)'))))
+                                 line=dict(color=colors_UWIS_bopd.get(uwi, 'rgba(255, 255, 255, 0.6)'))))
 
     fig.update_layout(
         xaxis=dict(title='Month/Year', tickfont=dict(color='white', size=10), titlefont=dict(color='white', size=12),
@@ -1699,7 +1268,10 @@ def gas_production(well_production_data):
 
     xaxis_labels = [format_month_year(year_month) for year_month in all_year_months]
 
+    # Con filtros que dejan fuera a todos estos pozos no hay máximo (NaN): el eje queda hasta 1K
     max_gas_production = well_production_data_sorted['Suma_Gas'].max()
+    if pd.isna(max_gas_production):
+        max_gas_production = 0
     max_range_gas = 1000 * ((int(max_gas_production) // 1000) + 1)
 
     y_tickvals = [0]
@@ -1751,44 +1323,12 @@ def gas_production(well_production_data):
     return gas_graph
 
 # Define el componente dcc.Graph para mostrar el gráfico
-oil_production_card = html.Div(
-    style={'height': '350px', 'width': '100%', 'textAlign': 'center', 'border-radius': '10px', 'backgroundColor': '#131313'},
-    children=[
-        html.Div(
-            "Top 5 highest Oil production",
-            style={
-                'paddingTop': '10px',
-                'textAlign': 'center',
-                'align-content': 'center',
-                'color': 'white',
-                'borderBottom': '1px solid white',
-                'paddingBottom': '10px',
-                'fontWeight': 'bold',
-            },
-        ),
-        dcc.Graph(figure=crear_grafico_lineas(well_production_bopd)),  # Usar dcc.Graph para mostrar el gráfico
-    ],
-)
+oil_production_card = generate_lazy_card('oil-production', "Top 5 highest Oil production", {'height': '350px', 'width': '100%', 'textAlign': 'center', 'border-radius': '10px', 'backgroundColor': '#131313'})
+contenido_tarjetas['oil-production'] = ([POZOS, CRITICAS], lambda datos: dcc.Graph(figure=crear_grafico_lineas(datos.well_production_bopd)))
 
 # Llama a gas_production() con well_production_data como argumento
-gas_production_card = html.Div(
-    style={'height': '350px', 'width': '100%', 'textAlign': 'center', 'border-radius': '10px', 'backgroundColor': '#131313'},
-    children=[
-        html.Div(
-            "Top 5 highest Gas production",
-            style={
-                'paddingTop': '10px',
-                'textAlign': 'center',
-                'align-content': 'center',
-                'color': 'white',
-                'borderBottom': '1px solid white',
-                'paddingBottom': '10px',
-                'fontWeight': 'bold',
-            },
-        ),
-        gas_production(well_production_data),  # Pasa well_production_data como argumento
-    ],
-)
+gas_production_card = generate_lazy_card('gas-production', "Top 5 highest Gas production", {'height': '350px', 'width': '100%', 'textAlign': 'center', 'border-radius': '10px', 'backgroundColor': '#131313'})
+contenido_tarjetas['gas-production'] = ([POZOS, VOLUMETRICA], lambda datos: gas_production(datos.well_production_data))
 
 
 # Función para formatear números en notación K (miles) y M (millones)
@@ -1800,336 +1340,257 @@ def format_number(number):
     else:
         return f"{number:.2f}"
 
-# Tarjetas de datos
-wells_card = generate_data_card("Producing Wells", f"{numero_de_pozos}", '#00CCFF')
-# total_oil_card = generate_data_card("Top 5 Oil decline", format_number(df_var_3['Oil'].sum()), '#FF6633')
-# total_water_card = generate_data_card("Top 5 Gas reduction", format_number(df_var_3['Water'].sum()), '#0066FF')
-# total_gas_card = generate_data_card("Total Gas", format_number(df_var_3['Gas'].sum()), '#663366')
-# total_hours_card = generate_data_card("Total Hours", format_number(df_var_3['Hours'].sum()), '#009966')
-# average_caudal_card = generate_data_card("Average Caudal", format_number(df_var_2['Caudal'].mean()), ' #CC9900')
+# Tarjetas de datos (wells_card se arma en construir_layout con el número de pozos del conjunto actual)
+# total_oil_card = generate_data_card("Top 5 Oil decline", format_number(totales_var_3['Total_Oil']), '#FF6633')
+# total_water_card = generate_data_card("Top 5 Gas reduction", format_number(totales_var_3['Total_Water']), '#0066FF')
+# total_gas_card = generate_data_card("Total Gas", format_number(totales_var_3['Total_Gas']), '#663366')
+# total_hours_card = generate_data_card("Total Hours", format_number(totales_var_3['Total_Hours']), '#009966')
+# average_caudal_card = generate_data_card("Average Caudal", format_number(agregar_tabla('critical_variables_updated', {'Promedio_Caudal': ('AVG', 'Caudal')})['Promedio_Caudal'].iloc[0]), ' #CC9900')
 
-total_gas = df_var_3['Gas'].sum()  
-total_oil = df_var_3['Oil'].sum()  
-total_water = df_var_3['Water'].sum()
+# Crea un gráfico de torta de proporción de todos los campos
+def pie_chart(totales_var_3):
+    total_gas = totales_var_3['Total_Gas']
+    total_oil = totales_var_3['Total_Oil']
+    total_water = totales_var_3['Total_Water']
 
-# Calcula las proporciones
-proporcion_gas = total_gas / (total_gas + total_oil + total_water) * 100
-proporcion_oil = total_oil / (total_gas + total_oil + total_water) * 100
-proporcion_water = total_water / (total_gas + total_oil + total_water) * 100
+    # Calcula las proporciones
+    proporcion_gas = total_gas / (total_gas + total_oil + total_water) * 100
+    proporcion_oil = total_oil / (total_gas + total_oil + total_water) * 100
+    proporcion_water = total_water / (total_gas + total_oil + total_water) * 100
 
-# Crea un gráfico de torta de proporción de todos los campos
+    return dcc.Graph(
+        id='pie-chart',
+        config={'displayModeBar': True},
+        style={'height': '170px', 'paddingTop': '10px'},  # Ajusta la altura y el espaciado interno
+        figure={
+            'data': [
+                go.Pie(
+                    labels=['Gas', 'Oil', 'Water'],
+                    values=[proporcion_gas, proporcion_oil, proporcion_water],
+                    hoverinfo='label+percent',
+                    textinfo='percent',
+                    textfont=dict(color='black', size=8, family='Lato'),  # Personalizar fuente del porcentaje
+                    insidetextfont=dict(color='black', size=14, family='Lato'),  # Personalizar fuente de las etiquetas
+                    marker=dict(colors=['#663366', '#FF6633']),
+                    hole=0.3,
+                )
+            ],
+            'layout': go.Layout(
+                plot_bgcolor='#131313',
+                paper_bgcolor='#131313',
+                margin={'t': 0, 'b': 0, 'l': 0.5, 'r': 0},  # Ajusta el margen
+            ),
+        },
+    )
 
-pie_card = html.Div(
-    style={'height': '230px', 'textAlign': 'center', 'border-radius':'7px', 'box-shadow': '0px 0px 5px 2px rgba(255, 255, 255, 0.2)', 'backgroundColor': '#131313'},
-    children=[
-        html.Div(
-            "Oil/Gas/Water Proportion",
-            style={
-                'paddingTop': '10px',
-                'textAlign': 'center',
-                'align-content': 'center',
-                'color': 'white',
-                'borderBottom': '1px solid white',
-                'paddingBottom': '10px',
-                'fontWeight': 'bold',
-            },
-        ),
-        dcc.Graph(
-            id='pie-chart',
-            config={'displayModeBar': True},
-            style={'height': '170px', 'paddingTop': '10px'},  # Ajusta la altura y el espaciado interno
-            figure={
-                'data': [
-                    go.Pie(
-                        labels=['Gas', 'Oil', 'Water'],
-                        values=[proporcion_gas, proporcion_oil, proporcion_water],
-                        hoverinfo='label+percent',
-                        textinfo='percent',
-                        textfont=dict(color='black', size=8, family='Lato'),  # Personalizar fuente del porcentaje
-                        insidetextfont=dict(color='black', size=14, family='Lato'),  # Personalizar fuente de las etiquetas
-                        marker=dict(colors=['#663366', '#FF6633']),
-                        hole=0.3,
-                    )
-                ],
-                'layout': go.Layout(
-                    plot_bgcolor='#131313',
-                    paper_bgcolor='#131313',
-                    margin={'t': 0, 'b': 0, 'l': 0.5, 'r': 0},  # Ajusta el margen
-                ),
-            },
-        ),
-    ],
-)
+pie_card = generate_lazy_card('pie', "Oil/Gas/Water Proportion", {'height': '230px', 'textAlign': 'center', 'border-radius':'7px', 'box-shadow': '0px 0px 5px 2px rgba(255, 255, 255, 0.2)', 'backgroundColor': '#131313'})
+contenido_tarjetas['pie'] = ([VOLUMETRICA], lambda datos: pie_chart(datos.totales_var_3))
 
 # ---------------------------------------------------------------------------------------------------------------------------------------------------
 # SECCION DE BOTONES DE EXPORTAR
 # ---------------------------------------------------------------------------------------------------------------------------------------------------
 
-# Define una función para crear y guardar un archivo de PowerPoint con dos slides personalizados
-def create_custom_pptx():
-    prs = Presentation()
-
-    # Slide 1: Título personalizado en fondo negro
-    slide1 = prs.slides.add_slide(prs.slide_layouts[6])  # Layout en blanco
-
-    # Configurar el fondo negro
-    background1 = slide1.background
-    fill1 = background1.fill
-    fill1.solid()
-    fill1.fore_color.rgb = RGBColor(0, 0, 0)  # Negro
-
-    # Agregar la imagen de fondo (slide 1)
-    left = top = Inches(0)
-    width = prs.slide_width
-    height = prs.slide_height
-    pic1 = slide1.shapes.add_picture("D:/Tablero_prod/assets/spe_logo.png", left, top, width, height)
-
-    # Agregar un cuadro de texto para el título (slide 1)
-    left = Inches(1)
-    top = Inches(0.1)  # Mover hacia arriba
-    width = prs.slide_width - Inches(2)
-    height = Inches(1)
-    txBox1 = slide1.shapes.add_textbox(left, top, width, height)
-    tf1 = txBox1.text_frame
-    p1 = tf1.add_paragraph()
-    p1.text = "Geohallitians Production Kpis Report"
-    p1.alignment = PP_ALIGN.CENTER
-    run1 = p1.runs[0]
-    font1 = run1.font
-    font1.size = Pt(36)  # Tamaño de fuente (ajusta según sea necesario)
-    font1.bold = True
-    font1.color.rgb = RGBColor(255, 255, 255)  # Blanco
-
-    # Captura el área del dashboard usando pyautogui
-    screenshot = pyautogui.screenshot()
-    screenshot.save("dashboard.png")
-
-    # Slide 2: Título y imagen
-    slide2 = prs.slides.add_slide(prs.slide_layouts[6])  # Layout en blanco
-
-    # Agregar la imagen (slide 2)
-    left = Inches(0)
-    top = Inches(1.5)
-    width = prs.slide_width
-    height = Inches(5.5)  # Reducir la altura de la imagen
-    pic2 = slide2.shapes.add_picture("dashboard.png", left, top, width, height)
-
-    # Agregar el título (slide 2)
-    left = Inches(0)
-    top = Inches(0)
-    width = prs.slide_width
-    height = Inches(1)
-    txBox2 = slide2.shapes.add_textbox(left, top, width, height)
-    tf2 = txBox2.text_frame
-    p2 = tf2.add_paragraph()
-    p2.text = "KPIs Dashboard"
-    p2.alignment = PP_ALIGN.CENTER
-    run2 = p2.runs[0]
-    font2 = run2.font
-    font2.size = Pt(48)  # Aumentar el tamaño de la fuente
-    font2.bold = True
-    font2.color.rgb = RGBColor(0, 0, 0)  # Negro
-
-    prs.save("Geohallitians_dashboard_presentation.pptx")
-
-
-# Define una función para capturar el área del dashboard y exportarla a PDF
-def export_dashboard_to_pdf():
-    # Captura el área del dashboard usando pyautogui
-    screenshot = pyautogui.screenshot()
-    screenshot.save("dashboard.png")
-    
-    # Convierte la imagen capturada a PDF usando img2pdf
-    with open("Geohallitians_dashboard.pdf", "wb") as f:
-        f.write(img2pdf.convert("dashboard.png"))
-
-# Define una función para capturar el área del dashboard y exportarla a PNG
-def export_dashboard_to_png():
-    # Captura el área del dashboard usando pyautogui
-    screenshot = pyautogui.screenshot()
-    screenshot.save("Geohallitians_dashboard.png")
+# Las funciones de exportación están en exportar.py. Ese módulo (y python-pptx, img2pdf y pyautogui)
+# solo se importa cuando se hace clic en un botón, para que los workers no los carguen al iniciar.
 
 # ---------------------------------------------------------------------------------------------------------------------------------------------------
 # SECCION DEL LAYOUT DE LA APP
 # ---------------------------------------------------------------------------------------------------------------------------------------------------
 
-app.layout = html.Div(style={'fontFamily': 'Lato', 'display': 'flex', 'flexDirection': 'column'}, children=[
-    dcc.Location(id='url', refresh=False),  # Agrega el componente dcc.Location
-    html.Div(style={'position': 'relative', 'className': 'button-container'}, children=[
-        html.Button('Export PDF', id='btn-pdf', n_clicks=0, className='export-button'),
-        html.Button('Export PPT', id='btn-pptx', n_clicks=0, className='export-button'),
-        html.Button('Export PNG', id='btn-png', n_clicks=0, className='export-button') 
-    ]),
-
-    html.Div(style={'display': 'flex', 'backgroundColor' : '#131313', 'border-radius':'7px'}, children=[
-        html.Img(src='assets/spe_logo_dim.png', style={'width': '5%', 'align-self': 'flex-start', 'margin-top': '0px', 'margin-bottom': '0px', 'margin-left': '42%'}),
-        html.H1("PRODUCTION KPI's", style={'color': 'white',
-                'alignItems': 'center',
-                'fontWeight': 'bold',
-                'flex-grow': '1',
-                'fontSize': '30px',
-                'margin-left': '2%',
-            }),
-        html.Div(f'Last Updated: {formatted_time} (Colombia Time)', style={'align': 'center', 'color': '#424242', 'margin': '1px 0', 'align-items': 'top', 'fontSize': '14px', 'fontWeight': 'bold'}),
-    ]),
-
-    html.Div(style={'display': 'flex'}, children=[
-
-        #Primera columna
-
-        # Barra de control
-        # Primera columna
-        html.Div(style={'width': '17%', 'margin-top': '0px'}, children=[
-                html.Div(style={'backgroundColor': '#131313', 'border-radius': '7px', 'max-height': '50vh'}, children=[
-                    html.H3("Filters", style={'textAlign': 'center', 'color': 'white', 'borderBottom': '1px solid white', 'paddingTop': '10px', 'paddingBottom': '10px'}),
-                    # Por ejemplo, puedo agregar un dropdown para seleccionar opciones
-                    dcc.Dropdown(
-                        id='dropdown-option',
-                        options=[
-                            # {'label': 'Last 3 months', 'value': 'Last 3 months'},
-                            # {'label': 'Last 6 months', 'value': 'Last 6 months'},
-                            # {'label': 'Last 9 months', 'value': 'Last 9 months'},
-                            # {'label': 'Last Year', 'value': 'Last Year'},
-                            {'label': 'All', 'value': 'All'},
-                            # Agrego más opciones según mis necesidades más adelante
-                        ],
-                        value='All',  # Valor por defecto
-                        style={'margin-bottom': '10px'}
-                    ),
-                    # # Otros componentes dcc aquí (botones, sliders, etc.)
-
-                    # dcc.Slider(3, 12, 3, value=12),
-
-                    # # Checkbox 1
-                    # dcc.Checklist(
-                    #     options=[
-                    #         {'label': 'Total', 'value': 'Total'},
-                    #         {'label': 'top 5 increase', 'value': 'top 5 increase'},
-                    #         {'label': 'top 5 decrease', 'value': 'top 5 decrease'},
-                    #     ],
-                    #     value=['Total'],
-                    #     style={'textAlign': 'center', 'color': 'white', 'margin-top': '15px', 'columnCount': 3, 'margin-bottom': '15px'}
-                    # ),
-
-                    # Checkbox 2
-                    dcc.Checklist(
-                        options=[
-                            # {'label': 'Field SPE-2', 'value': 'Field SPE-2'},
-                            # {'label': 'Field SPE-3', 'value': 'Field SPE-3'},
-                            # {'label': 'Field SPE-4', 'value': 'Field SPE-4'},
-                            # {'label': 'Field SPE-5', 'value': 'Field SPE-5'},
-                            # {'label': 'Field SPE-6', 'value': 'Field SPE-6'},
-                            {'label': 'All Fields', 'value': 'All Fields'},
-                        ],
-                        value=['All Fields'],
-                        style={'textAlign': 'center', 'color': 'white', 'margin-top': '15px', 'columnCount': 2, 'margin-bottom': '15px'},
-                    ),
+def versiones_tarjetas(datos):
+    # Versión de los datos de cada tarjeta diferida según las tablas de las que depende
+    return {id_tarjeta: datos.version(fuentes) for id_tarjeta, (fuentes, _) in contenido_tarjetas.items()}
+
+def construir_layout():
+    # Se arma en cada carga de la página para mostrar la hora y el número de pozos del conjunto de datos vigente
+    datos = conjunto_actual()
+    wells_card = generate_data_card("Producing Wells", f"{datos.numero_de_pozos}", '#00CCFF', data_id='numero-pozos')
+    indice = datos.indice_pozos()
+
+    return html.Div(style={'fontFamily': 'Lato', 'display': 'flex', 'flexDirection': 'column'}, children=[
+        dcc.Location(id='url', refresh=False),  # Agrega el componente dcc.Location
+        # Consulta periódica de la versión de los datos y versiones que ya muestra este navegador
+        dcc.Interval(id='intervalo-refresco', interval=INTERVALO_CLIENTES * 1000),
+        dcc.Store(id='versiones-tarjetas', data=versiones_tarjetas(datos)),
+        # Clave de los filtros de la barra lateral (filtros_tablero.py): lista vacía = todos los pozos y todo el historial
+        dcc.Store(id='filtros-tablero', data=[]),
+        html.Div(style={'position': 'relative', 'className': 'button-container'}, children=[
+            html.Button('Export PDF', id='btn-pdf', n_clicks=0, className='export-button'),
+            html.Button('Export PPT', id='btn-pptx', n_clicks=0, className='export-button'),
+            html.Button('Export PNG', id='btn-png', n_clicks=0, className='export-button') 
+        ]),
 
-                    # Dropdown pero múltiple
-                    dcc.Dropdown(
-                        ['BES', 'GAS LIFT', 'BME', 'PCP'], ['BES', 'GAS LIFT', 'BME', 'PCP'], style={'backgroundColor': '#000000', 'margin-top': '5px'},
-                        multi=True
-                    ),
+        html.Div(style={'display': 'flex', 'backgroundColor' : '#131313', 'border-radius':'7px'}, children=[
+            html.Img(src='assets/spe_logo_dim.png', style={'width': '5%', 'align-self': 'flex-start', 'margin-top': '0px', 'margin-bottom': '0px', 'margin-left': '42%'}),
+            html.H1("PRODUCTION KPI's", style={'color': 'white',
+                    'alignItems': 'center',
+                    'fontWeight': 'bold',
+                    'flex-grow': '1',
+                    'fontSize': '30px',
+                    'margin-left': '2%',
+                }),
+            html.Div(f'Last Updated: {datos.formatted_time} (Colombia Time)', id='ultima-actualizacion', style={'align': 'center', 'color': '#424242', 'margin': '1px 0', 'align-items': 'top', 'fontSize': '14px', 'fontWeight': 'bold'}),
+        ]),
 
-                    # # Botón final
-                    # html.Div([
-                    #     dcc.Input(id='input-box', type='text'),
-                    #     html.Button('Submit', id='button-example-1'),
-                    #     html.Div(id='output-container-button', children='Enter a value and press submit', style={'color': 'white'}),
-                    #     html.Div(id='search-result', children='', style={'color': 'white'})
-                    # ])
-                ]),
+        html.Div(style={'display': 'flex'}, children=[
+
+            #Primera columna
+
+            # Barra de control
+            # Primera columna
+            html.Div(style={'width': '17%', 'margin-top': '0px'}, children=[
+                    html.Div(style={'backgroundColor': '#131313', 'border-radius': '7px', 'max-height': '50vh'}, children=[
+                        html.H3("Filters", style={'textAlign': 'center', 'color': 'white', 'borderBottom': '1px solid white', 'paddingTop': '10px', 'paddingBottom': '10px'}),
+                        # Por ejemplo, puedo agregar un dropdown para seleccionar opciones
+                        dcc.Dropdown(
+                            id='dropdown-option',
+                            options=[{'label': periodo, 'value': periodo} for periodo in PERIODOS],
+                            value='All',  # Valor por defecto
+                            clearable=False,
+                            style={'margin-bottom': '10px'}
+                        ),
+                        # # Otros componentes dcc aquí (botones, sliders, etc.)
+
+                        # dcc.Slider(3, 12, 3, value=12),
+
+                        # # Checkbox 1
+                        # dcc.Checklist(
+                        #     options=[
+                        #         {'label': 'Total', 'value': 'Total'},
+                        #         {'label': 'top 5 increase', 'value': 'top 5 increase'},
+                        #         {'label': 'top 5 decrease', 'value': 'top 5 decrease'},
+                        #     ],
+                        #     value=['Total'],
+                        #     style={'textAlign': 'center', 'color': 'white', 'margin-top': '15px', 'columnCount': 3, 'margin-bottom': '15px'}
+                        # ),
+
+                        # Checkbox 2: campos del maestro de pozos
+                        dcc.Checklist(
+                            id='filtro-campos',
+                            options=[{'label': campo, 'value': campo} for campo in indice.opciones('campos')],
+                            value=indice.opciones('campos'),
+                            style={'textAlign': 'center', 'color': 'white', 'margin-top': '15px', 'columnCount': 2, 'margin-bottom': '15px'},
+                        ),
+
+                        # Checkbox 3: propósito de los pozos
+                        dcc.Checklist(
+                            id='filtro-propositos',
+                            options=[{'label': proposito, 'value': proposito} for proposito in indice.opciones('propositos')],
+                            value=indice.opciones('propositos'),
+                            style={'textAlign': 'center', 'color': 'white', 'columnCount': 2, 'margin-bottom': '15px'},
+                        ),
+
+                        # Dropdown pero múltiple: sistemas de levantamiento del maestro de pozos
+                        dcc.Dropdown(
+                            indice.opciones('sistemas'), indice.opciones('sistemas'), style={'backgroundColor': '#000000', 'margin-top': '5px'},
+                            id='filtro-sistemas',
+                            multi=True
+                        ),
+
+                        # # Botón final
+                        # html.Div([
+                        #     dcc.Input(id='input-box', type='text'),
+                        #     html.Button('Submit', id='button-example-1'),
+                        #     html.Div(id='output-container-button', children='Enter a value and press submit', style={'color': 'white'}),
+                        #     html.Div(id='search-result', children='', style={'color': 'white'})
+                        # ])
+                    ]),
 
                 
-                # Agregar el gráfico de torta dentro de la misma columna pero separado
-                html.Div(style={'margin-top': '30px'}, children=[
-                    pie_card,
-                ]),
-
-                # Agregar el gráfico de torta dentro de la misma columna pero separado
-                html.Div(style={'margin-top': '30px'}, children=[
-                    hours_card,
-                ]),
+                    # Agregar el gráfico de torta dentro de la misma columna pero separado
+                    html.Div(style={'margin-top': '30px'}, children=[
+                        pie_card,
+                    ]),
+
+                    # Agregar el gráfico de torta dentro de la misma columna pero separado
+                    html.Div(style={'margin-top': '30px'}, children=[
+                        hours_card,
+                    ]),
                                 
-                html.Div(style={'margin-top': '30px'}, children=[
-                    Barrel_price_realtime_card,
-                ]),               
-        ]),
-
-        #Segunda columna
-        html.Div(style={'margin-left': '30px', 'display': 'flex', 'align-content': 'center', 'flex-direction': 'column', 'margin-top': '20px'}, children=[
-            # Primera fila de gráficas
-            html.Div(style={'display': 'flex'}, children=[
-                wells_location_card,  # Llama a la función para crear el mapa
-                html.Div(style={'margin-left': '30px'}, children=[
-                    oil_production_card,
-                ]),
-                html.Div(style={'margin-left': '30px'}, children=[
-                    gas_production_card,
-                ]),
+                    html.Div(style={'margin-top': '30px'}, children=[
+                        Barrel_price_realtime_card,
+                    ]),               
             ]),
 
-            # Segunda fila de gráficas
-            html.Div(style={'display': 'flex', 'margin-top': '30px'}, children=[
-                html.Div(style={'width': '50%', 'align': 'center'}, children=[
-                    wells_depth_card 
-                ]),
-                html.Div(style={'margin-left': '30px'}, children=[
-                    efficiency_card,
+            #Segunda columna
+            html.Div(style={'margin-left': '30px', 'display': 'flex', 'align-content': 'center', 'flex-direction': 'column', 'margin-top': '20px'}, children=[
+                # Primera fila de gráficas
+                html.Div(style={'display': 'flex'}, children=[
+                    wells_location_card,  # Llama a la función para crear el mapa
+                    html.Div(style={'margin-left': '30px'}, children=[
+                        oil_production_card,
+                    ]),
+                    html.Div(style={'margin-left': '30px'}, children=[
+                        gas_production_card,
+                    ]),
                 ]),
-                html.Div(style={'margin-left': '30px'}, children=[
-                    runstatus_card,
-                ]),
-            ]),
 
-            # Tercera fila de gráficas
-            html.Div(style={'display': 'flex', 'margin-top': '30px'}, children=[
-                html.Div(children=[
-                    Pruebas_card,
-                ]),
-                html.Div(style={'margin-left': '30px'}, children=[
-                    bopd_bwpd_card,
+                # Segunda fila de gráficas
+                html.Div(style={'display': 'flex', 'margin-top': '30px'}, children=[
+                    html.Div(style={'width': '50%', 'align': 'center'}, children=[
+                        wells_depth_card 
+                    ]),
+                    html.Div(style={'margin-left': '30px'}, children=[
+                        efficiency_card,
+                    ]),
+                    html.Div(style={'margin-left': '30px'}, children=[
+                        runstatus_card,
+                    ]),
                 ]),
-                html.Div(style={'margin-left': '30px'}, children=[
-                    API_card,  
-                ]),
-            ]),
 
-            # Cuarta fila de gráficas
-            html.Div(style={'display': 'flex', 'margin-top': '30px'}, children=[
-                html.Div(children=[
-                    wc_wor_card,
+                # Tercera fila de gráficas
+                html.Div(style={'display': 'flex', 'margin-top': '30px'}, children=[
+                    html.Div(children=[
+                        Pruebas_card,
+                    ]),
+                    html.Div(style={'margin-left': '30px'}, children=[
+                        bopd_bwpd_card,
+                    ]),
+                    html.Div(style={'margin-left': '30px'}, children=[
+                        API_card,  
+                    ]),
                 ]),
-                html.Div(style={'margin-left': '30px'}, children=[
-                    freq_caudal_card,
-                ]),
-                html.Div(style={'margin-left': '30px'}, children=[
-                     presion_caudal_card, 
+
+                # Cuarta fila de gráficas
+                html.Div(style={'display': 'flex', 'margin-top': '30px'}, children=[
+                    html.Div(children=[
+                        wc_wor_card,
+                    ]),
+                    html.Div(style={'margin-left': '30px'}, children=[
+                        freq_caudal_card,
+                    ]),
+                    html.Div(style={'margin-left': '30px'}, children=[
+                         presion_caudal_card, 
+                    ]),
                 ]),
-            ]),
 
-            # Quinta fila de gráficas
-            html.Div(style={'display': 'flex', 'margin-top': '30px'}, children=[
-                html.Div(children=[
-                    heatmap_card
+                # Quinta fila de gráficas
+                html.Div(style={'display': 'flex', 'margin-top': '30px'}, children=[
+                    html.Div(children=[
+                        heatmap_card
+                    ]),
+                    html.Div(style={'margin-left': '30px'}, children=[
+                        confiabilidad_card,
+                    ]),
                 ]),
             ]),
+
+            # Tercera columna
+            html.Div(
+                style={'width': '13%', 'margin-top': '20px', 'margin-left': '30px'},
+                children=[
+                    wells_card,
+                    top5minusoil_card,
+                    top5minusgas_card,
+                    alertas_card,
+                    # average_caudal_card
+                ],
+            ),
         ]),
+        html.Footer(children='Julieth Muñoz, Yulitza Parada, Silvio Pacheco (Geohallitians 2023)©', style={'textAlign': 'center', 'color': '#424242', 'align-items': 'end', 'margin': '0'})
+    ])
 
-        # Tercera columna
-        html.Div(
-            style={'width': '13%', 'margin-top': '20px', 'margin-left': '30px'},
-            children=[
-                wells_card,
-                top5minusoil_card,
-                top5minusgas_card,
-                alertas_card,
-                # average_caudal_card
-            ],
-        ),
-    ]),
-    html.Footer(children='Julieth Muñoz, Yulitza Parada, Silvio Pacheco (Geohallitians 2023)©', style={'textAlign': 'center', 'color': '#424242', 'align-items': 'end', 'margin': '0'})
-])
+app.layout = construir_layout
 
 # @app.callback(
 #     Output('search-result', 'children'),
@@ -2158,6 +1619,125 @@ app.layout = html.Div(style={'fontFamily': 'Lato', 'display': 'flex', 'flexDirec
 
 #     return ''
 
+def contenido_tarjeta(id_tarjeta, datos, filtros=()):
+    # Contenido de una tarjeta para el conjunto de datos y la clave de filtros (IndicePozos.clave).
+    # La versión sale del conjunto de datos y no del navegador, que puede tener una versión anterior.
+    fuentes, construir_contenido = contenido_tarjetas[id_tarjeta]
+    return figuras.obtener((id_tarjeta, datos.version(fuentes), filtros), lambda: construir_contenido(datos.filtrado(filtros)))
+
+# Un callback por tarjeta diferida, para que las tarjetas livianas se pinten sin esperar a las pesadas.
+# Se dispara al cargar la página, cada vez que cambia el dcc.Store de versión de la tarjeta y cuando cambian los filtros.
+def registrar_tarjeta(id_tarjeta):
+    entradas_filtros = [] if id_tarjeta in tarjetas_sin_filtros else [Input('filtros-tablero', 'data')]
+
+    @app.callback(
+        Output(f'contenido-{id_tarjeta}', 'children'),
+        Input(f'version-{id_tarjeta}', 'data'),
+        *entradas_filtros,
+    )
+    def renderizar_tarjeta(version, filtros=None):
+        return contenido_tarjeta(id_tarjeta, conjunto_actual(), clave_de_json(filtros))
+
+for id_tarjeta in contenido_tarjetas:
+    registrar_tarjeta(id_tarjeta)
+
+# Un callback por tabla paginada: devuelve solo la página pedida con el orden y el filtro de la tabla.
+# La primera página llega con la tarjeta, por eso no se ejecuta al insertar la tabla.
+def registrar_tabla(id_tabla):
+    @app.callback(
+        Output(id_tabla, 'data'),
+        Output(id_tabla, 'page_count'),
+        Input(id_tabla, 'page_current'),
+        Input(id_tabla, 'page_size'),
+        Input(id_tabla, 'sort_by'),
+        Input(id_tabla, 'filter_query'),
+        State('filtros-tablero', 'data'),
+        prevent_initial_call=True,
+    )
+    def paginar_tabla(page_current, page_size, sort_by, filter_query, filtros):
+        datos = conjunto_actual().filtrado(clave_de_json(filtros))
+        return tabla_servidor(datos, id_tabla).pagina(page_current, page_size, sort_by, filter_query)
+
+for id_tabla in tablas_servidor:
+    registrar_tabla(id_tabla)
+
+# Pozos del mapa: solo los que están dentro de la vista y cumplen los filtros, cada vez que el mapa termina de cargar
+# o de moverse y cuando cambian los filtros
+@app.callback(
+    Output('geojson-pozos', 'data'),
+    Output('resumen-mapa', 'children'),
+    Input('mapa-pozos', 'bounds'),
+    Input('filtros-tablero', 'data'),
+    prevent_initial_call=True,
+)
+def actualizar_vista_mapa(bounds, filtros):
+    if not bounds:
+        raise PreventUpdate
+    return pozos_en_vista(conjunto_actual().filtrado(clave_de_json(filtros)), bounds)
+
+# Popup del pozo en el que se hizo clic en el mapa: la torta de producción se arma solo para ese pozo
+@app.callback(
+    Output('popup-pozo', 'children'),
+    Input('geojson-pozos', 'clickData'),
+    State('filtros-tablero', 'data'),
+    prevent_initial_call=True,
+)
+def popup_pozo(feature, filtros):
+    # Un clic en un cluster solo acerca el mapa
+    if not feature or feature['properties'].get('cluster'):
+        raise PreventUpdate
+    # La torta muestra la producción del período filtrado
+    df_pozos = conjunto_actual().filtrado(clave_de_json(filtros)).df_pozos
+    well_id = feature['properties']['Well_Id']
+    if well_id not in df_pozos.index:
+        raise PreventUpdate
+    longitud, latitud = feature['geometry']['coordinates']
+    return dl.Popup(position=[latitud, longitud], children=html.Div([generate_pie_chart(df_pozos.loc[well_id])]))
+
+# En cada intervalo el navegador compara las versiones que ya muestra con las del conjunto de datos vigente
+# y solo actualiza el dcc.Store de las tarjetas cuyas tablas cambiaron. No ejecuta consultas.
+@app.callback(
+    Output('versiones-tarjetas', 'data'),
+    Output('ultima-actualizacion', 'children'),
+    Output('numero-pozos', 'children'),
+    *[Output(f'version-{id_tarjeta}', 'data') for id_tarjeta in contenido_tarjetas],
+    Input('intervalo-refresco', 'n_intervals'),
+    State('versiones-tarjetas', 'data'),
+    State('filtros-tablero', 'data'),
+    prevent_initial_call=True,
+)
+def revisar_versiones(n_intervals, versiones_cliente, filtros):
+    datos = conjunto_actual()
+    versiones = versiones_tarjetas(datos)
+    if versiones == versiones_cliente:
+        raise PreventUpdate
+
+    cambios = [
+        versiones[id_tarjeta] if versiones[id_tarjeta] != (versiones_cliente or {}).get(id_tarjeta) else dash.no_update
+        for id_tarjeta in contenido_tarjetas
+    ]
+    numero_de_pozos = datos.filtrado(clave_de_json(filtros)).numero_de_pozos
+    return (versiones, f'Last Updated: {datos.formatted_time} (Colombia Time)', f"{numero_de_pozos}", *cambios)
+
+# Filtros de la barra lateral: se normalizan en una clave que se guarda en el navegador. Las tarjetas, las tablas paginadas y el
+# mapa la usan para recortar en memoria el conjunto de datos vigente (ConjuntoDatos.filtrado); no se ejecutan consultas.
+@app.callback(
+    Output('filtros-tablero', 'data'),
+    Output('numero-pozos', 'children', allow_duplicate=True),
+    Input('dropdown-option', 'value'),
+    Input('filtro-campos', 'value'),
+    Input('filtro-sistemas', 'value'),
+    Input('filtro-propositos', 'value'),
+    State('filtros-tablero', 'data'),
+    prevent_initial_call=True,
+)
+def actualizar_filtros(periodo, campos, sistemas, propositos, filtros_cliente):
+    datos = conjunto_actual()
+    clave = datos.indice_pozos().clave(periodo, {'campos': campos or [], 'sistemas': sistemas or [], 'propositos': propositos or []})
+    if clave == clave_de_json(filtros_cliente):
+        raise PreventUpdate
+    return clave, f"{datos.filtrado(clave).numero_de_pozos}"
+
 # Callback para manejar los clics en los botones de exportación
 @app.callback(
     Output('btn-pdf', 'n_clicks'),
@@ -2176,19 +1756,22 @@ def export_dashboard(n_clicks_pdf, n_clicks_pptx, n_clicks_png):
     if not ctx.triggered:
         return [0, 0, 0]
 
+    # Importación diferida del módulo de exportación
+    import exportar
+
     # Si se hace clic en el botón de exportar a PDF
     if ctx.triggered[0]['prop_id'] == 'btn-pdf.n_clicks':
-        export_dashboard_to_pdf()
+        exportar.export_dashboard_to_pdf()
         return [0, 0, 0]
     
     # Si se hace clic en el botón de exportar a PowerPoint
     if ctx.triggered[0]['prop_id'] == 'btn-pptx.n_clicks':
-        create_custom_pptx()
+        exportar.create_custom_pptx()
         return [0, 0, 0]
 
     # Si se hace clic en el botón de exportar a PNG
     elif ctx.triggered[0]['prop_id'] == 'btn-png.n_clicks':
-        export_dashboard_to_png()
+        exportar.export_dashboard_to_png()
         return [0, 0, 0]
 
     return [0, 0, 0]
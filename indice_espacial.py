@@ -0,0 +1,60 @@
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+# Este modulo indexa los pozos por su ubicación (Geo_latitude/Geo_longitude) en una grilla de celdas de igual tamaño en grados
+# Cada celda guarda el rango de posiciones de sus pozos en un arreglo ordenado por celda, así una consulta por rectángulo
+# (la vista actual del mapa) solo revisa los pozos de las celdas que toca y no todos los de la cuenca.
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+
+import os
+import numpy as np
+
+# Tamaño de la celda en grados (0.25° son unos 28 km en el ecuador)
+TAMANO_CELDA = float(os.environ.get("GEOHALLITIANS_CELDA_MAPA", "0.25"))
+
+
+class IndiceEspacial:
+
+    def __init__(self, latitudes, longitudes, tamano_celda=TAMANO_CELDA):
+        if tamano_celda <= 0:
+            raise ValueError(f"El tamaño de celda debe ser positivo: {tamano_celda}")
+        self.tamano_celda = tamano_celda
+        self.latitudes = np.asarray(latitudes, dtype=float)
+        self.longitudes = np.asarray(longitudes, dtype=float)
+
+        # Los pozos sin coordenadas no se indexan: nunca aparecen en una vista
+        validos = np.flatnonzero(np.isfinite(self.latitudes) & np.isfinite(self.longitudes))
+        filas = np.floor(self.latitudes[validos] / tamano_celda).astype(np.int64)
+        columnas = np.floor(self.longitudes[validos] / tamano_celda).astype(np.int64)
+
+        # Posiciones ordenadas por celda y, para cada celda con pozos, su tramo [inicio, fin) en ese orden
+        orden = np.lexsort((columnas, filas))
+        self.posiciones = validos[orden]
+        celdas, inicios, conteos = np.unique(np.column_stack((filas[orden], columnas[orden])), axis=0, return_index=True, return_counts=True)
+        self.celdas = {(fila, columna): (inicio, inicio + conteo) for (fila, columna), inicio, conteo in zip(celdas.tolist(), inicios.tolist(), conteos.tolist())}
+
+    def __len__(self):
+        return len(self.posiciones)
+
+    def consultar(self, sur, oeste, norte, este):
+        # Posiciones (en el orden original) de los pozos dentro del rectángulo, bordes incluidos
+        fila_min, fila_max = int(np.floor(sur / self.tamano_celda)), int(np.floor(norte / self.tamano_celda))
+        columna_min, columna_max = int(np.floor(oeste / self.tamano_celda)), int(np.floor(este / self.tamano_celda))
+
+        # Con una vista muy alejada el rectángulo cubre más celdas de las que tienen pozos: se recorren solo las ocupadas
+        if (fila_max - fila_min + 1) * (columna_max - columna_min + 1) > len(self.celdas):
+            tramos = [tramo for (fila, columna), tramo in self.celdas.items()
+                      if fila_min <= fila <= fila_max and columna_min <= columna <= columna_max]
+        else:
+            tramos = [self.celdas[(fila, columna)]
+                      for fila in range(fila_min, fila_max + 1)
+                      for columna in range(columna_min, columna_max + 1)
+                      if (fila, columna) in self.celdas]
+        if not tramos:
+            return np.empty(0, dtype=np.int64)
+
+        candidatos = np.concatenate([self.posiciones[inicio:fin] for inicio, fin in tramos])
+        # Las celdas del borde pueden quedar parcialmente fuera de la vista
+        dentro = (
+            (self.latitudes[candidatos] >= sur) & (self.latitudes[candidatos] <= norte)
+            & (self.longitudes[candidatos] >= oeste) & (self.longitudes[candidatos] <= este)
+        )
+        return np.sort(candidatos[dentro])
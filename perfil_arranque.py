@@ -0,0 +1,76 @@
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+# Este modulo mide cuánto tiempo y memoria (RSS) cuesta importar cada dependencia del dashboard
+# Uso: python perfil_arranque.py [--dashboard]
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+
+import sys
+import json
+import subprocess
+
+# Dependencias que carga el dashboard al iniciar y las de exportación, que ahora se cargan solo al hacer clic
+DEPENDENCIAS = [
+    "numpy",
+    "pandas",
+    "pytz",
+    "mysql.connector",
+    "plotly.graph_objs",
+    "plotly.express",
+    "dash",
+    "dash_table",
+    "dash_leaflet",
+    "pyarrow.parquet",
+    "img2pdf",
+    "pptx",
+    "PIL.Image",
+    "openpyxl",
+    "seaborn",
+    "matplotlib.pyplot",
+    "exportar",
+]
+
+# Cada medición corre en un intérprete nuevo para que una dependencia no se beneficie de lo que importó otra
+_SCRIPT_MEDICION = """
+import json, sys, time, importlib, psutil
+proceso = psutil.Process()
+rss_antes = proceso.memory_info().rss
+inicio = time.perf_counter()
+error = None
+try:
+    importlib.import_module(sys.argv[1])
+except Exception as err:
+    error = f"{type(err).__name__}: {err}"
+segundos = time.perf_counter() - inicio
+print(json.dumps({"segundos": segundos, "mb": (proceso.memory_info().rss - rss_antes) / 2**20, "error": error}))
+"""
+
+def medir_importacion(modulo):
+    salida = subprocess.run(
+        [sys.executable, "-c", _SCRIPT_MEDICION, modulo],
+        capture_output=True,
+        text=True,
+    )
+    try:
+        # La última línea es el resultado; lo anterior es lo que imprime el propio módulo al importarse
+        return json.loads(salida.stdout.strip().splitlines()[-1])
+    except (IndexError, ValueError):
+        return {"segundos": None, "mb": None, "error": salida.stderr.strip().splitlines()[-1] if salida.stderr.strip() else "sin salida"}
+
+def perfil_arranque(modulos=DEPENDENCIAS):
+    resultados = {modulo: medir_importacion(modulo) for modulo in modulos}
+
+    print(f"{'Dependencia':<35}{'Tiempo (s)':>12}{'RSS (MB)':>12}")
+    for modulo, resultado in sorted(resultados.items(), key=lambda item: -(item[1]["segundos"] or 0)):
+        if resultado["error"]:
+            print(f"{modulo:<35}{'-':>12}{'-':>12}  ({resultado['error']})")
+        else:
+            print(f"{modulo:<35}{resultado['segundos']:>12.3f}{resultado['mb']:>12.1f}")
+
+    return resultados
+
+
+if __name__ == "__main__":
+    modulos = list(DEPENDENCIAS)
+    if "--dashboard" in sys.argv:
+        # Arranque completo del dashboard (necesita acceso a la base de datos o GEOHALLITIANS_BACKEND=sqlite)
+        modulos.append("final_dashboard_geohallitians")
+    perfil_arranque(modulos)
@@ -0,0 +1,280 @@
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+# Este modulo mantiene un perfil aproximado de cada columna de las tablas fuente con resúmenes combinables (sketches):
+# nulos, valores distintos (HyperLogLog), cuantiles (compactadores tipo KLL) y mínimo/máximo.
+# La primera vez se recorre la tabla por bloques; después solo se leen las filas posteriores a la marca de agua y se combinan
+# con el perfil guardado, así que el costo de cada refresco depende de las filas nuevas y no del tamaño de la historia.
+# Uso: python perfiles_columnas.py [--completo]
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+
+import os
+import time
+import pickle
+import threading
+import numpy as np
+import pandas as pd
+from utils import conexion_bd
+from cache_consultas import COLUMNAS_MARCA
+
+DIRECTORIO_PERFILES = os.environ.get(
+    "GEOHALLITIANS_PERFILES_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "perfiles"),
+)
+
+# Filas por bloque al recorrer una tabla
+FILAS_POR_BLOQUE = 200_000
+
+# Cuantiles que se muestran en la tarjeta
+CUANTILES = (0.01, 0.5, 0.99)
+
+_locks = {tabla: threading.Lock() for tabla in COLUMNAS_MARCA}
+
+
+def _longitud_bits(valores):
+    # Número de bits de cada entero sin signo (valores > 0), por búsqueda binaria vectorizada
+    valores = valores.copy()
+    longitud = np.ones(valores.shape, dtype=np.int64)
+    for desplazamiento in (32, 16, 8, 4, 2, 1):
+        mascara = valores >= (np.uint64(1) << np.uint64(desplazamiento))
+        longitud[mascara] += desplazamiento
+        valores[mascara] >>= np.uint64(desplazamiento)
+    return longitud
+
+
+class HyperLogLog:
+    # Conteo aproximado de valores distintos con 2^p registros (error típico 1.04 / sqrt(2^p), 1.6 % con p = 12)
+
+    def __init__(self, p=12):
+        self.p = p
+        self.registros = np.zeros(1 << p, dtype=np.uint8)
+
+    def actualizar(self, valores):
+        if len(valores) == 0:
+            return
+        hashes = pd.util.hash_array(np.asarray(valores))
+        indice = (hashes >> np.uint64(64 - self.p)).astype(np.int64)
+        # Bits restantes con un bit de guarda para que el rango no pase de 64 - p + 1
+        resto = (hashes << np.uint64(self.p)) | np.uint64(1 << (self.p - 1))
+        rango = (65 - _longitud_bits(resto)).astype(np.uint8)
+        np.maximum.at(self.registros, indice, rango)
+
+    def combinar(self, otro):
+        np.maximum(self.registros, otro.registros, out=self.registros)
+
+    def estimar(self):
+        m = len(self.registros)
+        alfa = 0.7213 / (1 + 1.079 / m)
+        estimado = alfa * m * m / np.sum(np.ldexp(1.0, -self.registros.astype(np.int64)))
+        vacios = int(np.count_nonzero(self.registros == 0))
+        if estimado <= 2.5 * m and vacios:
+            # Corrección para pocos valores: conteo lineal sobre los registros vacíos
+            estimado = m * np.log(m / vacios)
+        return int(round(estimado))
+
+
+class CuantilesKLL:
+    # Cuantiles aproximados con compactadores por nivel: cada compactación ordena un nivel y sube la mitad de sus elementos
+    # (pares o impares al azar) al nivel siguiente, donde cada elemento pesa el doble. Guarda del orden de k elementos.
+
+    def __init__(self, k=200):
+        self.k = k
+        self.n = 0
+        self.niveles = [np.empty(0)]
+        self._rng = np.random.default_rng()
+
+    def _capacidad(self, nivel):
+        return max(int(np.ceil(self.k * (2 / 3) ** (len(self.niveles) - nivel - 1))), 2)
+
+    def _compactar(self):
+        nivel = 0
+        while nivel < len(self.niveles):
+            if len(self.niveles[nivel]) > self._capacidad(nivel):
+                if nivel + 1 == len(self.niveles):
+                    self.niveles.append(np.empty(0))
+                elementos = np.sort(self.niveles[nivel])
+                # Con una cantidad impar, el último elemento se queda en su nivel
+                sobrante = elementos[len(elementos) - len(elementos) % 2:]
+                subidos = elementos[self._rng.integers(2):len(elementos) - len(sobrante):2]
+                self.niveles[nivel] = sobrante
+                self.niveles[nivel + 1] = np.concatenate([self.niveles[nivel + 1], subidos])
+            nivel += 1
+
+    def actualizar(self, valores):
+        valores = np.asarray(valores, dtype=float)
+        valores = valores[~np.isnan(valores)]
+        if len(valores) == 0:
+            return
+        self.n += len(valores)
+        self.niveles[0] = np.concatenate([self.niveles[0], valores])
+        self._compactar()
+
+    def combinar(self, otro):
+        while len(self.niveles) < len(otro.niveles):
+            self.niveles.append(np.empty(0))
+        for nivel, elementos in enumerate(otro.niveles):
+            self.niveles[nivel] = np.concatenate([self.niveles[nivel], elementos])
+        self.n += otro.n
+        self._compactar()
+
+    def cuantiles(self, probabilidades):
+        elementos = np.concatenate(self.niveles)
+        if len(elementos) == 0:
+            return [np.nan] * len(probabilidades)
+        pesos = np.concatenate([np.full(len(nivel), 2.0 ** altura) for altura, nivel in enumerate(self.niveles)])
+        orden = np.argsort(elementos, kind="stable")
+        acumulado = np.cumsum(pesos[orden])
+        posiciones = np.searchsorted(acumulado, np.asarray(probabilidades) * acumulado[-1], side="left")
+        return elementos[orden][np.minimum(posiciones, len(elementos) - 1)].tolist()
+
+
+class PerfilColumna:
+    # Perfil combinable de una columna. El tipo (número, fecha o texto) se fija con el primer bloque que trae valores.
+
+    def __init__(self):
+        self.tipo = None
+        self.filas = 0
+        self.nulos = 0
+        self.minimo = None
+        self.maximo = None
+        self.distintos = HyperLogLog()
+        self.cuantiles = CuantilesKLL()
+
+    def _normalizar(self, valores):
+        if self.tipo is None:
+            if pd.api.types.is_bool_dtype(valores):
+                self.tipo = "texto"
+            elif pd.api.types.is_numeric_dtype(valores):
+                self.tipo = "numero"
+            elif pd.api.types.is_datetime64_any_dtype(valores):
+                self.tipo = "fecha"
+            else:
+                self.tipo = "texto"
+        # Mismo tipo en todos los bloques, para que un 5 entero y un 5.0 tengan el mismo hash
+        if self.tipo == "numero":
+            return pd.to_numeric(valores, errors="coerce").dropna().astype(float)
+        if self.tipo == "fecha":
+            return pd.to_datetime(valores, errors="coerce").dropna()
+        return valores.astype(str)
+
+    def actualizar(self, serie):
+        self.filas += len(serie)
+        valores = serie.dropna()
+        self.nulos += len(serie) - len(valores)
+        if valores.empty:
+            return
+        valores = self._normalizar(valores)
+        if valores.empty:
+            return
+
+        self.distintos.actualizar(valores.to_numpy() if self.tipo != "fecha" else valores.astype("int64").to_numpy())
+        if self.tipo == "numero":
+            self.cuantiles.actualizar(valores.to_numpy())
+        minimo, maximo = valores.min(), valores.max()
+        self.minimo = minimo if self.minimo is None else min(self.minimo, minimo)
+        self.maximo = maximo if self.maximo is None else max(self.maximo, maximo)
+
+    def combinar(self, otro):
+        self.tipo = self.tipo or otro.tipo
+        self.filas += otro.filas
+        self.nulos += otro.nulos
+        self.distintos.combinar(otro.distintos)
+        self.cuantiles.combinar(otro.cuantiles)
+        for valor in (otro.minimo, otro.maximo):
+            if valor is not None:
+                self.minimo = valor if self.minimo is None else min(self.minimo, valor)
+                self.maximo = valor if self.maximo is None else max(self.maximo, valor)
+
+
+def _ruta_perfil(tabla):
+    return os.path.join(DIRECTORIO_PERFILES, f"{tabla}.pkl")
+
+def leer_perfil(tabla):
+    try:
+        with open(_ruta_perfil(tabla), "rb") as archivo:
+            return pickle.load(archivo)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        return None
+
+def _guardar_perfil(tabla, perfil):
+    # Reemplazo atómico para que otro worker nunca lea un archivo a medio escribir
+    os.makedirs(DIRECTORIO_PERFILES, exist_ok=True)
+    ruta = _ruta_perfil(tabla)
+    temporal = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporal, "wb") as archivo:
+        pickle.dump(perfil, archivo, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporal, ruta)
+
+def _recorrer(conexion, sql, params, perfil):
+    # Actualiza el perfil bloque por bloque; nunca hay más de FILAS_POR_BLOQUE filas en memoria
+    for bloque in pd.read_sql(sql, conexion, params=params, chunksize=FILAS_POR_BLOQUE):
+        for columna in bloque.columns:
+            perfil["columnas"].setdefault(columna, PerfilColumna()).actualizar(bloque[columna])
+        perfil["filas"] += len(bloque)
+
+def actualizar_perfil(conexion, tabla, completo=False):
+    columna = COLUMNAS_MARCA[tabla]
+    with _locks[tabla]:
+        perfil = None if completo or columna is None else leer_perfil(tabla)
+        cursor = conexion.cursor()
+        if columna:
+            cursor.execute(f"SELECT COUNT(*), MAX({columna}) FROM {tabla}")
+        else:
+            cursor.execute(f"SELECT COUNT(*), NULL FROM {tabla}")
+        total, nueva_marca = cursor.fetchone()
+        cursor.close()
+
+        if perfil is not None:
+            if perfil["marca"] == str(nueva_marca) and perfil["filas"] == total:
+                return perfil
+            # Filas nuevas solo después de la marca: se combinan con lo guardado. Si hubo borrados o filas con fecha
+            # anterior a la marca (otra cantidad de filas al terminar), se reconstruye desde cero.
+            nuevo = {"marca": str(nueva_marca), "filas": 0, "columnas": {}}
+            _recorrer(conexion, f"SELECT * FROM {tabla} WHERE {columna} > %s AND {columna} <= %s", (perfil["marca"], str(nueva_marca)), nuevo)
+            if perfil["filas"] + nuevo["filas"] == total:
+                for nombre, perfil_columna in nuevo["columnas"].items():
+                    perfil["columnas"].setdefault(nombre, PerfilColumna()).combinar(perfil_columna)
+                perfil["filas"] += nuevo["filas"]
+                perfil["marca"] = str(nueva_marca)
+                _guardar_perfil(tabla, perfil)
+                return perfil
+
+        # Recorrido completo (también para las tablas sin columna de fecha, que son pequeñas)
+        perfil = {"marca": str(nueva_marca), "filas": 0, "columnas": {}}
+        if columna and nueva_marca is not None:
+            _recorrer(conexion, f"SELECT * FROM {tabla} WHERE {columna} <= %s OR {columna} IS NULL", (str(nueva_marca),), perfil)
+        else:
+            _recorrer(conexion, f"SELECT * FROM {tabla}", None, perfil)
+        _guardar_perfil(tabla, perfil)
+        return perfil
+
+def resumen_perfiles(perfiles):
+    # Una fila por tabla y columna con los valores estimados de cada sketch
+    filas = []
+    for tabla, perfil in perfiles.items():
+        for nombre, columna in perfil["columnas"].items():
+            cuantiles = columna.cuantiles.cuantiles(CUANTILES) if columna.tipo == "numero" else [None] * len(CUANTILES)
+            filas.append({
+                "Tabla": tabla,
+                "Columna": nombre,
+                "Tipo": columna.tipo,
+                "Filas": columna.filas,
+                "Nulos": columna.nulos,
+                "Distintos": columna.distintos.estimar(),
+                "Minimo": columna.minimo,
+                **{f"P{int(probabilidad * 100):02d}": valor for probabilidad, valor in zip(CUANTILES, cuantiles)},
+                "Maximo": columna.maximo,
+            })
+    return pd.DataFrame(filas)
+
+def perfiles_actualizados(tablas=tuple(COLUMNAS_MARCA), completo=False):
+    # Incorpora las filas nuevas de cada tabla a su perfil y devuelve el resumen de todas las columnas
+    inicio = time.perf_counter()
+    with conexion_bd() as conexion:
+        perfiles = {tabla: actualizar_perfil(conexion, tabla, completo=completo) for tabla in tablas}
+    print(f"Perfiles de columnas actualizados en {time.perf_counter() - inicio:.2f} s")
+    return resumen_perfiles(perfiles)
+
+
+if __name__ == "__main__":
+    import sys
+    with pd.option_context("display.max_rows", None, "display.width", 200):
+        print(perfiles_actualizados(completo="--completo" in sys.argv))
@@ -0,0 +1,77 @@
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+# Este modulo guarda en memoria el contenido ya construido de las tarjetas del dashboard (figuras, tablas, mapas)
+# Clave = (id de la tarjeta, versión de sus tablas fuente, estado de los filtros). Las funciones que construyen las tarjetas
+# no modifican los datos que reciben, así que el mismo contenido sirve para todos los navegadores y callbacks que pidan esa clave:
+# se construye una sola vez y se reutiliza hasta que cambie la versión de los datos o se expulse por falta de uso (LRU).
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+
+import os
+import threading
+from collections import OrderedDict
+
+# Contenidos guardados como máximo: alcanza para todas las tarjetas de varias versiones de los datos y combinaciones de filtros
+MAX_FIGURAS = int(os.environ.get("GEOHALLITIANS_MAX_FIGURAS", "256"))
+
+
+class RegistroFiguras:
+    def __init__(self, max_entradas=MAX_FIGURAS):
+        if max_entradas < 1:
+            raise ValueError(f"El registro de figuras debe guardar al menos una entrada: {max_entradas}")
+        self.max_entradas = max_entradas
+
+        self._entradas = OrderedDict()  # clave -> contenido, en orden de uso (LRU)
+        self._en_construccion = {}      # clave -> threading.Event de quien la está construyendo
+        self._lock = threading.Lock()
+
+        self.aciertos = 0
+        self.esperas = 0
+        self.fallos = 0
+        self.expulsiones = 0
+
+    def obtener(self, clave, construir):
+        # construir: función sin argumentos que arma el contenido. Si otro callback ya está construyendo la misma clave
+        # se espera su resultado en vez de construirlo de nuevo.
+        while True:
+            with self._lock:
+                if clave in self._entradas:
+                    self._entradas.move_to_end(clave)
+                    self.aciertos += 1
+                    return self._entradas[clave]
+                evento = self._en_construccion.get(clave)
+                if evento is None:
+                    evento = self._en_construccion[clave] = threading.Event()
+                    self.fallos += 1
+                    break
+                self.esperas += 1
+            # Si quien construía falló, la clave no queda guardada y en la siguiente vuelta la construye este callback
+            evento.wait()
+
+        try:
+            contenido = construir()
+            with self._lock:
+                self._entradas[clave] = contenido
+                while len(self._entradas) > self.max_entradas:
+                    self._entradas.popitem(last=False)
+                    self.expulsiones += 1
+            return contenido
+        finally:
+            with self._lock:
+                del self._en_construccion[clave]
+            evento.set()
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+
+    def estadisticas(self):
+        with self._lock:
+            # Un callback que esperó a otro cuenta también como acierto cuando encuentra el contenido ya guardado
+            pedidos = self.aciertos + self.fallos
+            return {
+                "entradas": len(self._entradas),
+                "aciertos": self.aciertos,
+                "esperas": self.esperas,
+                "fallos": self.fallos,
+                "expulsiones": self.expulsiones,
+                "tasa_aciertos": self.aciertos / pedidos if pedidos else 0.0,
+            }
@@ -0,0 +1,241 @@
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+# Este modulo define el lenguaje de reglas de alertas y lo compila a operaciones vectorizadas de pandas/NumPy
+# Cada regla es una condición sobre las columnas diarias de un pozo (promedio, mínimo y máximo de cada medida de
+# rollup_criticas_diario), por ejemplo "BOPD < 0.10 * media(BOPD, 30)". Todas las reglas se evalúan juntas sobre el mismo
+# DataFrame ordenado por pozo y día, y las subexpresiones repetidas entre reglas se calculan una sola vez.
+# Las reglas se leen de reglas_alertas.json, o del archivo indicado en GEOHALLITIANS_REGLAS_ALERTAS (JSON o YAML).
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+
+import os
+import ast
+import json
+import time
+import numpy as np
+import pandas as pd
+
+ARCHIVO_REGLAS = os.environ.get(
+    "GEOHALLITIANS_REGLAS_ALERTAS",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "reglas_alertas.json"),
+)
+
+# Funciones del lenguaje -> (argumentos mínimos, argumentos máximos)
+#   media(x, dias) / mediana(x, dias) / minimo(x, dias) / maximo(x, dias): estadístico de los días anteriores del pozo
+#       dentro de la ventana, sin incluir el propio día
+#   anterior(x[, k]): valor del pozo k días con datos antes (1 por defecto)
+#   racha(condicion): días seguidos del pozo en que se cumple la condición, contando el propio día
+#   abs(x): valor absoluto
+FUNCIONES = {
+    "media": (2, 2),
+    "mediana": (2, 2),
+    "minimo": (2, 2),
+    "maximo": (2, 2),
+    "anterior": (1, 2),
+    "racha": (1, 1),
+    "abs": (1, 1),
+}
+
+_ESTADISTICOS_MOVILES = {"media": "mean", "mediana": "median", "minimo": "min", "maximo": "max"}
+
+_OPERADORES = {
+    ast.Add: np.add,
+    ast.Sub: np.subtract,
+    ast.Mult: np.multiply,
+    ast.Div: np.divide,
+}
+
+_COMPARADORES = {
+    ast.Lt: np.less,
+    ast.LtE: np.less_equal,
+    ast.Gt: np.greater,
+    ast.GtE: np.greater_equal,
+    ast.Eq: np.equal,
+    ast.NotEq: np.not_equal,
+}
+
+
+class ContextoEvaluacion:
+    # Datos diarios de todos los pozos (ordenados por pozo y día) y resultados ya calculados de cada subexpresión
+
+    def __init__(self, diario):
+        self.diario = diario
+        self.grupos = pd.factorize(diario["Well_Id"])[0]
+        self.dias = pd.to_datetime(diario["Dia"]).to_numpy()
+        self.resultados = {}
+        self.reutilizados = 0
+
+    def columna(self, nombre):
+        return self.diario[nombre].to_numpy(dtype=float)
+
+    def movil(self, valores, dias, estadistico):
+        marco = pd.DataFrame({"grupo": self.grupos, "Dia": self.dias, "valor": valores})
+        movil = marco.groupby("grupo").rolling(f"{dias}D", on="Dia", closed="left", min_periods=max(1, dias // 3))["valor"]
+        # Mismo orden que el DataFrame diario (ordenado por pozo y día, como los grupos)
+        return getattr(movil, estadistico)().to_numpy()
+
+    def anterior(self, valores, pasos):
+        return pd.Series(valores).groupby(self.grupos).shift(pasos).to_numpy(dtype=float)
+
+    def racha(self, condicion):
+        condicion = np.asarray(condicion, dtype=bool)
+        # Un bloque nuevo empieza en cada día sin la condición, en el primer día de cada pozo y después de días sin datos:
+        # la racha cuenta días de calendario seguidos, igual que las ventanas de movil
+        nuevo_pozo = np.r_[True, self.grupos[1:] != self.grupos[:-1]]
+        salto = np.r_[True, np.diff(self.dias) > np.timedelta64(1, "D")]
+        bloques = np.cumsum(~condicion | nuevo_pozo | salto)
+        return pd.Series(condicion.astype(int)).groupby(bloques).cumsum().to_numpy()
+
+
+def _constante(nodo, descripcion):
+    if not isinstance(nodo, ast.Constant) or not isinstance(nodo.value, (int, float)) or nodo.value <= 0:
+        raise ValueError(f"{descripcion} debe ser un número positivo")
+    return int(nodo.value)
+
+def compilar_expresion(texto, columnas):
+    # Devuelve (función(contexto) -> arreglo, días de historia que necesita la expresión)
+    try:
+        arbol = ast.parse(texto, mode="eval").body
+    except SyntaxError as err:
+        raise ValueError(f"Expresión inválida '{texto}': {err.msg}") from None
+
+    def compilar(nodo):
+        clave = ast.dump(nodo)
+
+        if isinstance(nodo, ast.Constant) and isinstance(nodo.value, (int, float)) and not isinstance(nodo.value, bool):
+            valor = float(nodo.value)
+            return (lambda contexto: valor), 0
+
+        if isinstance(nodo, ast.Name):
+            if nodo.id not in columnas:
+                raise ValueError(f"Columna desconocida '{nodo.id}' en '{texto}'")
+            evaluar = lambda contexto: contexto.columna(nodo.id)
+            historia = 0
+
+        elif isinstance(nodo, ast.BinOp) and type(nodo.op) in _OPERADORES:
+            (izquierda, h1), (derecha, h2) = compilar(nodo.left), compilar(nodo.right)
+            operador = _OPERADORES[type(nodo.op)]
+            evaluar = lambda contexto: operador(izquierda(contexto), derecha(contexto))
+            historia = max(h1, h2)
+
+        elif isinstance(nodo, ast.UnaryOp) and isinstance(nodo.op, (ast.USub, ast.Not)):
+            operando, historia = compilar(nodo.operand)
+            operador = np.negative if isinstance(nodo.op, ast.USub) else np.logical_not
+            evaluar = lambda contexto: operador(operando(contexto))
+
+        elif isinstance(nodo, ast.BoolOp):
+            partes = [compilar(valor) for valor in nodo.values]
+            operador = np.logical_and if isinstance(nodo.op, ast.And) else np.logical_or
+            evaluar = lambda contexto: operador.reduce([parte(contexto) for parte, _ in partes])
+            historia = max(h for _, h in partes)
+
+        elif isinstance(nodo, ast.Compare) and all(type(op) in _COMPARADORES for op in nodo.ops):
+            # Comparaciones encadenadas (a < b < c) como en Python
+            operandos = [compilar(nodo.left)] + [compilar(valor) for valor in nodo.comparators]
+            comparadores = [_COMPARADORES[type(op)] for op in nodo.ops]
+
+            def evaluar(contexto):
+                valores = [operando(contexto) for operando, _ in operandos]
+                with np.errstate(invalid="ignore"):
+                    return np.logical_and.reduce([comparar(a, b) for comparar, a, b in zip(comparadores, valores, valores[1:])])
+            historia = max(h for _, h in operandos)
+
+        elif isinstance(nodo, ast.Call) and isinstance(nodo.func, ast.Name) and nodo.func.id in FUNCIONES:
+            nombre = nodo.func.id
+            minimo, maximo = FUNCIONES[nombre]
+            if nodo.keywords or not minimo <= len(nodo.args) <= maximo:
+                raise ValueError(f"'{nombre}' recibe entre {minimo} y {maximo} argumentos en '{texto}'")
+            argumento, historia = compilar(nodo.args[0])
+
+            if nombre in _ESTADISTICOS_MOVILES:
+                dias = _constante(nodo.args[1], f"La ventana de '{nombre}'")
+                estadistico = _ESTADISTICOS_MOVILES[nombre]
+                evaluar = lambda contexto: contexto.movil(argumento(contexto), dias, estadistico)
+                historia += dias
+            elif nombre == "anterior":
+                pasos = _constante(nodo.args[1], "Los días de 'anterior'") if len(nodo.args) > 1 else 1
+                evaluar = lambda contexto: contexto.anterior(argumento(contexto), pasos)
+                historia += pasos
+            elif nombre == "racha":
+                evaluar = lambda contexto: contexto.racha(argumento(contexto))
+            else:
+                evaluar = lambda contexto: np.abs(argumento(contexto))
+
+        else:
+            raise ValueError(f"Operación no permitida en '{texto}': {ast.unparse(nodo)}")
+
+        def con_cache(contexto):
+            # Subexpresión compartida entre reglas (por ejemplo media(BOPD, 30)): se calcula una vez por evaluación
+            if clave in contexto.resultados:
+                contexto.reutilizados += 1
+                return contexto.resultados[clave]
+            resultado = contexto.resultados[clave] = evaluar(contexto)
+            return resultado
+
+        return con_cache, historia
+
+    return compilar(arbol)
+
+
+class ReglaAlerta:
+
+    def __init__(self, definicion, columnas):
+        faltantes = {"nombre", "condicion"} - set(definicion)
+        if faltantes:
+            raise ValueError(f"Regla sin {', '.join(sorted(faltantes))}: {definicion}")
+        self.nombre = definicion["nombre"]
+        self.descripcion = definicion.get("descripcion", self.nombre)
+        self.texto = definicion["condicion"]
+        try:
+            self.condicion, historia = compilar_expresion(self.texto, columnas)
+            # Valor que se muestra en la alerta y valor de referencia contra el que se compara (opcionales)
+            self.valor, historia_valor = compilar_expresion(definicion["valor"], columnas) if definicion.get("valor") else (None, 0)
+            self.referencia, historia_referencia = compilar_expresion(definicion["referencia"], columnas) if definicion.get("referencia") else (None, 0)
+        except ValueError as err:
+            raise ValueError(f"Regla '{self.nombre}': {err}") from None
+        self.dias_historia = max(historia, historia_valor, historia_referencia)
+
+
+def cargar_reglas(columnas, archivo=ARCHIVO_REGLAS):
+    with open(archivo, encoding="utf-8") as contenido:
+        if archivo.endswith((".yaml", ".yml")):
+            # PyYAML solo hace falta si las reglas se escriben en YAML
+            import yaml
+            definiciones = yaml.safe_load(contenido)
+        else:
+            definiciones = json.load(contenido)
+    reglas = [ReglaAlerta(definicion, columnas) for definicion in definiciones["reglas"]]
+
+    nombres = [regla.nombre for regla in reglas]
+    repetidos = {nombre for nombre in nombres if nombres.count(nombre) > 1}
+    if repetidos:
+        raise ValueError(f"Reglas con nombre repetido: {', '.join(sorted(repetidos))}")
+    return reglas
+
+def _arreglo(valores, filas):
+    # Las expresiones constantes devuelven un escalar: se repite para todas las filas
+    return np.broadcast_to(np.asarray(valores, dtype=float), (filas,))
+
+def evaluar_reglas(reglas, diario):
+    # Evalúa todas las reglas sobre 'diario' (una fila por pozo y día, ordenado por pozo y día).
+    # Devuelve las filas que dispararon cada regla y el costo de cada una; el tiempo de una subexpresión compartida
+    # se cuenta en la primera regla que la usa.
+    contexto = ContextoEvaluacion(diario)
+    disparos, costos = [], []
+    for regla in reglas:
+        inicio = time.perf_counter()
+        reutilizados = contexto.reutilizados
+        filas = np.flatnonzero(_arreglo(regla.condicion(contexto), len(diario)) != 0)
+        if len(filas):
+            disparos.append(pd.DataFrame({
+                "Regla": regla.nombre,
+                "Fila": filas,
+                "Valor": _arreglo(regla.valor(contexto), len(diario))[filas] if regla.valor else np.nan,
+                "Referencia": _arreglo(regla.referencia(contexto), len(diario))[filas] if regla.referencia else np.nan,
+            }))
+        costos.append({
+            "Regla": regla.nombre,
+            "Segundos": time.perf_counter() - inicio,
+            "Filas_Alerta": len(filas),
+            "Subexpresiones_Reutilizadas": contexto.reutilizados - reutilizados,
+        })
+    columnas = ["Regla", "Fila", "Valor", "Referencia"]
+    return (pd.concat(disparos, ignore_index=True) if disparos else pd.DataFrame(columns=columnas)), pd.DataFrame(costos)
@@ -0,0 +1,174 @@
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+# Este modulo mantiene tablas resumen diarias por pozo en la misma base de datos, actualizadas de forma incremental:
+# en cada refresco solo se recalculan los días que recibieron filas nuevas (predicado de rango sobre la columna de fecha).
+# Cada fila guarda estados combinables (ver agregados.py), así que semanas, meses o años se calculan sin volver a la tabla fuente.
+# Uso: python rollups.py [--completo]
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+
+import time
+import threading
+from utils import bloqueo_bd, conexion_bd
+from agregados import ESTADOS, columna_estado
+
+# Tabla resumen -> tabla fuente, columna de fecha y medidas. Por cada medida se guarda su estado en el día:
+# suma, conteo de valores no nulos, mínimo, máximo y suma de cuadrados.
+ROLLUPS = {
+    "rollup_criticas_diario": {
+        "fuente": "critical_variables_updated",
+        "columna_fecha": "Date",
+        "medidas": ["Presion_intake", "Freq", "Caudal", "WOR", "WCUT", "BWPD", "BOPD", "Run_Status"],
+    },
+    "rollup_volumetrica_diario": {
+        "fuente": "data_diaria_volumetrica_updated",
+        "columna_fecha": "Volume_Date",
+        "medidas": ["Oil", "Gas", "Water", "Hours", "OIL QUALITY"],
+    },
+}
+
+# Marca de agua de cada tabla resumen: fecha máxima de la fuente incluida en el último refresco
+TABLA_MARCAS = "rollup_marcas"
+
+# Candado entre procesos de las tablas resumen y de la tabla de ciclos (ciclos_runlife.py): cada worker de gunicorn tiene
+# su propio hilo de refresco y solo uno a la vez debe escribirlas
+BLOQUEO_RESUMENES = "tablas_resumen"
+
+_lock = threading.Lock()
+
+
+def _columnas_resumen(definicion):
+    return [columna_estado(estado, medida) for medida in definicion["medidas"] for estado in ESTADOS]
+
+def _expresiones_resumen(definicion):
+    expresiones = []
+    for medida in definicion["medidas"]:
+        columna = f"`{medida}`"
+        expresiones += [f"SUM({columna})", f"COUNT({columna})", f"MIN({columna})", f"MAX({columna})", f"SUM({columna} * {columna})"]
+    return expresiones
+
+def _columnas_existentes(cursor, tabla):
+    try:
+        cursor.execute(f"SELECT * FROM {tabla} LIMIT 0")
+    except Exception:
+        return None
+    columnas = {columna[0] for columna in cursor.description}
+    cursor.fetchall()
+    return columnas
+
+def crear_tablas(conexion):
+    # Tipos compatibles con MySQL y con el backend SQLite de backend_local.py
+    cursor = conexion.cursor()
+    marcas_existentes = _columnas_existentes(cursor, TABLA_MARCAS) is not None
+    for rollup, definicion in ROLLUPS.items():
+        # Si cambiaron las medidas de una tabla resumen, se borra y se reconstruye completa en este refresco
+        existentes = _columnas_existentes(cursor, rollup)
+        if existentes is not None and not set(_columnas_resumen(definicion)) <= existentes:
+            cursor.execute(f"DROP TABLE {rollup}")
+            if marcas_existentes:
+                cursor.execute(f"DELETE FROM {TABLA_MARCAS} WHERE Rollup = %s", (rollup,))
+        columnas = ",\n".join(f"    {columna} DOUBLE" for columna in _columnas_resumen(definicion))
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {rollup} (
+                Well_Id VARCHAR(64) NOT NULL,
+                Dia DATE NOT NULL,
+                Filas INT NOT NULL,
+            {columnas},
+                PRIMARY KEY (Well_Id, Dia)
+            )
+        """)
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {TABLA_MARCAS} (
+            Rollup VARCHAR(64) NOT NULL PRIMARY KEY,
+            Marca_Agua VARCHAR(32),
+            Ultimo_Refresco VARCHAR(32)
+        )
+    """)
+    cursor.close()
+
+def _valor(cursor, sql, params=None):
+    cursor.execute(sql, params or ())
+    fila = cursor.fetchone()
+    return fila[0] if fila else None
+
+def actualizar_rollup(conexion, rollup, completo=False):
+    definicion = ROLLUPS[rollup]
+    fuente, fecha = definicion["fuente"], definicion["columna_fecha"]
+    cursor = conexion.cursor()
+
+    marca = None if completo else _valor(cursor, f"SELECT Marca_Agua FROM {TABLA_MARCAS} WHERE Rollup = %s", (rollup,))
+    if marca is not None:
+        # El día de la marca se recalcula siempre: después del refresco pueden llegar filas con esa misma fecha
+        dia = str(marca)[:10]
+
+        # Si los días anteriores tienen otra cantidad de filas que las ya resumidas, hubo borrados o filas atrasadas:
+        # en ese caso no alcanza con recalcular los últimos días
+        resumidas = _valor(cursor, f"SELECT SUM(Filas) FROM {rollup} WHERE Dia < %s", (dia,)) or 0
+        if resumidas != _valor(cursor, f"SELECT COUNT({fecha}) FROM {fuente} WHERE {fecha} < %s", (dia,)):
+            marca = None
+        else:
+            # Nada que recalcular si desde el día de la marca están las mismas filas y ninguna es posterior a la marca
+            resumidas = _valor(cursor, f"SELECT SUM(Filas) FROM {rollup} WHERE Dia >= %s", (dia,)) or 0
+            desde_dia = _valor(cursor, f"SELECT COUNT({fecha}) FROM {fuente} WHERE {fecha} >= %s", (dia,))
+            nuevas = _valor(cursor, f"SELECT COUNT({fecha}) FROM {fuente} WHERE {fecha} > %s", (marca,))
+            if resumidas == desde_dia and not nuevas:
+                cursor.close()
+                return 0
+
+    nueva_marca = _valor(cursor, f"SELECT MAX({fecha}) FROM {fuente}")
+    if nueva_marca is None:
+        cursor.close()
+        return 0
+
+    if marca is None:
+        # Reconstrucción completa
+        cursor.execute(f"DELETE FROM {rollup}")
+        filtro, params = f"WHERE {fecha} IS NOT NULL", ()
+    else:
+        # Solo desde el día de la marca, el más antiguo que pudo recibir filas nuevas
+        cursor.execute(f"DELETE FROM {rollup} WHERE Dia >= %s", (dia,))
+        filtro, params = f"WHERE {fecha} >= %s", (dia,)
+
+    cursor.execute(f"""
+        INSERT INTO {rollup} (Well_Id, Dia, Filas, {', '.join(_columnas_resumen(definicion))})
+        SELECT Well_Id, DATE({fecha}), COUNT(*), {', '.join(_expresiones_resumen(definicion))}
+        FROM {fuente}
+        {filtro}
+        GROUP BY Well_Id, DATE({fecha})
+    """, params)
+    filas = cursor.rowcount
+
+    cursor.execute(f"DELETE FROM {TABLA_MARCAS} WHERE Rollup = %s", (rollup,))
+    cursor.execute(
+        f"INSERT INTO {TABLA_MARCAS} (Rollup, Marca_Agua, Ultimo_Refresco) VALUES (%s, %s, %s)",
+        (rollup, str(nueva_marca), time.strftime("%Y-%m-%d %H:%M:%S")),
+    )
+    cursor.close()
+    return filas
+
+def actualizar_rollups(completo=False, espera=0):
+    # Cada tabla resumen se actualiza en su propia transacción; si falla, queda como estaba y se reintenta en el siguiente refresco.
+    # Devuelve None sin escribir nada si otro proceso tiene el candado después de 'espera' segundos.
+    resultado = {}
+    with _lock, conexion_bd() as conexion, bloqueo_bd(conexion, BLOQUEO_RESUMENES, espera) as obtenido:
+        if not obtenido:
+            print("Otro proceso está actualizando las tablas resumen, no se actualizan en este refresco")
+            return None
+        crear_tablas(conexion)
+        conexion.commit()
+        for rollup in ROLLUPS:
+            inicio = time.perf_counter()
+            try:
+                resultado[rollup] = actualizar_rollup(conexion, rollup, completo=completo)
+                conexion.commit()
+            except Exception as err:
+                conexion.rollback()
+                print(f"No se pudo actualizar '{rollup}': {err}")
+                resultado[rollup] = None
+                continue
+            print(f"Rollup '{rollup}': {resultado[rollup]} filas recalculadas en {time.perf_counter() - inicio:.2f} s")
+    return resultado
+
+
+if __name__ == "__main__":
+    import sys
+    # Desde la consola se espera a que termine el refresco de los workers que tenga el candado
+    actualizar_rollups(completo="--completo" in sys.argv, espera=600)
@@ -0,0 +1,221 @@
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+# Este modulo mantiene copias locales en Parquet de las tablas fuente, con refresco incremental por marca de agua
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+
+import os
+import glob
+import json
+import time
+import threading
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from utils import conexion_bd
+
+DIRECTORIO_SNAPSHOTS = os.environ.get(
+    "GEOHALLITIANS_SNAPSHOTS_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "snapshots"),
+)
+
+# Tabla fuente -> columna de marca de agua. Las tablas sin columna de fecha se copian completas en cada refresco.
+TABLAS_SNAPSHOT = {
+    "wells_master_updated": None,
+    "critical_variables_updated": "Date",
+    "data_diaria_volumetrica_updated": "Volume_Date",
+    "data_prueba_pozo_updated": "Test_Date",
+}
+
+# Filas por bloque al descargar, para no tener toda la tabla en memoria en la primera carga
+FILAS_POR_BLOQUE = 200_000
+
+# Cuando una tabla acumula más partes que esto, se compactan en un solo archivo
+MAX_PARTES = 20
+
+_locks = {tabla: threading.Lock() for tabla in TABLAS_SNAPSHOT}
+
+
+def _directorio_tabla(tabla):
+    return os.path.join(DIRECTORIO_SNAPSHOTS, tabla)
+
+def _ruta_metadatos(tabla):
+    return os.path.join(_directorio_tabla(tabla), "_metadatos.json")
+
+def _partes(tabla):
+    return sorted(glob.glob(os.path.join(_directorio_tabla(tabla), "parte-*.parquet")))
+
+def leer_metadatos(tabla):
+    try:
+        with open(_ruta_metadatos(tabla), encoding="utf-8") as archivo:
+            return json.load(archivo)
+    except (OSError, ValueError):
+        return {}
+
+def _guardar_metadatos(tabla, metadatos):
+    ruta = _ruta_metadatos(tabla)
+    with open(f"{ruta}.tmp", "w", encoding="utf-8") as archivo:
+        json.dump(metadatos, archivo, indent=2, default=str)
+    os.replace(f"{ruta}.tmp", ruta)
+
+def _escribir_parte(tabla, df, numero):
+    ruta = os.path.join(_directorio_tabla(tabla), f"parte-{numero:06d}.parquet")
+    tabla_arrow = pa.Table.from_pandas(df, preserve_index=False)
+
+    # Todas las partes deben tener el mismo esquema para leerse como un solo dataset
+    partes = _partes(tabla)
+    if partes:
+        esquema = pq.read_schema(partes[0]).remove_metadata()
+        try:
+            tabla_arrow = tabla_arrow.select(esquema.names).cast(esquema)
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError, KeyError):
+            return False
+
+    pq.write_table(tabla_arrow, f"{ruta}.tmp")
+    os.replace(f"{ruta}.tmp", ruta)
+    return True
+
+def _reemplazar_partes(tabla, df, apartar=False):
+    # Escribe todo el contenido en una sola parte nueva y borra las anteriores
+    # (o las aparta con la extensión .anterior, para poder restaurarlas si falla el refresco en curso)
+    anteriores = _partes(tabla)
+    numero = int(os.path.basename(anteriores[-1])[6:12]) + 1 if anteriores else 1
+    ruta = os.path.join(_directorio_tabla(tabla), f"parte-{numero:06d}.parquet")
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), f"{ruta}.tmp")
+    os.replace(f"{ruta}.tmp", ruta)
+    for parte in anteriores:
+        if apartar:
+            os.replace(parte, f"{parte}.anterior")
+        else:
+            os.remove(parte)
+
+def compactar_snapshot(tabla):
+    partes = _partes(tabla)
+    if len(partes) > 1:
+        _reemplazar_partes(tabla, cargar_snapshot(tabla))
+
+def cargar_snapshot(tabla, columnas=None):
+    partes = _partes(tabla)
+    if not partes:
+        raise FileNotFoundError(f"No existe snapshot local de '{tabla}' en {DIRECTORIO_SNAPSHOTS}")
+    return pd.concat([pd.read_parquet(parte, columns=columnas) for parte in partes], ignore_index=True)
+
+def _quitar_desde_dia(tabla, columna, dia):
+    # Aparta las partes que tienen filas desde el día de la marca y las reescribe sin esas filas, que se vuelven a descargar.
+    # Devuelve las filas que quedan en el snapshot y cuántas de ellas son anteriores a ese día (para compararlas con la fuente).
+    conservadas = anteriores_al_dia = 0
+    for parte in _partes(tabla):
+        fechas = pd.to_datetime(pq.read_table(parte, columns=[columna]).column(columna).to_pandas())
+        anteriores_al_dia += int((fechas < dia).sum())
+        desde = (fechas >= dia).to_numpy()
+        conservadas += int((~desde).sum())
+        if not desde.any():
+            continue
+        os.replace(parte, f"{parte}.anterior")
+        if not desde.all():
+            tabla_arrow = pq.read_table(f"{parte}.anterior").filter(pa.array(~desde))
+            pq.write_table(tabla_arrow, f"{parte}.tmp")
+            os.replace(f"{parte}.tmp", parte)
+    return conservadas, anteriores_al_dia
+
+def _apartadas(tabla):
+    return glob.glob(os.path.join(_directorio_tabla(tabla), "parte-*.parquet.anterior"))
+
+def refrescar_snapshot(tabla, completo=False):
+    columna = TABLAS_SNAPSHOT[tabla]
+
+    with _locks[tabla]:
+        os.makedirs(_directorio_tabla(tabla), exist_ok=True)
+        metadatos = leer_metadatos(tabla)
+        marca = metadatos.get("marca_agua")
+
+        # Sin columna de fecha, sin snapshot previo o a pedido: se vuelve a copiar la tabla completa
+        completo = completo or columna is None or marca is None or not _partes(tabla)
+
+        inicio = time.perf_counter()
+        partes_anteriores = _partes(tabla)
+        numero = int(os.path.basename(partes_anteriores[-1])[6:12]) + 1 if partes_anteriores else 1
+        filas = 0
+        filas_previas = 0
+        nueva_marca = None
+
+        # Toda parte que se modifica se aparta primero con la extensión .anterior: si la descarga falla a mitad de camino,
+        # se borran las partes nuevas y se restauran las apartadas, así el snapshot queda como estaba
+        try:
+            with conexion_bd() as conexion:
+                if not completo:
+                    # El día de la marca se vuelve a descargar completo: después del refresco pueden llegar filas con esa
+                    # misma fecha. Si los días anteriores tienen otra cantidad de filas que la fuente (borrados o filas
+                    # atrasadas), no alcanza con eso y se copia la tabla completa.
+                    dia = pd.Timestamp(str(marca)[:10])
+                    filas_previas, anteriores_al_dia = _quitar_desde_dia(tabla, columna, dia)
+                    en_fuente = pd.read_sql(f"SELECT COUNT(*) AS Filas FROM {tabla} WHERE {columna} < %s", conexion,
+                                            params=(dia.strftime("%Y-%m-%d"),))["Filas"].iloc[0]
+                    if anteriores_al_dia != en_fuente:
+                        completo = True
+
+                if completo:
+                    # En la copia completa la primera parte nueva define el esquema; todas las anteriores se apartan,
+                    # también si la tabla resulta vacía
+                    for parte in _partes(tabla):
+                        os.replace(parte, f"{parte}.anterior")
+                    filas_previas = 0
+                    sql, params = f"SELECT * FROM {tabla}", None
+                else:
+                    sql, params = f"SELECT * FROM {tabla} WHERE {columna} >= %s", (dia.strftime("%Y-%m-%d"),)
+
+                for bloque in pd.read_sql(sql, conexion, params=params, chunksize=FILAS_POR_BLOQUE):
+                    if bloque.empty:
+                        continue
+                    if not _escribir_parte(tabla, bloque, numero):
+                        # El esquema cambió en la fuente: se reescribe el snapshot con el esquema nuevo
+                        _reemplazar_partes(tabla, pd.concat([cargar_snapshot(tabla), bloque], ignore_index=True), apartar=True)
+                    numero += 1
+                    filas += len(bloque)
+                    if columna is not None:
+                        maximo = pd.to_datetime(bloque[columna]).max()
+                        nueva_marca = maximo if nueva_marca is None else max(nueva_marca, maximo)
+        except Exception:
+            for parte in _partes(tabla):
+                if parte not in partes_anteriores:
+                    os.remove(parte)
+            for anterior in _apartadas(tabla):
+                os.replace(anterior, anterior[:-len(".anterior")])
+            raise
+
+        for anterior in _apartadas(tabla):
+            os.remove(anterior)
+
+        if len(_partes(tabla)) > MAX_PARTES:
+            compactar_snapshot(tabla)
+
+        metadatos.update({
+            "tabla": tabla,
+            "columna_marca": columna,
+            # Sin filas desde el día de la marca la fuente borró las de ese día: el próximo refresco copia todo
+            "marca_agua": str(nueva_marca) if nueva_marca is not None else None,
+            "filas_total": filas_previas + filas,
+            "ultimo_refresco": pd.Timestamp.now().isoformat(timespec="seconds"),
+            "ultimo_refresco_completo": completo,
+        })
+        _guardar_metadatos(tabla, metadatos)
+
+    print(f"Snapshot '{tabla}': {filas} filas descargadas en {time.perf_counter() - inicio:.2f} s ({'completo' if completo else 'incremental'})")
+    return filas
+
+def refrescar_snapshots(completo=False):
+    # Refresca todas las tablas; si MySQL no responde se conservan las copias locales existentes
+    resultado = {}
+    for tabla in TABLAS_SNAPSHOT:
+        try:
+            resultado[tabla] = refrescar_snapshot(tabla, completo=completo)
+        except Exception as err:
+            print(f"No se pudo refrescar el snapshot de '{tabla}', se usa la copia local: {err}")
+            resultado[tabla] = None
+    return resultado
+
+def snapshots_disponibles():
+    return all(_partes(tabla) for tabla in TABLAS_SNAPSHOT)
+
+
+if __name__ == "__main__":
+    import sys
+    refrescar_snapshots(completo="--completo" in sys.argv)
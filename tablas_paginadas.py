@@ -0,0 +1,129 @@
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+# Este modulo pagina, ordena y filtra en el servidor las tablas del dashboard (DataTable con page_action='custom')
+# Cada TablaPaginada guarda un DataFrame ya formateado para mostrar y, a medida que se piden, el orden de cada columna y la máscara
+# de cada filtro, así pasar de página o volver a un orden ya usado no recorre de nuevo la tabla. Al navegador solo viajan las filas
+# de la página visible, sean 20 pozos o 20.000.
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+
+import re
+import math
+import threading
+import numpy as np
+import pandas as pd
+
+# Filtros recordados por tabla (los últimos que se usaron)
+MAX_FILTROS = 32
+
+# Una condición de filter_query de Dash: "{columna} operador valor". Los operadores con prefijo 'i' no distinguen
+# mayúsculas, los de prefijo 's' (o sin prefijo) sí; el prefijo vale también para los símbolos ("s>", "i=").
+_CONDICION = re.compile(
+    r"^\{(?P<columna>[^}]+)\}\s+"
+    r"(?P<operador>[si]?(?:eq|ne|lt|le|gt|ge|contains|datestartswith|<=|>=|!=|=|<|>))\s+"
+    r"(?P<valor>.+)$"
+)
+
+_SIMBOLOS = {"=": "eq", "!=": "ne", "<": "lt", "<=": "le", ">": "gt", ">=": "ge"}
+
+_COMPARACIONES = {
+    "eq": np.equal,
+    "ne": np.not_equal,
+    "lt": np.less,
+    "le": np.less_equal,
+    "gt": np.greater,
+    "ge": np.greater_equal,
+}
+
+
+def _valor_filtro(texto):
+    texto = texto.strip()
+    if len(texto) >= 2 and texto[0] == texto[-1] and texto[0] in "\"'`":
+        return texto[1:-1]
+    return texto
+
+def _condicion(serie, operador, valor):
+    # Máscara de una condición sobre una columna; los nulos nunca cumplen la condición
+    sin_mayusculas = operador.startswith("i")
+    if operador[0] in "si":
+        operador = operador[1:]
+    operador = _SIMBOLOS.get(operador, operador)
+
+    if operador in _COMPARACIONES and pd.api.types.is_numeric_dtype(serie):
+        try:
+            numero = float(valor)
+        except ValueError:
+            return np.zeros(len(serie), dtype=bool)
+        with np.errstate(invalid="ignore"):
+            return _COMPARACIONES[operador](serie.to_numpy(dtype=float), numero)
+
+    textos = serie.astype("string")
+    if sin_mayusculas:
+        textos, valor = textos.str.lower(), valor.lower()
+    if operador == "contains":
+        mascara = textos.str.contains(valor, regex=False)
+    elif operador == "datestartswith":
+        mascara = textos.str.startswith(valor)
+    else:
+        mascara = _COMPARACIONES[operador](textos, valor)
+    return mascara.fillna(False).to_numpy(dtype=bool)
+
+
+class TablaPaginada:
+    # DataFrame formateado de una tabla y sus índices de orden y filtro. Se arma una vez por versión de los datos.
+
+    def __init__(self, frame):
+        self.frame = frame.reset_index(drop=True)
+        self._ordenes = {}   # (columna, ascendente) -> posiciones de las filas en ese orden
+        self._filtros = {}   # filter_query -> máscara de filas que cumplen el filtro
+        self._lock = threading.Lock()
+
+    def _orden(self, sort_by):
+        if not sort_by:
+            return None
+        claves = [(orden["column_id"], orden["direction"] == "asc") for orden in sort_by if orden["column_id"] in self.frame]
+        if not claves:
+            return None
+        if len(claves) > 1:
+            # Orden por varias columnas: no se guarda, depende de la combinación pedida
+            columnas, ascendentes = zip(*claves)
+            return self.frame.sort_values(list(columnas), ascending=list(ascendentes), kind="stable", na_position="last").index.to_numpy()
+
+        with self._lock:
+            if claves[0] not in self._ordenes:
+                columna, ascendente = claves[0]
+                self._ordenes[claves[0]] = self.frame[columna].sort_values(ascending=ascendente, kind="stable", na_position="last").index.to_numpy()
+            return self._ordenes[claves[0]]
+
+    def _mascara(self, filter_query):
+        if not filter_query:
+            return None
+        with self._lock:
+            if filter_query in self._filtros:
+                return self._filtros[filter_query]
+
+        mascara = np.ones(len(self.frame), dtype=bool)
+        for parte in filter_query.split(" && "):
+            coincidencia = _CONDICION.match(parte.strip())
+            # Las condiciones que no se entienden (o de columnas que no existen) se ignoran, como en el filtro nativo de la tabla
+            if coincidencia is None or coincidencia["columna"] not in self.frame:
+                continue
+            mascara &= _condicion(self.frame[coincidencia["columna"]], coincidencia["operador"], _valor_filtro(coincidencia["valor"]))
+
+        with self._lock:
+            if len(self._filtros) >= MAX_FILTROS:
+                self._filtros.pop(next(iter(self._filtros)))
+            self._filtros[filter_query] = mascara
+        return mascara
+
+    def pagina(self, page_current, page_size, sort_by=None, filter_query=""):
+        # Devuelve (filas de la página como registros, número de páginas) para los parámetros de la DataTable
+        orden = self._orden(sort_by)
+        mascara = self._mascara(filter_query)
+
+        if orden is None:
+            filas = np.arange(len(self.frame)) if mascara is None else np.flatnonzero(mascara)
+        else:
+            filas = orden if mascara is None else orden[mascara[orden]]
+
+        paginas = max(1, math.ceil(len(filas) / page_size))
+        inicio = min(page_current or 0, paginas - 1) * page_size
+        return self.frame.iloc[filas[inicio:inicio + page_size]].to_dict("records"), paginas
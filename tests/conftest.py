@@ -0,0 +1,22 @@
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+# Fixtures compartidas por las pruebas: una base SQLite temporal con el esquema de backend_local.py
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+
+import pytest
+
+from backend_local import abrir_conexion_local, crear_esquema
+
+
+@pytest.fixture
+def ruta_base(tmp_path):
+    ruta = str(tmp_path / "tablero.sqlite")
+    conexion = abrir_conexion_local(ruta)
+    crear_esquema(conexion)
+    conexion.close()
+    return ruta
+
+@pytest.fixture
+def conexion(ruta_base):
+    conexion = abrir_conexion_local(ruta_base)
+    yield conexion
+    conexion.close()
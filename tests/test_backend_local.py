@@ -0,0 +1,26 @@
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+# Pruebas del candado entre procesos del backend SQLite (backend_local.py), el equivalente a GET_LOCK de MySQL
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+
+import os
+import subprocess
+import sys
+
+import backend_local
+from backend_local import bloqueo_local
+
+# El otro proceso importa backend_local desde la raíz del repositorio
+RAIZ = os.path.dirname(os.path.abspath(backend_local.__file__))
+
+
+def test_candado_ocupado_por_otro_proceso(tmp_path):
+    ruta = str(tmp_path / "base.sqlite")
+    otro = f"from backend_local import bloqueo_local\nwith bloqueo_local('prueba', ruta={ruta!r}) as obtenido: print(obtenido)"
+
+    with bloqueo_local("prueba", ruta=ruta) as obtenido:
+        assert obtenido
+        salida = subprocess.run([sys.executable, "-c", otro], capture_output=True, text=True, check=True, cwd=RAIZ)
+        assert salida.stdout.strip() == "False"
+
+    salida = subprocess.run([sys.executable, "-c", otro], capture_output=True, text=True, check=True, cwd=RAIZ)
+    assert salida.stdout.strip() == "True"
@@ -0,0 +1,50 @@
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+# Pruebas del cache de consultas en disco (cache_consultas.py): versiones reemplazadas y límite de tamaño del directorio
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+
+import os
+import pandas as pd
+
+from cache_consultas import CacheConsultas
+
+SQL = "SELECT * FROM critical_variables_updated"
+
+
+def _lector(marcas):
+    # Lector de marcas de agua falso: devuelve la marca actual de cada tabla según el diccionario 'marcas'
+    return lambda sql: pd.DataFrame([marcas[sql.split()[-1]]])
+
+def _archivos(directorio):
+    return sorted(nombre for nombre in os.listdir(directorio) if nombre.endswith(".pkl"))
+
+
+def test_borra_versiones_con_marca_reemplazada(tmp_path):
+    cache = CacheConsultas(directorio=str(tmp_path), ttl_marcas=0)
+    marcas = {"critical_variables_updated": (10, "2024-01-01")}
+    cache.obtener(SQL, lambda: pd.DataFrame({"a": [1]}), _lector(marcas))
+    cache.obtener("SELECT * FROM wells_master_updated", lambda: pd.DataFrame({"b": [1]}), _lector({"wells_master_updated": (5,)}))
+    anteriores = _archivos(tmp_path)
+
+    marcas["critical_variables_updated"] = (11, "2024-01-02")
+    cache.obtener(SQL, lambda: pd.DataFrame({"a": [1, 2]}), _lector(marcas))
+
+    archivos = _archivos(tmp_path)
+    assert len(archivos) == 2
+    assert len(set(archivos) & set(anteriores)) == 1
+
+def test_limite_de_bytes_del_directorio(tmp_path):
+    grande = pd.DataFrame({"a": range(10_000)})
+    lector = _lector({"wells_master_updated": (5,)})
+    cache = CacheConsultas(directorio=str(tmp_path), max_bytes_disco=200_000)
+    for numero in range(5):
+        cache.obtener(f"SELECT {numero} FROM wells_master_updated", lambda: grande, lector)
+
+    archivos = _archivos(tmp_path)
+    assert 0 < len(archivos) < 5
+    assert sum(os.path.getsize(os.path.join(tmp_path, nombre)) for nombre in archivos) <= 200_000
+    assert cache.estadisticas()["expulsiones_disco"] == 5 - len(archivos)
+
+    # El último resultado guardado nunca se borra: otro proceso lo encuentra en disco
+    otro = CacheConsultas(directorio=str(tmp_path), max_bytes_disco=200_000)
+    otro.obtener("SELECT 4 FROM wells_master_updated", lambda: None, lector)
+    assert otro.estadisticas()["aciertos_disco"] == 1
@@ -0,0 +1,59 @@
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+# Pruebas del refresco incremental de la tabla runlife_ciclos (ciclos_runlife.py) sobre el backend SQLite de backend_local.py:
+# después de cada refresco incremental la tabla tiene que ser igual a la de una reconstrucción completa (--completo).
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+
+import pandas as pd
+import pytest
+
+from ciclos_runlife import TABLA_CICLOS, actualizar_ciclos_conexion, crear_tabla
+
+
+@pytest.fixture(autouse=True)
+def tabla_ciclos(conexion):
+    crear_tabla(conexion)
+
+def _insertar(conexion, lecturas):
+    conexion.cursor().executemany(
+        "INSERT INTO critical_variables_updated (Well_Id, Date, RunLife) VALUES (%s, %s, %s)",
+        [(pozo, f"{dia} 00:00:00", run_life) for pozo, dia, run_life in lecturas],
+    )
+
+def _tabla(conexion):
+    return pd.read_sql(f"SELECT * FROM {TABLA_CICLOS} ORDER BY Well_Id, Ciclo", conexion)
+
+def _igual_a_reconstruccion(conexion):
+    incremental = _tabla(conexion)
+    actualizar_ciclos_conexion(conexion, completo=True)
+    pd.testing.assert_frame_equal(incremental, _tabla(conexion))
+    return incremental
+
+
+def test_lecturas_nuevas_que_empiezan_con_un_reinicio(conexion):
+    _insertar(conexion, [("P1", "2024-01-01", 1.0), ("P1", "2024-01-02", 2.0), ("P1", "2024-01-03", 3.0)])
+    actualizar_ciclos_conexion(conexion)
+
+    # La primera lectura nueva es un reinicio: el ciclo abierto se cierra y se abre uno nuevo
+    _insertar(conexion, [("P1", "2024-01-04", 1.0), ("P1", "2024-01-05", 2.0)])
+    actualizar_ciclos_conexion(conexion)
+    ciclos = _igual_a_reconstruccion(conexion)
+    assert ciclos["Run_Life"].tolist() == [3.0, 2.0]
+    assert ciclos["Abierto"].tolist() == [0, 1]
+
+def test_lecturas_que_continuan_el_ciclo_abierto(conexion):
+    _insertar(conexion, [("P1", "2024-01-01", 5.0), ("P1", "2024-01-02", 1.0), ("P2", "2024-01-02", 1.0)])
+    actualizar_ciclos_conexion(conexion)
+
+    _insertar(conexion, [("P1", "2024-01-03", 2.0), ("P2", "2024-01-03", 2.0), ("P2", "2024-01-04", 1.0)])
+    actualizar_ciclos_conexion(conexion)
+    _igual_a_reconstruccion(conexion)
+
+def test_lecturas_con_la_fecha_de_la_marca(conexion):
+    _insertar(conexion, [("P1", "2024-01-01", 1.0), ("P1", "2024-01-02", 2.0), ("P2", "2024-01-01", 1.0)])
+    actualizar_ciclos_conexion(conexion)
+
+    # P2 reporta el día de la marca después del refresco, sin lecturas posteriores a la marca
+    _insertar(conexion, [("P2", "2024-01-02", 2.0)])
+    assert actualizar_ciclos_conexion(conexion) > 0
+    _igual_a_reconstruccion(conexion)
+    assert actualizar_ciclos_conexion(conexion) == 0
@@ -0,0 +1,138 @@
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+# Pruebas del lenguaje de reglas de alertas (reglas_alertas.py) y de los episodios de alertas del motor (alertas.py)
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from alertas import COLUMNAS_REGLAS, MotorAlertas
+from reglas_alertas import FUNCIONES, ContextoEvaluacion, ReglaAlerta, cargar_reglas, compilar_expresion, evaluar_reglas
+
+NAN = np.nan
+
+
+def _diario(filas):
+    # filas: (pozo, día, BOPD); el resultado queda ordenado por pozo y día como lo entrega el motor
+    diario = pd.DataFrame(filas, columns=["Well_Id", "Dia", "BOPD"])
+    diario["Dia"] = pd.to_datetime(diario["Dia"])
+    return diario.sort_values(["Well_Id", "Dia"]).reset_index(drop=True)
+
+# P1 tiene cinco días seguidos; P2 no tiene datos el 3 y el 4 de enero
+DIARIO = _diario([
+    ("P1", "2024-01-01", 10.0), ("P1", "2024-01-02", 20.0), ("P1", "2024-01-03", 30.0), ("P1", "2024-01-04", 40.0),
+    ("P1", "2024-01-05", 50.0),
+    ("P2", "2024-01-01", 1.0), ("P2", "2024-01-02", 2.0), ("P2", "2024-01-05", 3.0),
+])
+
+# Expresión -> (valores esperados sobre DIARIO, días de historia). Las ventanas de días no incluyen el propio día
+# y en P2 el 5 de enero la ventana de 3 días solo alcanza al 2 de enero.
+CASOS = {
+    "media(BOPD, 3)": ([NAN, 10, 15, 20, 30, NAN, 1, 2], 3),
+    "mediana(BOPD, 3)": ([NAN, 10, 15, 20, 30, NAN, 1, 2], 3),
+    "minimo(BOPD, 3)": ([NAN, 10, 10, 10, 20, NAN, 1, 2], 3),
+    "maximo(BOPD, 3)": ([NAN, 10, 20, 30, 40, NAN, 1, 2], 3),
+    "anterior(BOPD)": ([NAN, 10, 20, 30, 40, NAN, 1, 2], 1),
+    "anterior(BOPD, 2)": ([NAN, NAN, 10, 20, 30, NAN, NAN, 1], 2),
+    "racha(BOPD > 0)": ([1, 2, 3, 4, 5, 1, 2, 1], 0),
+    "abs(BOPD - 25)": ([15, 5, 5, 15, 25, 24, 23, 22], 0),
+}
+
+
+def test_cada_funcion_tiene_un_caso():
+    assert {expresion.split("(")[0] for expresion in CASOS} == set(FUNCIONES)
+
+@pytest.mark.parametrize("expresion", CASOS)
+def test_funciones(expresion):
+    esperado, historia = CASOS[expresion]
+    evaluar, dias_historia = compilar_expresion(expresion, ["BOPD"])
+    assert dias_historia == historia
+    np.testing.assert_allclose(evaluar(ContextoEvaluacion(DIARIO)), esperado)
+
+def test_historia_de_expresiones_anidadas():
+    regla = ReglaAlerta({
+        "nombre": "anidada",
+        "condicion": "media(anterior(BOPD, 2), 3) > 0",
+        "valor": "BOPD",
+        "referencia": "maximo(BOPD, 7)",
+    }, ["BOPD"])
+    assert regla.dias_historia == 7
+    assert compilar_expresion("media(anterior(BOPD, 2), 3) > 0", ["BOPD"])[1] == 5
+
+@pytest.mark.parametrize("expresion", [
+    "BOPD.real > 0",           # acceso a atributos
+    "BOPD[0] > 0",             # subíndices
+    "len(BOPD) > 0",           # funciones fuera de FUNCIONES
+    "__import__('os')",
+    "media(BOPD, 0) > 1",      # ventanas que no son positivas
+    "media(BOPD, -3) > 1",
+    "media(BOPD, 2.5 - 3) > 1",
+    "anterior(BOPD, 0) > 1",
+    "media(BOPD) > 1",         # cantidad de argumentos
+    "media(BOPD, 3, 4) > 1",
+    "media(BOPD, dias=3) > 1",
+    "WCUT > 1",                # columna desconocida
+    "'texto' == BOPD",
+    "BOPD >",                  # sintaxis inválida
+])
+def test_sintaxis_rechazada(expresion):
+    with pytest.raises(ValueError):
+        compilar_expresion(expresion, ["BOPD"])
+
+def test_racha_con_dias_sin_datos():
+    # Run status 0 tres veces pero con días sin datos en el medio: no son días seguidos
+    diario = _diario([("P1", "2024-01-01", 0.0), ("P1", "2024-01-05", 0.0), ("P1", "2024-01-09", 0.0)])
+    evaluar, _ = compilar_expresion("racha(BOPD == 0)", ["BOPD"])
+    np.testing.assert_array_equal(evaluar(ContextoEvaluacion(diario)), [1, 1, 1])
+
+def test_subexpresiones_compartidas_se_calculan_una_vez(monkeypatch):
+    calculos = []
+    movil = ContextoEvaluacion.movil
+    monkeypatch.setattr(ContextoEvaluacion, "movil", lambda contexto, *args: calculos.append(args) or movil(contexto, *args))
+    reglas = [
+        ReglaAlerta({"nombre": "baja", "condicion": "BOPD < 0.5 * media(BOPD, 3)", "referencia": "media(BOPD, 3)"}, ["BOPD"]),
+        ReglaAlerta({"nombre": "alta", "condicion": "BOPD > 1.2 * media(BOPD, 3)", "referencia": "media(BOPD, 3)"}, ["BOPD"]),
+    ]
+    disparos, costos = evaluar_reglas(reglas, DIARIO)
+    assert len(calculos) == 1
+    assert costos.loc[1, "Subexpresiones_Reutilizadas"] > 0
+    # P1 del 2 al 5 de enero y P2 el 2 y el 5 superan 1.2 veces su media
+    assert disparos["Fila"].tolist() == [1, 2, 3, 4, 6, 7]
+    np.testing.assert_allclose(disparos["Referencia"], [10, 15, 20, 30, 1, 2])
+
+
+def _diario_reglas(dias, pozo="P1", desde="2024-01-01"):
+    # Días normales para todas las reglas de reglas_alertas.json: nada dispara una alerta
+    base = {"Presion_intake": 1000.0, "Freq": 50.0, "Caudal": 500.0, "WOR": 1.0, "WCUT": 30.0, "BWPD": 100.0, "BOPD": 100.0,
+            "Run_Status": 1.0}
+    diario = pd.DataFrame({"Well_Id": pozo, "Dia": pd.date_range(desde, periods=dias, freq="D")})
+    for medida, valor in base.items():
+        for prefijo in ("", "Minimo_", "Maximo_"):
+            diario[f"{prefijo}{medida}"] = valor
+    return diario[["Well_Id", "Dia"] + COLUMNAS_REGLAS]
+
+def test_reglas_alertas_json():
+    p1 = _diario_reglas(40)
+    p1.loc[34, ["BOPD"]] = 5.0                          # 5 de febrero: menos del 10% de la media de 30 días
+    p1.loc[19, ["Maximo_Freq"]] = 75.0                  # 20 de enero: frecuencia fuera de banda
+    p1.loc[9:12, ["Maximo_Run_Status"]] = 0.0           # 10 al 13 de enero apagado: racha de 3 el 12 y de 4 el 13
+    # P2: frecuencia fuera de banda el 1 y el 3 de enero, sin datos el 2 (dos episodios); apagado en días separados
+    p2 = _diario_reglas(5, pozo="P2").drop(index=1)
+    p2.loc[[0, 2], "Minimo_Freq"] = 30.0
+    p2.loc[[0, 2, 4], "Maximo_Run_Status"] = 0.0
+
+    motor = MotorAlertas(reglas=cargar_reglas(COLUMNAS_REGLAS))
+    motor.diario = pd.concat([p1, p2], ignore_index=True)
+    motor.ultimo_dia = motor.diario["Dia"].max()
+    alertas = motor.alertas().sort_values(["Well_Id", "Regla", "Desde"]).reset_index(drop=True)
+
+    esperado = pd.DataFrame([
+        ("P1", "bopd_bajo_linea_base", "2024-02-04", "2024-02-04", 1),
+        ("P1", "freq_fuera_de_banda", "2024-01-20", "2024-01-20", 1),
+        ("P1", "pozo_apagado", "2024-01-12", "2024-01-13", 2),
+        ("P2", "freq_fuera_de_banda", "2024-01-01", "2024-01-01", 1),
+        ("P2", "freq_fuera_de_banda", "2024-01-03", "2024-01-03", 1),
+    ], columns=["Well_Id", "Regla", "Desde", "Day", "Dias"])
+    esperado[["Desde", "Day"]] = esperado[["Desde", "Day"]].apply(pd.to_datetime)
+    pd.testing.assert_frame_equal(alertas[esperado.columns], esperado, check_dtype=False)
+    assert alertas.loc[alertas["Regla"] == "bopd_bajo_linea_base", "Valor"].tolist() == [5.0]
@@ -0,0 +1,61 @@
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+# Pruebas del refresco incremental de las tablas resumen diarias (rollups.py) sobre el backend SQLite de backend_local.py:
+# después de cada refresco incremental la tabla resumen tiene que ser igual a la de una reconstrucción completa.
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+
+import pandas as pd
+import pytest
+
+from rollups import TABLA_MARCAS, actualizar_rollup, crear_tablas
+
+ROLLUP = "rollup_volumetrica_diario"
+
+
+@pytest.fixture(autouse=True)
+def tablas_resumen(conexion):
+    crear_tablas(conexion)
+
+def _insertar(conexion, filas):
+    conexion.cursor().executemany(
+        "INSERT INTO data_diaria_volumetrica_updated (Well_Id, Volume_Date, Hours, Oil, Water, Gas, `OIL QUALITY`) "
+        "VALUES (%s, %s, %s, %s, %s, %s, %s)",
+        [(pozo, dia, 24.0, aceite, 10.0, 5.0, 20.0) for pozo, dia, aceite in filas],
+    )
+
+def _tabla(conexion):
+    return pd.read_sql(f"SELECT * FROM {ROLLUP} ORDER BY Well_Id, Dia", conexion)
+
+def _igual_a_reconstruccion(conexion):
+    incremental = _tabla(conexion)
+    actualizar_rollup(conexion, ROLLUP, completo=True)
+    pd.testing.assert_frame_equal(incremental, _tabla(conexion))
+
+
+def test_filas_con_la_fecha_de_la_marca(conexion):
+    _insertar(conexion, [("P1", "2024-01-01", 100.0), ("P1", "2024-01-02", 110.0), ("P2", "2024-01-02", 50.0)])
+    actualizar_rollup(conexion, ROLLUP)
+
+    # P3 reporta el día de la marca después del refresco: no hay ninguna fila posterior a la marca
+    _insertar(conexion, [("P3", "2024-01-02", 70.0)])
+    assert actualizar_rollup(conexion, ROLLUP) > 0
+    _igual_a_reconstruccion(conexion)
+
+def test_filas_nuevas_y_atrasadas(conexion):
+    _insertar(conexion, [("P1", "2024-01-01", 100.0), ("P1", "2024-01-02", 110.0)])
+    actualizar_rollup(conexion, ROLLUP)
+
+    _insertar(conexion, [("P1", "2024-01-03", 120.0), ("P2", "2024-01-02", 60.0)])
+    actualizar_rollup(conexion, ROLLUP)
+    _igual_a_reconstruccion(conexion)
+
+    # Una fila anterior al día de la marca obliga a reconstruir todo
+    _insertar(conexion, [("P2", "2024-01-01", 40.0)])
+    actualizar_rollup(conexion, ROLLUP)
+    _igual_a_reconstruccion(conexion)
+
+def test_sin_cambios(conexion):
+    _insertar(conexion, [("P1", "2024-01-01", 100.0)])
+    actualizar_rollup(conexion, ROLLUP)
+    marca = pd.read_sql(f"SELECT Marca_Agua FROM {TABLA_MARCAS}", conexion)
+    assert actualizar_rollup(conexion, ROLLUP) == 0
+    pd.testing.assert_frame_equal(marca, pd.read_sql(f"SELECT Marca_Agua FROM {TABLA_MARCAS}", conexion))
@@ -0,0 +1,106 @@
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+# Pruebas de los snapshots Parquet (snapshots.py) sobre el backend SQLite de backend_local.py: el refresco incremental tiene que
+# dejar el mismo contenido que la tabla fuente, y un refresco que falla tiene que dejar el snapshot como estaba.
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+
+import os
+
+import pandas as pd
+import pytest
+
+import backend_local
+import snapshots
+import utils
+
+TABLA = "data_diaria_volumetrica_updated"
+ORDEN = ["Well_Id", "Volume_Date", "Oil"]
+
+
+@pytest.fixture(autouse=True)
+def backend_temporal(ruta_base, tmp_path, monkeypatch):
+    monkeypatch.setattr(utils, "BACKEND", "sqlite")
+    monkeypatch.setattr(backend_local, "RUTA_BASE_LOCAL", ruta_base)
+    monkeypatch.setattr(snapshots, "DIRECTORIO_SNAPSHOTS", str(tmp_path / "snapshots"))
+
+def _insertar(conexion, filas):
+    conexion.cursor().executemany(
+        f"INSERT INTO {TABLA} (Well_Id, Volume_Date, Hours, Oil, Water, Gas, `OIL QUALITY`) VALUES (%s, %s, %s, %s, %s, %s, %s)",
+        [(pozo, dia, 24.0, aceite, 10.0, 5.0, 20.0) for pozo, dia, aceite in filas],
+    )
+    conexion.commit()
+
+def _ordenado(df):
+    return df.sort_values(ORDEN).reset_index(drop=True)
+
+def _igual_a_la_fuente(conexion):
+    snapshot = _ordenado(snapshots.cargar_snapshot(TABLA))
+    pd.testing.assert_frame_equal(snapshot, _ordenado(pd.read_sql(f"SELECT * FROM {TABLA}", conexion)))
+    assert snapshots.leer_metadatos(TABLA)["filas_total"] == len(snapshot)
+
+
+def test_filas_con_la_fecha_de_la_marca(conexion):
+    _insertar(conexion, [("P1", "2024-01-01", 100.0), ("P1", "2024-01-02", 110.0), ("P2", "2024-01-02", 50.0)])
+    snapshots.refrescar_snapshot(TABLA)
+
+    # P3 reporta el día de la marca después del refresco, junto con un día nuevo
+    _insertar(conexion, [("P3", "2024-01-02", 70.0), ("P1", "2024-01-03", 120.0)])
+    snapshots.refrescar_snapshot(TABLA)
+    assert not snapshots.leer_metadatos(TABLA)["ultimo_refresco_completo"]
+    _igual_a_la_fuente(conexion)
+
+    # Solo una fila con la fecha de la marca, sin días nuevos
+    _insertar(conexion, [("P2", "2024-01-03", 60.0)])
+    snapshots.refrescar_snapshot(TABLA)
+    _igual_a_la_fuente(conexion)
+
+def test_fila_atrasada_obliga_a_copiar_todo(conexion):
+    _insertar(conexion, [("P1", "2024-01-01", 100.0), ("P1", "2024-01-05", 110.0)])
+    snapshots.refrescar_snapshot(TABLA)
+
+    _insertar(conexion, [("P2", "2024-01-02", 40.0)])
+    snapshots.refrescar_snapshot(TABLA)
+    assert snapshots.leer_metadatos(TABLA)["ultimo_refresco_completo"]
+    _igual_a_la_fuente(conexion)
+
+def test_copia_completa_de_una_tabla_vacia(conexion):
+    _insertar(conexion, [("P1", "2024-01-01", 100.0)])
+    snapshots.refrescar_snapshot(TABLA)
+
+    conexion.execute(f"DELETE FROM {TABLA}")
+    conexion.commit()
+    assert snapshots.refrescar_snapshot(TABLA, completo=True) == 0
+    assert snapshots.leer_metadatos(TABLA)["filas_total"] == 0
+    with pytest.raises(FileNotFoundError):
+        snapshots.cargar_snapshot(TABLA)
+
+@pytest.mark.parametrize("completo", [False, True])
+def test_descarga_fallida_restaura_las_partes(conexion, monkeypatch, completo):
+    _insertar(conexion, [("P1", "2024-01-01", 100.0), ("P1", "2024-01-02", 110.0)])
+    snapshots.refrescar_snapshot(TABLA)
+    _insertar(conexion, [("P2", "2024-01-02", 50.0), ("P2", "2024-01-03", 60.0)])
+    antes = snapshots.cargar_snapshot(TABLA)
+    partes = sorted(os.listdir(snapshots._directorio_tabla(TABLA)))
+
+    # La descarga entrega el primer bloque de una fila y se corta; las demás consultas funcionan normalmente
+    leer_sql = pd.read_sql
+    def cortar_despues_del_primero(bloques):
+        yield next(bloques)
+        raise ConnectionError("conexión perdida")
+    def leer_y_cortar(sql, conexion, params=None, chunksize=None):
+        if chunksize is None:
+            return leer_sql(sql, conexion, params=params)
+        return cortar_despues_del_primero(leer_sql(sql, conexion, params=params, chunksize=1))
+    monkeypatch.setattr(snapshots.pd, "read_sql", leer_y_cortar)
+
+    with pytest.raises(ConnectionError):
+        snapshots.refrescar_snapshot(TABLA, completo=completo)
+    assert sorted(os.listdir(snapshots._directorio_tabla(TABLA))) == partes
+    pd.testing.assert_frame_equal(snapshots.cargar_snapshot(TABLA), antes)
+
+def test_compactacion_conserva_las_filas(conexion, monkeypatch):
+    monkeypatch.setattr(snapshots, "MAX_PARTES", 2)
+    for dia in range(1, 8):
+        _insertar(conexion, [("P1", f"2024-01-{dia:02d}", 100.0 + dia), ("P2", f"2024-01-{dia:02d}", 50.0 + dia)])
+        snapshots.refrescar_snapshot(TABLA)
+        assert len(snapshots._partes(TABLA)) <= 2
+    _igual_a_la_fuente(conexion)
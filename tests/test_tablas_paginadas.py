@@ -0,0 +1,75 @@
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+# Pruebas de la paginación en el servidor (tablas_paginadas.py): filtros con la sintaxis de filter_query de la DataTable,
+# orden por una o varias columnas y páginas, comparados con el mismo cálculo hecho directamente con pandas
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from tablas_paginadas import TablaPaginada
+
+FRAME = pd.DataFrame({
+    "UWI": [f"Well{numero:03d}" for numero in range(1, 24)],
+    "Value": [float(numero % 7) if numero % 5 else np.nan for numero in range(1, 24)],
+    "Type": ["WCUT jump", "Freq out of band", "wcut drop"] * 7 + ["Freq out of band", "WCUT jump"],
+})
+
+
+def _todas(tabla, **parametros):
+    filas, paginas = tabla.pagina(0, len(FRAME), **parametros)
+    assert paginas == 1
+    return pd.DataFrame(filas, columns=FRAME.columns).astype(FRAME.dtypes)
+
+def _igual(obtenido, esperado):
+    pd.testing.assert_frame_equal(obtenido.reset_index(drop=True), esperado.reset_index(drop=True))
+
+
+@pytest.mark.parametrize("filter_query, esperado", [
+    ("{Value} s> 5", FRAME[FRAME["Value"] > 5]),
+    ("{Value} >= 3", FRAME[FRAME["Value"] >= 3]),
+    ("{Value} s<= 3", FRAME[FRAME["Value"] <= 3]),
+    ("{Value} eq 2", FRAME[FRAME["Value"] == 2]),
+    ("{Type} contains WCUT", FRAME[FRAME["Type"].str.contains("WCUT")]),
+    ("{Type} icontains wcut", FRAME[FRAME["Type"].str.lower().str.contains("wcut")]),
+    ("{Type} = 'Freq out of band'", FRAME[FRAME["Type"] == "Freq out of band"]),
+    ("{Type} i= 'wcut JUMP'", FRAME[FRAME["Type"] == "WCUT jump"]),
+    ("{Value} s> 2 && {Type} contains WCUT", FRAME[(FRAME["Value"] > 2) & FRAME["Type"].str.contains("WCUT")]),
+    ("{Value} > texto", FRAME.iloc[0:0]),
+    # Las columnas que no existen y las condiciones que no se entienden se ignoran
+    ("{Pozo} contains 1", FRAME),
+    ("{Pozo} s> 5 && {Value} < 2", FRAME[FRAME["Value"] < 2]),
+    ("Value > 5", FRAME),
+])
+def test_filtros(filter_query, esperado):
+    _igual(_todas(TablaPaginada(FRAME), filter_query=filter_query), esperado)
+
+def test_orden_por_varias_columnas():
+    sort_by = [{"column_id": "Type", "direction": "asc"}, {"column_id": "Value", "direction": "desc"}]
+    esperado = FRAME.sort_values(["Type", "Value"], ascending=[True, False], kind="stable", na_position="last")
+    _igual(_todas(TablaPaginada(FRAME), sort_by=sort_by), esperado)
+
+def test_orden_y_filtro_guardados():
+    tabla = TablaPaginada(FRAME)
+    sort_by = [{"column_id": "Value", "direction": "desc"}]
+    esperado = FRAME.sort_values("Value", ascending=False, kind="stable", na_position="last")
+    esperado = esperado[esperado["Type"].str.contains("WCUT")]
+    for _ in range(2):
+        _igual(_todas(tabla, sort_by=sort_by, filter_query="{Type} contains WCUT"), esperado)
+    assert list(tabla._ordenes) == [("Value", False)]
+    assert list(tabla._filtros) == ["{Type} contains WCUT"]
+
+def test_ultima_pagina_incompleta():
+    tabla = TablaPaginada(FRAME)
+    sort_by = [{"column_id": "UWI", "direction": "desc"}]
+    ordenado = FRAME.sort_values("UWI", ascending=False)
+
+    filas, paginas = tabla.pagina(2, 10, sort_by=sort_by)
+    assert paginas == 3
+    _igual(pd.DataFrame(filas), ordenado.iloc[20:23])
+
+    # Una página fuera de rango (por ejemplo después de filtrar) muestra la última
+    filas, paginas = tabla.pagina(5, 10, sort_by=sort_by, filter_query="{Value} s> 3")
+    filtrado = ordenado[ordenado["Value"] > 3]
+    assert paginas == 1
+    _igual(pd.DataFrame(filas), filtrado)
@@ -0,0 +1,56 @@
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+# Pruebas del método de mínima curvatura (trayectorias.py) contra geometrías con solución conocida: pozo vertical, tramo tangente
+# de inclinación constante y construcción de 90° sobre un radio conocido, y varios pozos en una misma llamada
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+
+import numpy as np
+
+from trayectorias import minima_curvatura
+
+RADIO = 1000.0
+
+def _trayectoria(pozo, md, inclinacion, azimut):
+    return np.column_stack(minima_curvatura([pozo] * len(md), md, inclinacion, azimut))
+
+def _construccion():
+    # Vertical hasta 500 pies y construcción de 0° a 90° de inclinación hacia el Este sobre un arco de radio RADIO
+    md = [500.0, 500.0 + RADIO * np.pi / 4, 500.0 + RADIO * np.pi / 2]
+    return md, [0.0, 45.0, 90.0], [90.0, 90.0, 90.0]
+
+
+def test_pozo_vertical():
+    md = [100.0, 1500.0, 3200.0]
+    trayectoria = _trayectoria("Well001", md, [0.0] * 3, [0.0, 120.0, 300.0])
+
+    np.testing.assert_allclose(trayectoria, np.column_stack([np.zeros(3), np.zeros(3), md]), atol=1e-9)
+
+def test_tramo_tangente():
+    # Después de construir hasta 30° con azimut 45°, cada tramo de 1000 pies avanza lo mismo en TVD y en el plano
+    trayectoria = _trayectoria("Well001", [1000.0, 2000.0, 3000.0, 4000.0], [0.0, 30.0, 30.0, 30.0], [45.0] * 4)
+    tramos = np.diff(trayectoria[1:], axis=0)
+
+    horizontal = 1000.0 * np.sin(np.radians(30.0))
+    esperado = [horizontal * np.cos(np.radians(45.0)), horizontal * np.sin(np.radians(45.0)), 1000.0 * np.cos(np.radians(30.0))]
+    np.testing.assert_allclose(tramos, [esperado, esperado])
+
+def test_construccion_de_90_grados():
+    trayectoria = _trayectoria("Well001", *_construccion())
+
+    # Al final del arco el desplazamiento horizontal y la profundidad vertical construida son iguales al radio
+    np.testing.assert_allclose(trayectoria[-1], [0.0, RADIO, 500.0 + RADIO], atol=1e-9)
+    # A mitad del arco (45°): desplazamiento R (1 - cos 45°) y profundidad R sin 45°
+    np.testing.assert_allclose(trayectoria[1], [0.0, RADIO * (1 - np.cos(np.pi / 4)), 500.0 + RADIO * np.sin(np.pi / 4)], atol=1e-9)
+
+def test_varios_pozos_en_una_llamada():
+    # La suma acumulada de cada pozo empieza en la cabeza de ese pozo, sin arrastrar lo acumulado por los pozos anteriores
+    md, inclinacion, azimut = _construccion()
+    tangente = ([1000.0, 2000.0, 3000.0], [0.0, 30.0, 30.0], [200.0] * 3)
+    pozos = ["Well002"] * 3 + ["Well001"] * 3 + ["Well003"] * 3
+
+    trayectoria = np.column_stack(minima_curvatura(
+        pozos, md + tangente[0] + md, inclinacion + tangente[1] + inclinacion, azimut + tangente[2] + azimut,
+    ))
+
+    esperado = np.vstack([_trayectoria("Well002", md, inclinacion, azimut), _trayectoria("Well001", *tangente),
+                          _trayectoria("Well003", md, inclinacion, azimut)])
+    np.testing.assert_allclose(trayectoria, esperado, atol=1e-9)
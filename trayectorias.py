@@ -0,0 +1,216 @@
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+# Este modulo guarda los surveys direccionales (estaciones MD, inclinación, azimut) de cada pozo en la tabla survey_estaciones
+# y calcula sus trayectorias 3D con el método de mínima curvatura, vectorizado sobre todas las estaciones de todos los pozos a la vez.
+# Las trayectorias calculadas se guardan en memoria por pozo junto con la marca de su survey (estaciones y fecha de carga):
+# en cada refresco solo se recalculan los pozos cuyo survey cambió.
+# Uso: python trayectorias.py [estaciones.csv ...]   (CSV con columnas Well_Id, MD, Inclinacion, Azimut)
+# ---------------------------------------------------------------------------------------------------------------------------------------------------
+
+import time
+import threading
+import numpy as np
+import pandas as pd
+from utils import conexion_bd
+
+TABLA_ESTACIONES = "survey_estaciones"
+
+COLUMNAS_ESTACION = ["Well_Id", "MD", "Inclinacion", "Azimut"]
+COLUMNAS_TRAYECTORIA = ["Well_Id", "MD", "Norte", "Este", "TVD"]
+
+# Pies por grado de latitud (las profundidades y MD están en pies, como Wellhead_depth)
+PIES_POR_GRADO = 364_567.0
+
+# Pozos por consulta al leer las estaciones de los pozos que cambiaron
+POZOS_POR_CONSULTA = 500
+
+_lock = threading.Lock()
+_tabla_creada = False
+
+# Well_Id -> (marca del survey, arreglos de la trayectoria: MD, Norte, Este, TVD)
+_trayectorias = {}
+
+# Marcas de todos los pozos y DataFrame que se armó con ellas, para no volver a concatenar si ningún survey cambió
+_ultimo = (None, None)
+
+
+def crear_tabla(conexion):
+    # Tipos compatibles con MySQL y con el backend SQLite de backend_local.py
+    cursor = conexion.cursor()
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {TABLA_ESTACIONES} (
+            Well_Id VARCHAR(64) NOT NULL,
+            MD DOUBLE NOT NULL,
+            Inclinacion DOUBLE NOT NULL,
+            Azimut DOUBLE NOT NULL,
+            Cargado DATETIME NOT NULL,
+            PRIMARY KEY (Well_Id, MD)
+        )
+    """)
+    cursor.close()
+
+def asegurar_tabla():
+    # La tabla se crea una vez por proceso, antes de leer su marca de cambios
+    global _tabla_creada
+    if _tabla_creada:
+        return
+    with conexion_bd() as conexion:
+        crear_tabla(conexion)
+        conexion.commit()
+    _tabla_creada = True
+
+def minima_curvatura(pozos, md, inclinacion, azimut):
+    # Coordenadas (Norte, Este, TVD) de cada estación, relativas a la cabeza del pozo, para todas las estaciones de todos los pozos.
+    # 'pozos' identifica el pozo de cada estación; las estaciones deben venir agrupadas por pozo y ordenadas por MD.
+    # La primera estación de cada pozo se une a la superficie (MD 0, vertical).
+    pozos = np.asarray(pozos)
+    md = np.asarray(md, dtype=float)
+    inclinacion = np.radians(np.asarray(inclinacion, dtype=float))
+    azimut = np.radians(np.asarray(azimut, dtype=float))
+    if len(md) == 0:
+        return np.empty(0), np.empty(0), np.empty(0)
+
+    nuevo = np.r_[True, pozos[1:] != pozos[:-1]]
+    md_anterior = np.where(nuevo, 0.0, np.roll(md, 1))
+    inclinacion_anterior = np.where(nuevo, 0.0, np.roll(inclinacion, 1))
+    azimut_anterior = np.where(nuevo, azimut, np.roll(azimut, 1))
+
+    # Ángulo de dogleg entre estaciones consecutivas y factor de suavizado RF = 2 / DL * tan(DL / 2) (1 en tramos rectos)
+    coseno = np.cos(inclinacion - inclinacion_anterior) - np.sin(inclinacion_anterior) * np.sin(inclinacion) * (1 - np.cos(azimut - azimut_anterior))
+    dogleg = np.arccos(np.clip(coseno, -1.0, 1.0))
+    factor = np.ones_like(dogleg)
+    np.divide(2 * np.tan(dogleg / 2), dogleg, out=factor, where=dogleg > 1e-9)
+    mitad = (md - md_anterior) / 2 * factor
+
+    d_norte = mitad * (np.sin(inclinacion_anterior) * np.cos(azimut_anterior) + np.sin(inclinacion) * np.cos(azimut))
+    d_este = mitad * (np.sin(inclinacion_anterior) * np.sin(azimut_anterior) + np.sin(inclinacion) * np.sin(azimut))
+    d_tvd = mitad * (np.cos(inclinacion_anterior) + np.cos(inclinacion))
+
+    # Suma acumulada dentro de cada pozo: la suma global menos lo acumulado hasta el inicio del pozo
+    inicios = np.flatnonzero(nuevo)
+    largos = np.diff(np.r_[inicios, len(md)])
+
+    def acumular(incrementos):
+        suma = np.cumsum(incrementos)
+        return suma - np.repeat(np.r_[0.0, suma[inicios[1:] - 1]], largos)
+
+    return acumular(d_norte), acumular(d_este), acumular(d_tvd)
+
+def validar_estaciones(estaciones):
+    faltantes = set(COLUMNAS_ESTACION) - set(estaciones.columns)
+    if faltantes:
+        raise ValueError(f"Faltan columnas en las estaciones de survey: {', '.join(sorted(faltantes))}")
+    estaciones = estaciones[COLUMNAS_ESTACION].astype({"Well_Id": str, "MD": float, "Inclinacion": float, "Azimut": float})
+    if estaciones[["MD", "Inclinacion", "Azimut"]].isna().any().any():
+        raise ValueError("Las estaciones de survey no pueden tener MD, inclinación ni azimut vacíos")
+    if (estaciones["MD"] < 0).any() or not estaciones["Inclinacion"].between(0, 180).all() or not estaciones["Azimut"].between(0, 360).all():
+        raise ValueError("Estaciones de survey fuera de rango: MD >= 0, inclinación entre 0 y 180 y azimut entre 0 y 360 grados")
+    repetidas = estaciones.duplicated(["Well_Id", "MD"])
+    if repetidas.any():
+        raise ValueError(f"Estaciones de survey con MD repetido en los pozos: {', '.join(sorted(estaciones.loc[repetidas, 'Well_Id'].unique()))}")
+    return estaciones.sort_values(["Well_Id", "MD"]).reset_index(drop=True)
+
+def ingerir_estaciones(estaciones):
+    # Reemplaza el survey completo de cada pozo incluido en 'estaciones' (DataFrame con COLUMNAS_ESTACION)
+    estaciones = validar_estaciones(estaciones)
+    cargado = time.strftime("%Y-%m-%d %H:%M:%S")
+    with _lock, conexion_bd() as conexion:
+        crear_tabla(conexion)
+        cursor = conexion.cursor()
+        try:
+            cursor.executemany(f"DELETE FROM {TABLA_ESTACIONES} WHERE Well_Id = %s", [(pozo,) for pozo in estaciones["Well_Id"].unique()])
+            cursor.executemany(
+                f"INSERT INTO {TABLA_ESTACIONES} (Well_Id, MD, Inclinacion, Azimut, Cargado) VALUES (%s, %s, %s, %s, %s)",
+                [(pozo, float(md), float(inclinacion), float(azimut), cargado)
+                 for pozo, md, inclinacion, azimut in estaciones.itertuples(index=False)],
+            )
+            conexion.commit()
+        except Exception:
+            conexion.rollback()
+            raise
+        finally:
+            cursor.close()
+    print(f"Survey: {len(estaciones)} estaciones de {estaciones['Well_Id'].nunique()} pozos cargadas en '{TABLA_ESTACIONES}'")
+    return len(estaciones)
+
+def _leer_estaciones(cursor, pozos=None):
+    sql = f"SELECT Well_Id, MD, Inclinacion, Azimut FROM {TABLA_ESTACIONES}"
+    if pozos is None:
+        cursor.execute(f"{sql} ORDER BY Well_Id, MD")
+        return pd.DataFrame(cursor.fetchall(), columns=COLUMNAS_ESTACION)
+
+    bloques = []
+    for inicio in range(0, len(pozos), POZOS_POR_CONSULTA):
+        bloque = pozos[inicio:inicio + POZOS_POR_CONSULTA]
+        cursor.execute(f"{sql} WHERE Well_Id IN ({', '.join(['%s'] * len(bloque))}) ORDER BY Well_Id, MD", tuple(bloque))
+        bloques.append(pd.DataFrame(cursor.fetchall(), columns=COLUMNAS_ESTACION))
+    return pd.concat(bloques, ignore_index=True)
+
+def _trayectoria_vacia():
+    return pd.DataFrame({columna: pd.Series(dtype=object if columna == "Well_Id" else float) for columna in COLUMNAS_TRAYECTORIA})
+
+def _leer_cambios(marcas):
+    # Estaciones de los pozos cuyo survey no coincide con la trayectoria guardada
+    cambiados = sorted(pozo for pozo, marca in marcas.items() if _trayectorias.get(pozo, (None,))[0] != marca)
+    if not cambiados:
+        return pd.DataFrame(columns=COLUMNAS_ESTACION)
+    with conexion_bd() as conexion:
+        cursor = conexion.cursor()
+        # Si cambió la mayoría de los pozos es más barato leer la tabla completa que filtrar por pozo
+        if len(cambiados) > len(marcas) / 2:
+            estaciones = _leer_estaciones(cursor)
+            estaciones = estaciones[estaciones["Well_Id"].isin(cambiados)]
+        else:
+            estaciones = _leer_estaciones(cursor, cambiados)
+        cursor.close()
+    return estaciones
+
+def trayectorias_actualizadas():
+    # Trayectorias de todos los pozos con survey (COLUMNAS_TRAYECTORIA, ordenadas por pozo y MD)
+    global _ultimo
+    inicio = time.perf_counter()
+    with _lock:
+        with conexion_bd() as conexion:
+            crear_tabla(conexion)
+            cursor = conexion.cursor()
+            cursor.execute(f"SELECT Well_Id, COUNT(*), MAX(Cargado) FROM {TABLA_ESTACIONES} GROUP BY Well_Id")
+            marcas = {str(pozo): (int(estaciones), str(cargado)) for pozo, estaciones, cargado in cursor.fetchall()}
+            cursor.close()
+        if _ultimo[0] == marcas:
+            return _ultimo[1]
+
+        # Pozos que ya no tienen survey
+        for pozo in set(_trayectorias) - set(marcas):
+            del _trayectorias[pozo]
+
+        estaciones = _leer_cambios(marcas)
+        if not estaciones.empty:
+            estaciones = estaciones.astype({"MD": float, "Inclinacion": float, "Azimut": float})
+            pozos = estaciones["Well_Id"].to_numpy(dtype=object)
+            md = estaciones["MD"].to_numpy()
+            norte, este, tvd = minima_curvatura(pozos, md, estaciones["Inclinacion"], estaciones["Azimut"])
+
+            # Arreglos de cada pozo: un tramo del resultado por pozo (las estaciones vienen agrupadas por pozo)
+            inicios = np.flatnonzero(np.r_[True, pozos[1:] != pozos[:-1]])
+            for inicio_pozo, fin_pozo in zip(inicios, np.r_[inicios[1:], len(pozos)]):
+                pozo = pozos[inicio_pozo]
+                tramo = slice(inicio_pozo, fin_pozo)
+                _trayectorias[pozo] = (marcas[pozo], (md[tramo], norte[tramo], este[tramo], tvd[tramo]))
+            print(f"Trayectorias: {estaciones['Well_Id'].nunique()} pozos recalculados ({len(estaciones)} estaciones) en {time.perf_counter() - inicio:.2f} s")
+
+        pozos = sorted(pozo for pozo in marcas if pozo in _trayectorias)
+        if not pozos:
+            resultado = _trayectoria_vacia()
+        else:
+            arreglos = [_trayectorias[pozo][1] for pozo in pozos]
+            resultado = pd.DataFrame({
+                "Well_Id": np.repeat(pozos, [len(md) for md, _, _, _ in arreglos]),
+                **{columna: np.concatenate([arreglo[i] for arreglo in arreglos]) for i, columna in enumerate(COLUMNAS_TRAYECTORIA[1:])},
+            })
+        _ultimo = (marcas, resultado)
+        return resultado
+
+if __name__ == "__main__":
+    import sys
+    for archivo in sys.argv[1:]:
+        ingerir_estaciones(pd.read_csv(archivo))
+    trayectorias_actualizadas()
@@ -2,18 +2,50 @@
 # Este modulo es para funciones reutilizables del main o dasboard principal
 # ---------------------------------------------------------------------------------------------------------------------------------------------------
 
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 import mysql.connector
+from mysql.connector import pooling
+import pandas as pd
 from datetime import datetime
-from dash import html
+from dash import dcc, html
+from cache_consultas import CacheConsultas
+
+db_config = {
+    "host": "104.196.38.12",
+    "user": "root",
+    "password": "z8]$>V;XU]@c,G}*",
+    "database": "tablero_geohallitians"
+}
+
+# "mysql" (servidor remoto) o "sqlite" (base embebida de backend_local.py, para correr y medir el dashboard sin el servidor)
+BACKEND = os.environ.get("GEOHALLITIANS_BACKEND", "mysql").lower()
+
+# Número máximo de conexiones abiertas por cada proceso (cada worker de gunicorn tiene su propio pool)
+TAMANO_POOL = int(os.environ.get("GEOHALLITIANS_POOL_SIZE", "5"))
+
+_pool = None
+_pool_pid = None
+_pool_cupos = None
+_pool_lock = threading.Lock()
+
+# Cache de resultados: en memoria (LRU con TTL) y en disco compartido entre workers y reinicios.
+# GEOHALLITIANS_CACHE_DIR vacío desactiva el cache en disco; GEOHALLITIANS_CACHE_DISCO_MB limita su tamaño.
+cache_consultas = CacheConsultas(
+    ttl=int(os.environ.get("GEOHALLITIANS_CACHE_TTL", "600")),
+    max_bytes=int(os.environ.get("GEOHALLITIANS_CACHE_MB", "256")) * 1024 * 1024,
+    max_bytes_disco=int(os.environ.get("GEOHALLITIANS_CACHE_DISCO_MB", "2048")) * 1024 * 1024,
+    directorio=os.environ.get("GEOHALLITIANS_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache_consultas")) or None,
+)
 
 def get_database_connection():
-    db_config = {
-        "host": "104.196.38.12",
-        "user": "root",
-        "password": "z8]$>V;XU]@c,G}*",
-        "database": "tablero_geohallitians"
-    }
-    
+    if BACKEND == "sqlite":
+        from backend_local import abrir_conexion_local
+        return abrir_conexion_local()
+
     try:
         conexion = mysql.connector.connect(**db_config)
         database = db_config["database"]
@@ -23,6 +55,151 @@ def get_database_connection():
         print(f"Error al conectar a la base de datos: {err}")
         return None
 
+def get_connection_pool():
+    global _pool, _pool_pid, _pool_cupos
+
+    pid = os.getpid()
+    with _pool_lock:
+        # Si el proceso cambió (fork de gunicorn) el pool heredado comparte los sockets del padre:
+        # se descarta sin cerrarlo y se crea uno nuevo para este worker
+        if _pool is None or _pool_pid != pid:
+            _pool = pooling.MySQLConnectionPool(
+                pool_name=f"geohallitians-{pid}",
+                pool_size=TAMANO_POOL,
+                pool_reset_session=True,
+                **db_config
+            )
+            _pool_cupos = threading.BoundedSemaphore(TAMANO_POOL)
+            _pool_pid = pid
+            print(f"Pool de conexiones creado para el proceso {pid} ({TAMANO_POOL} conexiones)")
+        return _pool, _pool_cupos
+
+@contextmanager
+def conexion_bd():
+    if BACKEND == "sqlite":
+        # SQLite no necesita pool: abrir una conexión por uso es barato y cada hilo tiene la suya
+        from backend_local import conexion_local
+        with conexion_local() as conexion:
+            yield conexion
+        return
+
+    pool, cupos = get_connection_pool()
+
+    # Espera a que haya una conexión libre en lugar de fallar con PoolError cuando el pool está agotado
+    with cupos:
+        conexion = pool.get_connection()
+        try:
+            # Verifica la conexión al sacarla del pool; si el servidor la cerró, se reconecta
+            conexion.ping(reconnect=True, attempts=3, delay=1)
+            yield conexion
+        finally:
+            # En una conexión del pool, close() la devuelve al pool
+            conexion.close()
+
+@contextmanager
+def bloqueo_bd(conexion, nombre, espera=0):
+    # Candado con nombre compartido por todos los procesos que usan la base (workers de gunicorn, scripts de consola).
+    # Entrega True si se obtuvo antes de 'espera' segundos y False si otro proceso lo sigue teniendo.
+    if BACKEND == "sqlite":
+        from backend_local import bloqueo_local
+        with bloqueo_local(nombre, espera) as obtenido:
+            yield obtenido
+        return
+
+    # Los nombres de GET_LOCK valen para todo el servidor: se califican con el nombre de la base
+    nombre = f"{db_config['database']}.{nombre}"
+    cursor = conexion.cursor()
+    cursor.execute("SELECT GET_LOCK(%s, %s)", (nombre, espera))
+    obtenido = cursor.fetchall()[0][0] == 1
+    try:
+        yield obtenido
+    finally:
+        if obtenido:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (nombre,))
+            cursor.fetchall()
+        cursor.close()
+
+def leer_sql_sin_cache(query, params=None):
+    # Cada consulta usa su propia conexión del pool, por lo que se puede llamar desde varios hilos
+    with conexion_bd() as conexion:
+        return pd.read_sql(query, conexion, params=params)
+
+def leer_sql(query, params=None, usar_cache=True):
+    if not usar_cache:
+        return leer_sql_sin_cache(query, params)
+
+    texto = query if params is None else f"{query} -- {params!r}"
+    return cache_consultas.obtener(texto, lambda: leer_sql_sin_cache(query, params), leer_sql_sin_cache)
+
+def agregar_tabla(tabla, agregaciones, filas_por_bloque=100_000):
+    # agregaciones: {alias: (función, columna)} con función SUM, AVG, MIN, MAX o COUNT.
+    # Se calcula en el servidor y solo viaja una fila; si el backend no puede agregar, se reduce leyendo la tabla por bloques.
+    sql = "SELECT " + ", ".join(
+        f"{funcion}(`{columna}`) AS `{alias}`" for alias, (funcion, columna) in agregaciones.items()
+    ) + f" FROM {tabla}"
+    try:
+        return leer_sql(sql)
+    except (pd.errors.DatabaseError, mysql.connector.Error) as err:
+        print(f"No se pudo agregar '{tabla}' en el servidor, se reduce por bloques: {err}")
+
+    columnas = sorted({columna for _, columna in agregaciones.values()})
+    sumas = pd.Series(0.0, index=columnas)
+    conteos = pd.Series(0, index=columnas)
+    minimos = pd.Series(float("nan"), index=columnas)
+    maximos = pd.Series(float("nan"), index=columnas)
+
+    with conexion_bd() as conexion:
+        lista = ", ".join(f"`{columna}`" for columna in columnas)
+        for bloque in pd.read_sql(f"SELECT {lista} FROM {tabla}", conexion, chunksize=filas_por_bloque):
+            bloque = bloque.apply(pd.to_numeric, errors="coerce")
+            sumas += bloque.sum()
+            conteos += bloque.count()
+            minimos = minimos.combine(bloque.min(), min) if minimos.notna().any() else bloque.min()
+            maximos = maximos.combine(bloque.max(), max) if maximos.notna().any() else bloque.max()
+
+    resultados = {
+        "SUM": sumas.where(conteos > 0),
+        "AVG": sumas / conteos.where(conteos > 0),
+        "COUNT": conteos,
+        "MIN": minimos,
+        "MAX": maximos,
+    }
+    return pd.DataFrame([{alias: resultados[funcion.upper()][columna] for alias, (funcion, columna) in agregaciones.items()}])
+
+def ejecutar_con_conexion(funcion, *args):
+    # Ejecuta una función que recibe la conexión como primer argumento usando una conexión del pool
+    with conexion_bd() as conexion:
+        return funcion(conexion, *args)
+
+def ejecutar_en_cache(clave, tablas, funcion, *args):
+    # Igual que ejecutar_con_conexion, pero el resultado se guarda en el cache mientras las tablas indicadas no cambien
+    return cache_consultas.obtener(clave, lambda: ejecutar_con_conexion(funcion, *args), leer_sql_sin_cache, tablas=tablas)
+
+def cargar_consultas(consultas, max_workers=None):
+    # Ejecuta en paralelo las entradas de un registro {nombre: consulta SQL o función sin argumentos}
+    # y devuelve los resultados y el tiempo de cada una. El número de hilos no supera el tamaño del pool.
+    max_workers = max_workers or min(TAMANO_POOL, len(consultas))
+    resultados = {}
+    tiempos = {}
+
+    def ejecutar(consulta):
+        inicio = time.perf_counter()
+        resultado = consulta() if callable(consulta) else leer_sql(consulta)
+        return resultado, time.perf_counter() - inicio
+
+    inicio_total = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="carga-consultas") as executor:
+        futuros = {executor.submit(ejecutar, consulta): nombre for nombre, consulta in consultas.items()}
+        for futuro in as_completed(futuros):
+            nombre = futuros[futuro]
+            resultados[nombre], tiempos[nombre] = futuro.result()
+            print(f"  {nombre}: {tiempos[nombre]:.2f} s")
+    total = time.perf_counter() - inicio_total
+
+    print(f"Carga de {len(consultas)} consultas en {total:.2f} s con {max_workers} hilos (secuencial: {sum(tiempos.values()):.2f} s)")
+    print(f"Cache de consultas: {cache_consultas.estadisticas()}")
+    return resultados, tiempos
+
 def obtener_numero_de_pozos(conexion):
     if conexion:
         # Consulta SQL para contar los pozos en la tabla wells_master
@@ -34,12 +211,13 @@ def obtener_numero_de_pozos(conexion):
     
         # Obtiene el resultado
         resultado = cursor.fetchone()[0]
+        cursor.close()
     
         return resultado
     else:
         return 0
 
-def generate_data_card(title, data, color):
+def generate_data_card(title, data, color, data_id=None):
     return html.Div(
         style={'height': '110px', 'textAlign': 'center', 'align-content': 'right', 'align-items': 'right', 'border-radius':'7px', 'box-shadow': '0px 0px 5px 2px rgba(255, 255, 255, 0.2)', 'backgroundColor': '#131313', 'margin-bottom': '30px'},
         children=[
@@ -58,7 +236,36 @@ def generate_data_card(title, data, color):
             html.Div(
                 data,
                 style={'paddingTop': '7px', 'fontSize': '300%', 'color': color, 'textAlign': 'center'},
+                # id opcional para que un callback pueda actualizar el valor
+                **({'id': data_id} if data_id else {}),
+            ),
+        ],
+    )
+
+def generate_lazy_card(card_id, title, style):
+    # Tarjeta con solo el título y un spinner; el contenido lo llena el callback de 'contenido-{card_id}'
+    return html.Div(
+        style=style,
+        children=[
+            html.Div(
+                title,
+                style={
+                    'paddingTop': '10px',
+                    'textAlign': 'center',
+                    'align-content': 'center',
+                    'color': 'white',
+                    'borderBottom': '1px solid white',
+                    'paddingBottom': '10px',
+                    'fontWeight': 'bold',
+                },
+            ),
+            dcc.Loading(
+                html.Div(id=f'contenido-{card_id}'),
+                type='circle',
+                color='#00CCFF',
             ),
+            # Versión de los datos que muestra la tarjeta; al cambiar, el callback vuelve a construir el contenido
+            dcc.Store(id=f'version-{card_id}', data=0),
         ],
     )
 